@@ -1,45 +1,201 @@
 #!/usr/bin/python3
 
+import contextlib
+import json
 import logging
-from typing import Any, Union
-import requests
-import urllib
-import urllib.parse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Union
 
+from .AirzoneCloudBase import AirzoneCloudBase
 from .Installation import Installation
-from .Group import Group
 from .Device import Device
-from .constants import API_URL
+from .DeviceState import DeviceState
+from .CommandQueue import CommandQueue
+from .ConcurrencyLimiter import ConcurrencyLimiter
+from .Metrics import Metrics
+from .RetryPolicy import RetryPolicy
+from .TokenStore import TokenStore
+from .constants import (
+    CONFIG_TTL,
+    CONFIRM_INITIAL_DELAY,
+    CONFIRM_MAX_DELAY,
+    INSTALLATIONS_PAGE_SIZE,
+    REQUEST_TIMEOUT,
+    SNAPSHOT_VERSION,
+)
+
+# requests is only imported when an api is created (and RealtimeListener when
+# listening, PollScheduler is only referenced for typing, it imports this module)
+if TYPE_CHECKING:
+    import requests
+
+    from .PollScheduler import PollScheduler
+    from .RealtimeListener import RealtimeListener
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class AirzoneCloud:
+class AirzoneCloud(AirzoneCloudBase):
     """Allow to connect to AirzoneCloud API"""
 
-    _email: str = None
-    _password: str = None
-    _user_agent: str = "Mozilla/5.0 (Linux; Android 6.0.1; Nexus 7 Build/MOB30X; wv) AppleWebKit/537.26 (KHTML, like Gecko) Version/4.0 Chrome/70.0.3538.110 Safari/537.36"
-    _session: requests.Session = None
-    _token: str = None
+    _session: "requests.Session" = None
+    _session_owned: bool = False
     _installations: "list[Installation]" = []
+    _installations_pages: "Iterator[list]" = None
+    _installations_lock: threading.RLock = None
+    _lazy: bool = False
+    _max_workers: int = 8
+    _executor: ThreadPoolExecutor = None
+    _executor_owned: bool = True
+    _login_lock: threading.Lock = None
+    _state_ttl: float = 0
+    _state_stale_ttl: float = 0
+    _state_cache_stats: "dict[str, int]" = {}
+    _state_cache_lock: threading.Lock = None
+    _command_queue: CommandQueue = None
+    _confirm_timeout: float = None
+    _concurrency_limiter: ConcurrencyLimiter = None
+    _poll_scheduler: "PollScheduler" = None
+
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        user_agent: str = None,
+        lazy: bool = False,
+        max_workers: int = 8,
+        state_ttl: float = 0,
+        state_stale_ttl: float = 0,
+        config_ttl: float = CONFIG_TTL,
+        commands_window: float = 0,
+        confirm_timeout: float = None,
+        retry_policy: RetryPolicy = None,
+        rate_limit: float = None,
+        rate_burst: int = None,
+        session: "requests.Session" = None,
+        adapter: "requests.adapters.HTTPAdapter" = None,
+        pool_connections: int = 10,
+        pool_maxsize: int = None,
+        timeout: "Union[float, tuple[float, float]]" = REQUEST_TIMEOUT,
+        token_store: TokenStore = None,
+        api_url: str = None,
+        metrics: "Union[Metrics, bool]" = True,
+        executor: ThreadPoolExecutor = None,
+        concurrency_limiter: ConcurrencyLimiter = None,
+    ) -> None:
+        """Initialize API connection
+
+        lazy: if True, nothing is loaded at init: login, installations, groups and
+        devices states are fetched on first access, then memoized
+        max_workers: maximum number of threads used to refresh devices in parallel
+        state_ttl: seconds during which a device state is served from cache instead
+        of being refreshed (0 to always refresh)
+        state_stale_ttl: seconds after state_ttl during which the expired state is
+        still served while being refreshed in background
+        config_ttl: seconds during which a device config (see Device.config) is
+        served from cache, as it rarely changes (None to keep it until forced)
+        commands_window: seconds during which devices commands are queued before
+        being sent, only the last value of each device param is sent (0 to send
+        commands immediately). Devices setters then return at once and their auto
+        refresh is done in background once commands are sent
+        confirm_timeout: default for commands auto refresh: instead of waiting
+        delay_refresh then refreshing, devices are polled with an exponential
+        backoff until their states confirm the command or confirm_timeout seconds
+        are elapsed (None to wait delay_refresh)
+        retry_policy: how failed requests (5xx, 429, timeouts) are retried (default
+        to RetryPolicy(), RetryPolicy(max_retries=0) to disable retries)
+        rate_limit: maximum requests per second sent by this api (None for no limit)
+        rate_burst: maximum requests sent at once under rate_limit
+        session: optional preconfigured requests session (not closed by close())
+        adapter: optional transport adapter mounted on the session (default to a
+        KeepAliveAdapter sized with pool_connections & pool_maxsize)
+        pool_connections: number of hosts kept in the connections pool
+        pool_maxsize: maximum connections kept open per host (default to
+        max_workers, so that parallel requests always reuse warm connections)
+        timeout: seconds before a request fails, as (connect, read) or a single
+        value for both (None to wait forever)
+        token_store: where the token is kept between api instances (like
+        FileTokenStore()): a still valid stored token is reused instead of login
+        api_url: AirzoneCloud api base url (to use another server, like MockServer)
+        metrics: count requests by endpoint (see metrics), or a Metrics shared with
+        other apis (False to disable)
+        executor: optional thread pool shared with other apis, used instead of
+        max_workers threads (not stopped by close())
+        concurrency_limiter: optional limit of requests sent at the same time (like
+        ConcurrencyLimiter(4, parent=limiter_shared_by_all_accounts))
+        """
+        super().__init__(
+            email,
+            password,
+            user_agent=user_agent,
+            config_ttl=config_ttl,
+            retry_policy=retry_policy,
+            rate_limit=rate_limit,
+            rate_burst=rate_burst,
+            timeout=timeout,
+            token_store=token_store,
+            api_url=api_url,
+            metrics=metrics,
+        )
+        self._lazy = lazy
+        self._max_workers = max(1, int(max_workers))
+        self._login_lock = threading.Lock()
+        self._installations_lock = threading.RLock()
+        self._state_ttl = state_ttl
+        self._state_stale_ttl = state_stale_ttl
+        self._state_cache_stats = {"hits": 0, "stale_hits": 0, "misses": 0}
+        self._state_cache_lock = threading.Lock()
+        self._command_queue = CommandQueue(self, commands_window)
+        self._confirm_timeout = confirm_timeout
+        self._concurrency_limiter = concurrency_limiter
+        if executor is not None:
+            self._executor = executor
+            self._executor_owned = False
+
+        # init new Session (with a pool large enough for parallel requests)
+        import requests
+        from .KeepAliveAdapter import KeepAliveAdapter
+
+        self._session_owned = session is None
+        self._session = session if session is not None else requests.Session()
+        if adapter is None and session is None:
+            adapter = KeepAliveAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize or max(self._max_workers, pool_connections),
+            )
+        if adapter is not None:
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
 
-    def __init__(self, email: str, password: str, user_agent: str = None) -> None:
-        """Initialize API connection"""
-        self._email = email
-        self._password = password
-        if user_agent is not None and isinstance(user_agent, str):
-            self._user_agent = user_agent
-
-        # init new Session
-        self._session = requests.Session()
+        if lazy:
+            # installations will be loaded on first access
+            self._installations = None
+            return
 
-        # login
-        self._login()
+        # login (or reuse stored token)
+        self._get_token()
 
         # load installations
         self._load_installations()
 
+    def __enter__(self) -> "AirzoneCloud":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Send queued commands, stop the thread pool and close the http session (only if created by this api)"""
+        self._command_queue.flush(raise_errors=False)
+        executor, self._executor = self._executor, None
+        if executor is not None and self._executor_owned:
+            executor.shutdown(wait=True)
+        if self._session_owned:
+            self._session.close()
+
     #
     # getters
     #
@@ -47,47 +203,253 @@ class AirzoneCloud:
     @property
     def installations(self) -> "list[Installation]":
         """Get installations list"""
+        if self._installations is None or self._installations_pages is not None:
+            self._load_remaining_installations()
         return self._installations
 
+    def iter_installations(self) -> "Iterator[Installation]":
+        """Iterate over installations without building a list
+
+        If installations are not loaded yet (lazy mode), they are yielded as soon
+        as each page of installations is received. Each page is memoized when
+        received, so an iteration stopped early is resumed by the next one.
+        """
+        index = 0
+        while True:
+            with self._installations_lock:
+                if self._installations is None:
+                    self._installations = []
+                    self._installations_pages = self._api_iter_installations_pages()
+                while (
+                    index >= len(self._installations)
+                    and self._installations_pages is not None
+                ):
+                    self._load_installations_page()
+                if index >= len(self._installations):
+                    return
+                installation = self._installations[index]
+            index += 1
+            yield installation
+
+    #
+    # Refresh
+    #
+
+    def refresh_installations(self) -> "AirzoneCloud":
+        """Refresh installations, then groups & devices data of installations already loaded"""
+        previous_installations = self._installations or []
+        self._load_installations()
+        for installation in previous_installations:
+            if installation._groups is not None and installation in self._installations:
+                installation._load_groups()
+        return self
+
+    def refresh_all_devices(self) -> "AirzoneCloud":
+        """Refresh all devices of all installations in parallel (errors are available in refresh_errors)"""
+        self._refresh_errors = self._refresh_devices(self.all_devices)
+        return self
+
+    def refresh_devices(
+        self, devices: "Iterable[Device]", force: bool = False
+    ) -> "AirzoneCloud":
+        """Refresh some devices in parallel (errors are available in refresh_errors)
+
+        force: refresh even states still fresh in the states cache (see state_ttl)
+        """
+        self._refresh_errors = self._refresh_devices(list(devices), force=force)
+        return self
+
     @property
-    def all_groups(self) -> "list[Group]":
-        """Get all groups from all installations"""
-        result = []
-        for installation in self.installations:
-            for group in installation.groups:
-                result.append(group)
-        return result
+    def state_cache_stats(self) -> "dict[str, int]":
+        """Return devices states cache counters (hits, stale_hits & misses)"""
+        with self._state_cache_lock:
+            return dict(self._state_cache_stats)
+
+    #
+    # Commands
+    #
+
+    def flush_commands(self) -> "AirzoneCloud":
+        """Send now devices commands queued during commands_window"""
+        self._command_queue.flush()
+        return self
+
+    def commands_batch(self) -> "contextlib.AbstractContextManager":
+        """Return a context in which devices commands are queued, then sent together at its end (first error raised)
+
+        Usage:
+            with api.commands_batch():
+                device.turn_on(auto_refresh=False)
+                device.set_temperature(21, auto_refresh=False)
+        """
+        return self._command_queue.batch()
+
+    def wait_confirmed(self, devices: "Iterable[Device]", timeout: float) -> bool:
+        """Poll devices until their states reflect the commands sent to them (False if not confirmed after timeout seconds)"""
+        return self._wait_confirmed(list(devices), timeout)
 
     @property
-    def all_devices(self) -> "list[Device]":
-        """Get all devices from all installations"""
-        result = []
-        for group in self.installations:
-            for device in group.all_devices:
-                result.append(device)
-        return result
+    def commands_errors(self) -> "dict[str, Exception]":
+        """Return errors of the last commands sent by device id, also when sent by the commands_window timer (empty if all were sent)"""
+        return self._command_queue.last_errors
 
     #
-    # Refresh
+    # Snapshot
     #
 
-    def refresh_installations(self) -> "AirzoneCloud":
-        """Refresh installations"""
+    def save_snapshot(self, path: str) -> "AirzoneCloud":
+        """Save installations, groups & devices states loaded so far in a json file (written atomically)"""
+        now = time.time()
+        monotonic_now = time.monotonic()
+        installations = []
+        if self._installations_pages is not None:
+            self._load_remaining_installations()
+        for installation in self._installations or []:
+            groups = None
+            if installation._groups is not None:
+                groups = []
+                for group in installation._groups:
+                    states = {}
+                    for device in group._devices:
+                        if device._state is None:
+                            continue
+                        refreshed_at = None
+                        if device._state_refreshed_at is not None:
+                            refreshed_at = now - (
+                                monotonic_now - device._state_refreshed_at
+                            )
+                        states[device.id] = {
+                            "state": device._state.to_raw(),
+                            "refreshed_at": refreshed_at,
+                        }
+                    groups.append({"data": group._data, "states": states})
+            installations.append({"data": installation._data, "groups": groups})
+
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "email": self._email,
+            "saved_at": now,
+            "installations": installations,
+        }
+        tmp_path = "{}.tmp".format(path)
+        with open(tmp_path, "w") as file:
+            json.dump(snapshot, file, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        _LOGGER.info("Snapshot saved to %s", path)
+        return self
+
+    @classmethod
+    def from_snapshot(
+        cls, path: str, email: str, password: str, revalidate: bool = True, **kwargs
+    ) -> "AirzoneCloud":
+        """Instance an api from a file written by save_snapshot(), without any request
+
+        Installations, groups & devices states are restored as saved, then
+        revalidated from AirzoneCloud in a background thread (unless revalidate is
+        False). Other arguments are the same as AirzoneCloud().
+        """
+        with open(path, "r") as file:
+            snapshot = json.load(file)
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise Exception(
+                "Unsupported snapshot version {} in {}".format(
+                    snapshot.get("version"), path
+                )
+            )
+        if snapshot.get("email") != email:
+            raise Exception(
+                "Snapshot {} was saved for another account ({})".format(
+                    path, snapshot.get("email")
+                )
+            )
+
+        # restore without any request, then apply the lazy option asked
+        lazy = kwargs.pop("lazy", False)
+        api = cls(email, password, lazy=True, **kwargs)
+        api._restore_snapshot(snapshot)
+        api._lazy = lazy
+        _LOGGER.info("Snapshot restored from %s", path)
+
+        if revalidate:
+            threading.Thread(
+                target=api._revalidate_in_background,
+                name="AirzoneCloudRevalidate",
+                daemon=True,
+            ).start()
+        return api
+
+    def revalidate(self) -> "AirzoneCloud":
+        """Reload installations & groups, then force refresh of all loaded devices states"""
         self._load_installations()
+        for installation in self._installations:
+            if installation._groups is not None:
+                installation._load_groups()
+        self._refresh_errors = self._refresh_devices(
+            [
+                device
+                for installation in self._installations
+                if installation._groups is not None
+                for group in installation._groups
+                for device in group._devices
+            ],
+            force=True,
+        )
         return self
 
+    #
+    # Realtime
+    #
+
+    def listen_realtime(
+        self, poll_interval: float = 30.0, **kwargs
+    ) -> "RealtimeListener":
+        """Start a RealtimeListener patching devices states with updates pushed by AirzoneCloud
+
+        While disconnected, devices are refreshed every poll_interval seconds.
+        Call stop() on the returned listener to stop it.
+        """
+        from .RealtimeListener import RealtimeListener
+
+        return RealtimeListener(self, poll_interval=poll_interval, **kwargs).start()
+
     #
     # private
     #
 
+    def _get_token(self) -> str:
+        """Return current token: stored one if still valid, else login (also when about to expire)"""
+        if self._token is None or self._is_token_expired():
+            with self._login_lock:
+                if self._token is None and self._load_stored_token():
+                    return self._token
+                if self._token is None or self._is_token_expired():
+                    self._login()
+        return self._token
+
     def _login(self) -> str:
         """Login to  AirzoneCloud and return token"""
+        import requests
 
         try:
-            url = "{}/auth/login".format(API_URL)
+            url = "{}/auth/login".format(self._api_url)
             login_payload = {"email": self._email, "password": self._password}
             headers = {"User-Agent": self._user_agent}
-            response = self._session.post(url, headers=headers, json=login_payload)
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+            start = time.perf_counter()
+            with self._request_slot():
+                response = self._session.post(
+                    url, headers=headers, json=login_payload, timeout=self._timeout
+                )
+            if self._metrics is not None:
+                self._metrics.observe(
+                    "POST",
+                    "/auth/login",
+                    str(response.status_code),
+                    time.perf_counter() - start,
+                    len(response.request.body or b""),
+                    len(response.content),
+                )
             response.raise_for_status()
         except requests.exceptions.HTTPError as err:
             raise Exception(
@@ -96,57 +458,224 @@ class AirzoneCloud:
                 )
             ) from None
 
-        self._token = response.json().get("token")
-        if not self._token:
-            raise Exception(
-                "Unable to login to AirzoneCloud, cannot get token from response : {}".format(
-                    response
-                )
+        return self._set_token(response.json())
+
+    def _restore_snapshot(self, snapshot: dict) -> None:
+        """Rebuild installations, groups & devices from a snapshot (no request)"""
+        now = time.time()
+        monotonic_now = time.monotonic()
+        installations_snapshots = snapshot.get("installations", [])
+        self._set_installations_data(
+            [
+                installation_snapshot["data"]
+                for installation_snapshot in installations_snapshots
+            ]
+        )
+        for installation, installation_snapshot in zip(
+            self._installations, installations_snapshots
+        ):
+            if installation_snapshot.get("groups") is None:
+                continue
+            groups_snapshots = installation_snapshot["groups"]
+            installation._set_groups_data(
+                [group_snapshot["data"] for group_snapshot in groups_snapshots]
             )
+            for group, group_snapshot in zip(installation._groups, groups_snapshots):
+                states = group_snapshot.get("states", {})
+                for device in group._devices:
+                    if device.id not in states:
+                        continue
+                    device._state = DeviceState.parse(states[device.id]["state"])
+                    refreshed_at = states[device.id].get("refreshed_at")
+                    if refreshed_at is not None:
+                        device._state_refreshed_at = monotonic_now - (
+                            now - refreshed_at
+                        )
+
+    def _revalidate_in_background(self) -> None:
+        """Revalidate a restored snapshot (errors are only logged)"""
+        try:
+            self.revalidate()
+        except Exception as err:
+            _LOGGER.error("Unable to revalidate snapshot : %s", repr(err))
 
-        _LOGGER.info("Login success as {}".format(self._email))
+    def _load_all_groups(self) -> bool:
+        """Load installations & groups not loaded yet (lazy mode), return True if any was loaded"""
+        loaded = self._installations is None or self._installations_pages is not None
+        for installation in self.installations:
+            if installation._groups is None:
+                installation._load_groups()
+                loaded = True
+        return loaded
+
+    def _count_state_cache(self, counter: str) -> None:
+        """Increment a devices states cache counter (hits, stale_hits or misses)"""
+        with self._state_cache_lock:
+            self._state_cache_stats[counter] += 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the thread pool used for parallel requests (created on first use)"""
+        if self._executor is None:
+            with self._login_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers,
+                        thread_name_prefix="AirzoneCloud",
+                    )
+        return self._executor
+
+    def _request_slot(self) -> "contextlib.AbstractContextManager":
+        """Return the context in which a request is sent (waiting for the concurrency limiter if any)"""
+        if self._concurrency_limiter is not None:
+            return self._concurrency_limiter
+        return contextlib.nullcontext()
+
+    def _refresh_devices(
+        self, devices: "list[Device]", force: bool = False
+    ) -> "dict[str, Exception]":
+        """Refresh devices in parallel and return errors by device id"""
+        return self._call_devices(
+            devices, "refresh", lambda device: device.refresh(force)
+        )
 
-        return self._token
+    def _load_devices_config(
+        self, devices: "list[Device]", type: str, force: bool = False
+    ) -> "dict[str, Exception]":
+        """Load devices configs in parallel and return errors by device id"""
+        return self._call_devices(
+            devices,
+            "load config of",
+            lambda device: device.get_config(type, force),
+        )
+
+    def _call_devices(
+        self, devices: "list[Device]", action: str, call: "Callable[[Device], Any]"
+    ) -> "dict[str, Exception]":
+        """Call a function on each device in parallel and return errors by device id (action is logged on errors)"""
+        executor = self._get_executor()
+        futures = [(device, executor.submit(call, device)) for device in devices]
+        errors = {}
+        for device, future in futures:
+            err = future.exception()
+            if err is not None:
+                _LOGGER.error(
+                    "Unable to %s Device(name=%s, id=%s) : %s",
+                    action,
+                    device.name,
+                    device.id,
+                    repr(err),
+                )
+                errors[device.id] = err
+        return errors
+
+    def _wait_confirmed(self, devices: "list[Device]", timeout: float) -> bool:
+        """Poll devices until their states reflect the values sent (False on timeout)"""
+        deadline = time.monotonic() + timeout
+        delay = CONFIRM_INITIAL_DELAY
+        pending = [device for device in devices if device._expected]
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, CONFIRM_MAX_DELAY)
+            errors = self._refresh_devices(pending, force=True)
+            pending = [
+                device
+                for device in pending
+                if device.id in errors or not device._check_expected()
+            ]
+
+        for device in pending:
+            _LOGGER.warning(
+                "Values %s not confirmed after %ss for Device(name=%s, id=%s)",
+                device._expected,
+                timeout,
+                device.name,
+                device.id,
+            )
+            device._expected = {}
+        return not pending
 
     def _load_installations(self) -> "list[Installation]":
         """Load all installations for this account"""
-        previous_installations = self._installations
-        self._installations = []
         try:
-            for installation_data in self._api_get_installations_list():
-                installation = None
-                # search installation in previous_installations (if where are refreshing installations)
-                for previous_installation in previous_installations:
-                    if previous_installation.id == installation_data.get(
-                        "installation_id"
-                    ):
-                        installation = previous_installation
-                        installation._set_data_refreshed(installation_data)
-                        break
-                # installation not found => instance new installation
-                if installation is None:
-                    installation = Installation(self, installation_data)
-                self._installations.append(installation)
+            return self._set_installations_data(self._api_get_installations_list())
         except RuntimeError:
             raise Exception("Unable to load installations from AirzoneCloud")
-        return self._installations
+
+    def _set_installations_data(
+        self, installations_data: "list[dict]"
+    ) -> "list[Installation]":
+        """Set installations from raw data, reusing already known installations"""
+        with self._installations_lock:
+            # installations of pages already received are reused too (lazy mode)
+            self._installations_pages = None
+            return super()._set_installations_data(installations_data)
+
+    def _load_remaining_installations(self) -> None:
+        """Receive installations pages not received yet (lazy mode)"""
+        for installation in self.iter_installations():
+            pass
+
+    def _load_installations_page(self) -> None:
+        """Add installations of the next page not received yet, lazy mode (lock must be held)"""
+        try:
+            installations_data = next(self._installations_pages, None)
+        except Exception:
+            # next iteration requests pages again, received installations are kept
+            self._installations_pages = self._api_iter_installations_pages()
+            raise
+        if installations_data is None:
+            self._installations_pages = None
+            return
+        known_ids = set(installation.id for installation in self._installations)
+        installations = [
+            self._new_installation(installation_data)
+            for installation_data in installations_data
+            if installation_data.get("installation_id") not in known_ids
+        ]
+        self._installations.extend(installations)
+        self._identity_map.replace_installations([], installations)
+
+    def _new_installation(self, installation_data: dict) -> Installation:
+        """Instance a new installation"""
+        return Installation(self, installation_data)
 
     #
     # API calls
     #
 
     def _api_get_installations_list(self) -> list:
-        """Http GET to load installations relations"""
+        """Http GET to load installations relations (all pages)"""
         _LOGGER.debug("_api_get_installations_list()")
-        # TODO manage pagination (10 installations max currently)
-        return self._api_get("/installations").get("installations", [])
+        result = []
+        for installations_data in self._api_iter_installations_pages():
+            result.extend(installations_data)
+        return result
+
+    def _api_iter_installations_pages(self) -> "Iterator[list]":
+        """Http GET each page of installations relations, yielding them one by one"""
+        seen_ids = set()
+        page = 0
+        while True:
+            _LOGGER.debug("_api_iter_installations_pages(page=%s)", page)
+            installations_data, is_last = self._parse_installations_page(
+                self._api_get(
+                    "/installations", {"items": INSTALLATIONS_PAGE_SIZE, "page": page}
+                ).get("installations", []),
+                seen_ids,
+            )
+            if installations_data:
+                yield installations_data
+            if is_last:
+                return
+            page += 1
 
     def _api_get_installation_groups_list(self, installation_id: str) -> list:
         """Http GET to load groups in a specific installation"""
         _LOGGER.debug(
-            "_api_get_installation_groups_list(installation_id={})".format(
-                installation_id
-            )
+            "_api_get_installation_groups_list(installation_id=%s)", installation_id
         )
         return self._api_get("/installations/{}".format(installation_id)).get(
             "groups", []
@@ -155,9 +684,9 @@ class AirzoneCloud:
     def _api_get_device_state(self, device_id: str, installation_id: str) -> dict:
         """Http GET to load state of a specific device"""
         _LOGGER.debug(
-            "_api_get_device_state(device_id={}, installation_id={})".format(
-                device_id, installation_id
-            )
+            "_api_get_device_state(device_id=%s, installation_id=%s)",
+            device_id,
+            installation_id,
         )
         return self._api_get(
             "/devices/{}/status".format(device_id),
@@ -169,9 +698,10 @@ class AirzoneCloud:
     ) -> dict:
         """Http GET to load config of a specific device"""
         _LOGGER.debug(
-            "_api_get_device_config(device_id={}, installation_id={}, type={})".format(
-                device_id, installation_id, type
-            )
+            "_api_get_device_config(device_id=%s, installation_id=%s, type=%s)",
+            device_id,
+            installation_id,
+            type,
         )
         return self._api_get(
             "/devices/{}/config".format(device_id),
@@ -188,9 +718,12 @@ class AirzoneCloud:
     ) -> Any:
         """Http PATCH to change a device parameter (state or config)"""
         _LOGGER.debug(
-            "_api_patch_device(device_id={}, installation_id={}, param={}, value={}, opts={})".format(
-                device_id, installation_id, param, value, opts
-            )
+            "_api_patch_device(device_id=%s, installation_id=%s, param=%s, value=%s, opts=%s)",
+            device_id,
+            installation_id,
+            param,
+            value,
+            opts,
         )
         return self._api_patch(
             "/devices/{}".format(device_id),
@@ -205,7 +738,7 @@ class AirzoneCloud:
     def _api_get(self, api_endpoint: str, params: dict = {}) -> Any:
         """Do a http GET request on an api endpoint"""
 
-        params["format"] = "json"
+        params = dict(params, format="json")
 
         return self._api_request(method="GET", api_endpoint=api_endpoint, params=params)
 
@@ -255,16 +788,74 @@ class AirzoneCloud:
         autoreconnect: bool = True,
     ) -> Any:
         """Do a http generic request on an api endpoint"""
+        import requests
 
-        # set headers
-        headers["Authorization"] = "Bearer {}".format(self._token)
+        # set headers (login on first request in lazy mode)
+        token = self._get_token()
+        headers = dict(headers)
+        headers["Authorization"] = "Bearer {}".format(token)
         headers["User-Agent"] = self._user_agent
 
         # generate url
-        url = "{}{}/?{}".format(API_URL, api_endpoint, urllib.parse.urlencode(params))
-
-        # make call
-        call = self._session.request(method=method, url=url, headers=headers, json=json)
+        url = self._get_request_url(api_endpoint, params)
+
+        # make call (retried according to retry policy)
+        attempt = 0
+        while True:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                with self._request_slot():
+                    call = self._session.request(
+                        method=method,
+                        url=url,
+                        headers=headers,
+                        json=json,
+                        timeout=self._timeout,
+                    )
+            except requests.exceptions.RequestException as err:
+                if self._metrics is not None:
+                    self._metrics.observe(
+                        method,
+                        api_endpoint,
+                        type(err).__name__,
+                        time.perf_counter() - start,
+                    )
+                delay = self._get_retry_delay(
+                    method,
+                    api_endpoint,
+                    attempt,
+                    error=err,
+                    request_sent=not isinstance(
+                        err, requests.exceptions.ConnectTimeout
+                    ),
+                )
+                if delay is None:
+                    raise
+            else:
+                if self._metrics is not None:
+                    self._metrics.observe(
+                        method,
+                        api_endpoint,
+                        str(call.status_code),
+                        time.perf_counter() - start,
+                        len(call.request.body or b""),
+                        len(call.content),
+                    )
+                if call.status_code < 400:
+                    break
+                delay = self._get_retry_delay(
+                    method,
+                    api_endpoint,
+                    attempt,
+                    status_code=call.status_code,
+                    retry_after=call.headers.get("Retry-After"),
+                )
+                if delay is None:
+                    break
+            time.sleep(delay)
+            attempt += 1
 
         if call.status_code == 401 and autoreconnect:  # unauthorized error
             # log
@@ -272,8 +863,12 @@ class AirzoneCloud:
                 "Get unauthorized error (token expired ?), trying to reconnect..."
             )
 
-            # try to reconnect
-            self._login()
+            # try to reconnect (only once if several threads get the error)
+            with self._login_lock:
+                if self._token == token:
+                    if self._metrics is not None:
+                        self._metrics.count_relogin()
+                    self._login()
 
             # retry get without autoreconnect (to avoid infinite loop)
             return self._api_request(
@@ -289,7 +884,7 @@ class AirzoneCloud:
         try:
             call.raise_for_status()
         except requests.exceptions.HTTPError as err:
-            _LOGGER.error(call.text)
+            _LOGGER.error("%s", call.text)
             raise err
 
         # decode json only if response is not empty
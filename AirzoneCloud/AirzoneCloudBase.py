@@ -0,0 +1,312 @@
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Union
+import urllib
+import urllib.parse
+
+from .IdentityMap import IdentityMap
+from .Metrics import Metrics
+from .Observable import Observable
+from .RateLimiter import RateLimiter
+from .RetryPolicy import RetryPolicy
+from .TokenStore import TokenStore
+from .constants import (
+    API_URL,
+    CONFIG_TTL,
+    INSTALLATIONS_PAGE_SIZE,
+    REQUEST_TIMEOUT,
+    TOKEN_EXPIRY_MARGIN,
+)
+
+if TYPE_CHECKING:
+    from .DeviceBase import DeviceBase
+    from .GroupBase import GroupBase
+    from .InstallationBase import InstallationBase
+    from .TelemetryRecorder import TelemetryRecorder
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AirzoneCloudBase(Observable):
+    """Account, token & installations tree shared by AirzoneCloud and AsyncAirzoneCloud
+
+    Nothing here sends a request: subclasses login, load installations (in
+    _new_installation()) and send requests, using the helpers below to parse
+    responses and decide retries.
+    """
+
+    _email: str = None
+    _password: str = None
+    _user_agent: str = (
+        "Mozilla/5.0 (Linux; Android 6.0.1; Nexus 7 Build/MOB30X; wv) AppleWebKit/537.26 (KHTML, like Gecko) Version/4.0 Chrome/70.0.3538.110 Safari/537.36"
+    )
+    _api_url: str = API_URL
+    _timeout: "tuple[float, float]" = REQUEST_TIMEOUT
+    _token: str = None
+    _token_expires_at: float = None
+    _token_store: TokenStore = None
+    _installations: "list[InstallationBase]" = []
+    _identity_map: IdentityMap = None
+    _refresh_errors: "dict[str, Exception]" = {}
+    _config_ttl: float = CONFIG_TTL
+    _retry_policy: RetryPolicy = None
+    _rate_limiter: RateLimiter = None
+    _state_recorders: "tuple[TelemetryRecorder]" = ()
+    _metrics: Metrics = None
+
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        user_agent: str = None,
+        config_ttl: float = CONFIG_TTL,
+        retry_policy: RetryPolicy = None,
+        rate_limit: float = None,
+        rate_burst: int = None,
+        timeout: "Union[float, tuple[float, float]]" = REQUEST_TIMEOUT,
+        token_store: TokenStore = None,
+        api_url: str = None,
+        metrics: "Union[Metrics, bool]" = True,
+    ) -> None:
+        self._email = email
+        self._password = password
+        if user_agent is not None and isinstance(user_agent, str):
+            self._user_agent = user_agent
+        self._identity_map = IdentityMap()
+        self._config_ttl = config_ttl
+        self._retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        if rate_limit:
+            self._rate_limiter = RateLimiter(rate_limit, rate_burst)
+        self._timeout = timeout
+        self._token_store = token_store
+        if api_url is not None:
+            self._api_url = api_url.rstrip("/")
+        if isinstance(metrics, Metrics):
+            self._metrics = metrics
+        elif metrics:
+            self._metrics = Metrics()
+
+    #
+    # getters
+    #
+
+    @property
+    def installations(self) -> "list[InstallationBase]":
+        """Get installations list"""
+        return self._installations
+
+    @property
+    def all_groups(self) -> "list[GroupBase]":
+        """Get all groups from all installations"""
+        return list(self.iter_groups())
+
+    @property
+    def all_devices(self) -> "list[DeviceBase]":
+        """Get all devices from all installations"""
+        return list(self.iter_devices())
+
+    def iter_installations(self) -> "Iterator[InstallationBase]":
+        """Iterate over installations without building a list"""
+        yield from list(self._installations)
+
+    def iter_groups(self) -> "Iterator[GroupBase]":
+        """Iterate over all groups from all installations without building a list"""
+        for installation in self.iter_installations():
+            yield from installation.groups
+
+    def iter_devices(self) -> "Iterator[DeviceBase]":
+        """Iterate over all devices from all installations without building a list"""
+        for installation in self.iter_installations():
+            yield from installation.iter_devices()
+
+    #
+    # lookups
+    #
+
+    def get_installation(self, installation_id: str) -> "InstallationBase":
+        """Return installation by id (None if not found)"""
+        return self._lookup(self._identity_map.get_installation, installation_id)
+
+    def get_group(self, group_id: str) -> "GroupBase":
+        """Return group by id (None if not found)"""
+        return self._lookup(self._identity_map.get_group, group_id)
+
+    def get_device(self, device_id: str) -> "DeviceBase":
+        """Return device by id (None if not found)"""
+        return self._lookup(self._identity_map.get_device, device_id)
+
+    def find_devices(
+        self,
+        ws_id: str = None,
+        name: str = None,
+        system_number: int = None,
+        zone_number: int = None,
+    ) -> "list[DeviceBase]":
+        """Return devices matching all given criteria (webserver mac address, name, system & zone numbers)"""
+        self._load_all_groups()
+        return self._identity_map.find_devices(
+            ws_id=ws_id,
+            name=name,
+            system_number=system_number,
+            zone_number=zone_number,
+        )
+
+    #
+    # Refresh
+    #
+
+    @property
+    def refresh_errors(self) -> "dict[str, Exception]":
+        """Return errors of the last refresh_all_devices() or refresh_devices() by device id (empty if all devices were refreshed)"""
+        return self._refresh_errors
+
+    @property
+    def metrics(self) -> Metrics:
+        """Return requests metrics (use as_dict() or to_prometheus() on it, None if disabled)"""
+        return self._metrics
+
+    #
+    # private
+    #
+
+    def _is_token_expired(self) -> bool:
+        """Return True if the token expires in less than TOKEN_EXPIRY_MARGIN seconds"""
+        return (
+            self._token_expires_at is not None
+            and time.time() > self._token_expires_at - TOKEN_EXPIRY_MARGIN
+        )
+
+    def _load_stored_token(self) -> bool:
+        """Reuse token from token store if still valid, return True if reused"""
+        if self._token_store is None:
+            return False
+        stored = self._token_store.load(self._email) or {}
+        if not stored.get("token"):
+            return False
+        self._token = stored.get("token")
+        self._token_expires_at = stored.get("expires_at")
+        if self._is_token_expired():
+            self._token = self._token_expires_at = None
+            return False
+        _LOGGER.info("Reuse stored token of %s", self._email)
+        return True
+
+    def _set_token(self, login_data: dict) -> str:
+        """Keep the token of a login response (stored if there is a token store) and return it"""
+        self._token = (login_data or {}).get("token")
+        if not self._token:
+            raise Exception(
+                "Unable to login to AirzoneCloud, cannot get token from response : {}".format(
+                    login_data
+                )
+            )
+        self._token_expires_at = TokenStore.get_expiry(self._token)
+        if self._token_store is not None:
+            self._token_store.save(self._email, self._token, self._token_expires_at)
+        if self._metrics is not None:
+            self._metrics.count_login()
+
+        _LOGGER.info("Login success as %s", self._email)
+
+        return self._token
+
+    def _load_all_groups(self) -> bool:
+        """Load installations & groups not loaded yet, return True if any was loaded (everything is loaded at once by default)"""
+        return False
+
+    def _lookup(self, get: "Callable[[str], Any]", key: str) -> Any:
+        """Get an object from the identity map, loading everything first if not found (lazy mode)"""
+        found = get(key)
+        if found is None and self._load_all_groups():
+            found = get(key)
+        return found
+
+    def _set_installations_data(
+        self, installations_data: "list[dict]"
+    ) -> "list[InstallationBase]":
+        """Set installations from raw data, reusing already known installations"""
+        previous_installations = self._installations or []
+        previous_by_id = dict(
+            (installation.id, installation) for installation in previous_installations
+        )
+        installations = []
+        for installation_data in installations_data:
+            # search installation in previous installations (if where are refreshing installations)
+            installation = previous_by_id.get(installation_data.get("installation_id"))
+            if installation is not None:
+                installation._set_data_refreshed(installation_data)
+            # installation not found => instance new installation
+            else:
+                installation = self._new_installation(installation_data)
+            installations.append(installation)
+        self._installations = installations
+        self._identity_map.replace_installations(previous_installations, installations)
+        return installations
+
+    @staticmethod
+    def _parse_installations_page(
+        installations_data: "list[dict]", seen_ids: "set[str]"
+    ) -> "tuple[list[dict], bool]":
+        """Return installations of a page not already received (added to seen_ids), and True if it is the last page"""
+        # only keep installations not already received (if pagination is ignored)
+        new_installations_data = [
+            installation_data
+            for installation_data in installations_data
+            if installation_data.get("installation_id") not in seen_ids
+        ]
+        seen_ids.update(
+            installation_data.get("installation_id")
+            for installation_data in new_installations_data
+        )
+        is_last = (
+            len(installations_data) < INSTALLATIONS_PAGE_SIZE
+            or not new_installations_data
+        )
+        return new_installations_data, is_last
+
+    def _get_request_url(self, api_endpoint: str, params: dict) -> str:
+        """Return url of an api endpoint with its query params"""
+        return "{}{}/?{}".format(
+            self._api_url, api_endpoint, urllib.parse.urlencode(params)
+        )
+
+    def _get_retry_delay(
+        self,
+        method: str,
+        api_endpoint: str,
+        attempt: int,
+        status_code: int = None,
+        retry_after: str = None,
+        error: Exception = None,
+        request_sent: bool = True,
+    ) -> float:
+        """Return seconds to wait before retrying a failed request according to the retry policy (None to not retry)
+
+        status_code: http status received (with its Retry-After header), or error:
+        exception raised without response (request_sent: False if the connection
+        failed before sending the request)
+        """
+        if not self._retry_policy.should_retry(
+            method, attempt, status_code=status_code, request_sent=request_sent
+        ):
+            return None
+        delay = self._retry_policy.get_delay(attempt, retry_after)
+        if error is not None:
+            _LOGGER.warning(
+                "%s %s failed (%s), retry in %.1fs",
+                method,
+                api_endpoint,
+                repr(error),
+                delay,
+            )
+        else:
+            _LOGGER.warning(
+                "%s %s failed with status %s, retry in %.1fs",
+                method,
+                api_endpoint,
+                status_code,
+                delay,
+            )
+        if self._metrics is not None:
+            self._metrics.count_retry(method, api_endpoint)
+        return delay
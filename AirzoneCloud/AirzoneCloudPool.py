@@ -0,0 +1,305 @@
+import http.cookiejar
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable, Iterator, Union
+
+from .AirzoneCloud import AirzoneCloud
+from .ConcurrencyLimiter import ConcurrencyLimiter
+from .Device import Device
+from .Installation import Installation
+from .Metrics import Metrics
+from .TokenStore import TokenStore
+
+# requests is only imported when a pool is created
+if TYPE_CHECKING:
+    import requests
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AirzoneCloudPool:
+    """Host many AirzoneCloud accounts on one connections pool and thread pool
+
+    All accounts share the same http session, threads and metrics. Requests sent
+    at the same time are limited for all accounts (max_concurrent_requests) and
+    for each account (max_concurrent_requests_per_account), so that a large
+    account can't use all connections.
+    """
+
+    _accounts: "dict[str, AirzoneCloud]" = {}
+    _accounts_lock: threading.Lock = None
+    _api_kwargs: dict = {}
+    _session: "requests.Session" = None
+    _session_owned: bool = False
+    _executor: ThreadPoolExecutor = None
+    _concurrency_limiter: ConcurrencyLimiter = None
+    _max_concurrent_requests_per_account: int = None
+    _metrics: Metrics = None
+    _token_store: TokenStore = None
+    _refresh_errors: "dict[str, Exception]" = {}
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        max_concurrent_requests: int = None,
+        max_concurrent_requests_per_account: int = 4,
+        session: "requests.Session" = None,
+        pool_maxsize: int = None,
+        token_store: TokenStore = None,
+        metrics: "Union[Metrics, bool]" = True,
+        **api_kwargs,
+    ) -> None:
+        """Initialize pool (add accounts with add_account() or add_accounts())
+
+        max_workers: threads shared by all accounts (parallel refreshes, commands)
+        max_concurrent_requests: maximum requests sent at the same time by all
+        accounts (default to max_workers)
+        max_concurrent_requests_per_account: maximum requests sent at the same time
+        by each account (None for no limit)
+        session: optional preconfigured requests session (not closed by close())
+        pool_maxsize: maximum connections kept open per host (default to
+        max_concurrent_requests)
+        token_store: where tokens of all accounts are kept (like FileTokenStore())
+        metrics: count requests of all accounts by endpoint, or a Metrics (False to
+        disable)
+        api_kwargs: default AirzoneCloud options of accounts (like lazy=True,
+        state_ttl=60, api_url=...)
+        """
+        max_workers = max(1, int(max_workers))
+        if max_concurrent_requests is None:
+            max_concurrent_requests = max_workers
+        self._accounts = {}
+        self._accounts_lock = threading.Lock()
+        self._api_kwargs = api_kwargs
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="AirzoneCloudPool"
+        )
+        self._concurrency_limiter = ConcurrencyLimiter(max_concurrent_requests)
+        self._max_concurrent_requests_per_account = max_concurrent_requests_per_account
+        self._token_store = token_store
+        if isinstance(metrics, Metrics):
+            self._metrics = metrics
+        elif metrics:
+            self._metrics = Metrics()
+
+        # one session for all accounts: cookies are refused so that nothing set
+        # for an account is ever sent with requests of another one
+        self._session_owned = session is None
+        if session is None:
+            import requests
+            from .KeepAliveAdapter import KeepAliveAdapter
+
+            session = requests.Session()
+            session.cookies.set_policy(
+                http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+            )
+            adapter = KeepAliveAdapter(
+                pool_maxsize=pool_maxsize or max_concurrent_requests
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self._session = session
+
+    def __enter__(self) -> "AirzoneCloudPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close all accounts, stop the thread pool and close the http session (only if created by this pool)"""
+        with self._accounts_lock:
+            accounts, self._accounts = self._accounts, {}
+        for api in accounts.values():
+            api.close()
+        self._executor.shutdown(wait=True)
+        if self._session_owned:
+            self._session.close()
+
+    #
+    # accounts
+    #
+
+    def add_account(self, email: str, password: str, **kwargs) -> AirzoneCloud:
+        """Connect an account (kwargs override pool api_kwargs) and return its api"""
+        with self._accounts_lock:
+            if email in self._accounts:
+                raise Exception("Account {} already in pool".format(email))
+        api = AirzoneCloud(email, password, **self._get_api_kwargs(kwargs))
+        with self._accounts_lock:
+            if email in self._accounts:
+                api.close()
+                raise Exception("Account {} already in pool".format(email))
+            self._accounts[email] = api
+        _LOGGER.info("Account %s added to pool", email)
+        return api
+
+    def add_accounts(
+        self, credentials: "Iterable[tuple[str, str]]", **kwargs
+    ) -> "dict[str, Exception]":
+        """Connect accounts from (email, password) in parallel, return errors by email"""
+        futures = [
+            (email, self._executor.submit(self.add_account, email, password, **kwargs))
+            for email, password in credentials
+        ]
+        errors = {}
+        for email, future in futures:
+            err = future.exception()
+            if err is not None:
+                _LOGGER.error("Unable to add account %s : %s", email, repr(err))
+                errors[email] = err
+        return errors
+
+    def remove_account(self, email: str) -> "AirzoneCloudPool":
+        """Close an account and remove it from the pool"""
+        with self._accounts_lock:
+            api = self._accounts.pop(email, None)
+        if api is None:
+            raise Exception("Account {} not in pool".format(email))
+        api.close()
+        return self
+
+    def get_account(self, email: str) -> AirzoneCloud:
+        """Return api of an account (None if not in pool)"""
+        return self._accounts.get(email)
+
+    #
+    # getters
+    #
+
+    @property
+    def accounts(self) -> "dict[str, AirzoneCloud]":
+        """Get apis by email"""
+        with self._accounts_lock:
+            return dict(self._accounts)
+
+    @property
+    def all_installations(self) -> "list[Installation]":
+        """Get all installations from all accounts"""
+        return list(self.iter_installations())
+
+    @property
+    def all_devices(self) -> "list[Device]":
+        """Get all devices from all accounts"""
+        return list(self.iter_devices())
+
+    def iter_installations(self) -> "Iterator[Installation]":
+        """Iterate over installations of all accounts without building a list"""
+        for api in self.accounts.values():
+            yield from api.iter_installations()
+
+    def iter_devices(self) -> "Iterator[Device]":
+        """Iterate over devices of all accounts without building a list"""
+        for api in self.accounts.values():
+            yield from api.iter_devices()
+
+    def get_device(self, device_id: str) -> Device:
+        """Return device by id from any account (None if not found)"""
+        accounts = self.accounts.values()
+        # search devices already loaded before loading anything (lazy mode)
+        for api in accounts:
+            device = api._identity_map.get_device(device_id)
+            if device is not None:
+                return device
+        for api in accounts:
+            device = api.get_device(device_id)
+            if device is not None:
+                return device
+        return None
+
+    def find_devices(
+        self,
+        ws_id: str = None,
+        name: str = None,
+        system_number: int = None,
+        zone_number: int = None,
+    ) -> "list[Device]":
+        """Return devices of all accounts matching all given criteria"""
+        devices = []
+        for api in self.accounts.values():
+            devices.extend(
+                api.find_devices(
+                    ws_id=ws_id,
+                    name=name,
+                    system_number=system_number,
+                    zone_number=zone_number,
+                )
+            )
+        return devices
+
+    @property
+    def metrics(self) -> Metrics:
+        """Return requests metrics of all accounts (None if disabled)"""
+        return self._metrics
+
+    #
+    # Refresh
+    #
+
+    def refresh_all_devices(self) -> "AirzoneCloudPool":
+        """Refresh all devices of all accounts in parallel (errors are available in refresh_errors)
+
+        Devices of accounts are interleaved, so that each account gets its share of
+        threads whatever its number of devices.
+        """
+        accounts = self.accounts
+        devices_futures = [
+            (email, self._executor.submit(list, api.iter_devices()))
+            for email, api in accounts.items()
+        ]
+        errors = {}
+        devices_by_account = []
+        for email, future in devices_futures:
+            err = future.exception()
+            if err is not None:
+                _LOGGER.error("Unable to load devices of %s : %s", email, repr(err))
+                errors[email] = err
+            else:
+                devices_by_account.append(future.result())
+
+        futures = [
+            (device, self._executor.submit(device.refresh))
+            for devices in itertools.zip_longest(*devices_by_account)
+            for device in devices
+            if device is not None
+        ]
+        for device, future in futures:
+            err = future.exception()
+            if err is not None:
+                _LOGGER.error(
+                    "Unable to refresh Device(name=%s, id=%s) : %s",
+                    device.name,
+                    device.id,
+                    repr(err),
+                )
+                errors[device.id] = err
+        self._refresh_errors = errors
+        return self
+
+    @property
+    def refresh_errors(self) -> "dict[str, Exception]":
+        """Return errors of the last refresh_all_devices() by device id (or email if devices of an account couldn't be loaded)"""
+        return self._refresh_errors
+
+    #
+    # private
+    #
+
+    def _get_api_kwargs(self, kwargs: dict) -> dict:
+        """Return options of a new account api, sharing pool resources"""
+        api_kwargs = dict(self._api_kwargs, **kwargs)
+        api_kwargs.update(
+            session=self._session,
+            executor=self._executor,
+            concurrency_limiter=ConcurrencyLimiter(
+                self._max_concurrent_requests_per_account,
+                parent=self._concurrency_limiter,
+            ),
+        )
+        api_kwargs.setdefault("token_store", self._token_store)
+        api_kwargs.setdefault(
+            "metrics", self._metrics if self._metrics is not None else False
+        )
+        return api_kwargs
@@ -0,0 +1,530 @@
+#!/usr/bin/python3
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Iterable, Union
+
+from .AirzoneCloudBase import AirzoneCloudBase
+from .AsyncInstallation import AsyncInstallation
+from .Metrics import Metrics
+from .RetryPolicy import RetryPolicy
+from .TokenStore import TokenStore
+from .constants import CONFIG_TTL, INSTALLATIONS_PAGE_SIZE, REQUEST_TIMEOUT
+
+if TYPE_CHECKING:
+    import aiohttp
+
+    from .AsyncDevice import AsyncDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AsyncAirzoneCloud(AirzoneCloudBase):
+    """Allow to connect to AirzoneCloud API with asyncio (requires aiohttp)
+
+    Usage:
+        async with AsyncAirzoneCloud(email, password) as api:
+            for device in api.all_devices:
+                await device.turn_on()
+    """
+
+    _session: "aiohttp.ClientSession" = None
+    _session_owned: bool = False
+    _installations: "list[AsyncInstallation]" = []
+    _max_concurrency: int = 10
+    _semaphore: asyncio.Semaphore = None
+    _login_lock: asyncio.Lock = None
+    _client_timeout: "aiohttp.ClientTimeout" = None
+
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        user_agent: str = None,
+        session: "aiohttp.ClientSession" = None,
+        max_concurrency: int = 10,
+        retry_policy: RetryPolicy = None,
+        rate_limit: float = None,
+        rate_burst: int = None,
+        timeout: "Union[float, tuple[float, float]]" = REQUEST_TIMEOUT,
+        token_store: TokenStore = None,
+        api_url: str = None,
+        metrics: "Union[Metrics, bool]" = True,
+        config_ttl: float = CONFIG_TTL,
+    ) -> None:
+        """Initialize API (nothing is loaded until connect() is awaited)
+
+        session: optional aiohttp session to use (not closed by close())
+        max_concurrency: maximum number of simultaneous http requests
+        retry_policy: how failed requests (5xx, 429, timeouts) are retried (default
+        to RetryPolicy(), RetryPolicy(max_retries=0) to disable retries)
+        rate_limit: maximum requests per second sent by this api (None for no limit)
+        rate_burst: maximum requests sent at once under rate_limit
+        timeout: seconds before a request fails, as (connect, read) or a single
+        value for both (None to wait forever)
+        token_store: where the token is kept between api instances (a still valid
+        stored token is reused instead of login)
+        api_url: AirzoneCloud api base url (to use another server, like MockServer)
+        metrics: count requests by endpoint (see metrics), or a Metrics shared with
+        other apis (False to disable)
+        config_ttl: seconds during which a device config is served from cache
+        (None to keep it until forced)
+        """
+        super().__init__(
+            email,
+            password,
+            user_agent=user_agent,
+            config_ttl=config_ttl,
+            retry_policy=retry_policy,
+            rate_limit=rate_limit,
+            rate_burst=rate_burst,
+            timeout=timeout,
+            token_store=token_store,
+            api_url=api_url,
+            metrics=metrics,
+        )
+        self._session = session
+        self._session_owned = session is None
+        self._max_concurrency = max(1, int(max_concurrency))
+        self._installations = []
+
+    @classmethod
+    async def create(cls, email: str, password: str, **kwargs) -> "AsyncAirzoneCloud":
+        """Instance a new api, login and load all installations, groups & devices"""
+        api = cls(email, password, **kwargs)
+        await api.connect()
+        return api
+
+    async def connect(self) -> "AsyncAirzoneCloud":
+        """Login and load all installations, groups & devices"""
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError(
+                "aiohttp is required by AsyncAirzoneCloud: pip3 install AirzoneCloud[async]"
+            ) from None
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+            self._session_owned = True
+        connect_timeout, read_timeout = (
+            self._timeout
+            if isinstance(self._timeout, tuple)
+            else (self._timeout, self._timeout)
+        )
+        self._client_timeout = aiohttp.ClientTimeout(
+            sock_connect=connect_timeout, sock_read=read_timeout
+        )
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._login_lock = asyncio.Lock()
+
+        # login (or reuse stored token)
+        await self._get_token()
+
+        # load installations
+        await self._load_installations()
+
+        return self
+
+    async def close(self) -> None:
+        """Close the http session (only if created by this api)"""
+        if self._session is not None and self._session_owned:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncAirzoneCloud":
+        try:
+            return await self.connect()
+        except BaseException:
+            await self.close()
+            raise
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    #
+    # Refresh
+    #
+
+    async def refresh_installations(self) -> "AsyncAirzoneCloud":
+        """Refresh installations, then groups & devices data of installations already loaded (concurrently)"""
+        previous_installations = list(self._installations)
+        await self._load_installations()
+        await asyncio.gather(
+            *[
+                installation._load_groups()
+                for installation in previous_installations
+                if installation in self._installations
+            ]
+        )
+        return self
+
+    async def refresh_all_devices(self) -> "AsyncAirzoneCloud":
+        """Refresh all devices of all installations concurrently (errors are available in refresh_errors)"""
+        self._refresh_errors = await self._refresh_devices(self.all_devices)
+        return self
+
+    async def refresh_devices(
+        self, devices: "Iterable[AsyncDevice]"
+    ) -> "AsyncAirzoneCloud":
+        """Refresh some devices concurrently (errors are available in refresh_errors)"""
+        self._refresh_errors = await self._refresh_devices(list(devices))
+        return self
+
+    #
+    # private
+    #
+
+    async def _refresh_devices(
+        self, devices: "list[AsyncDevice]"
+    ) -> "dict[str, Exception]":
+        """Refresh devices concurrently and return errors by device id"""
+        results = await asyncio.gather(
+            *[device.refresh() for device in devices], return_exceptions=True
+        )
+        errors = {}
+        for device, result in zip(devices, results):
+            if isinstance(result, Exception):
+                _LOGGER.error(
+                    "Unable to refresh Device(name=%s, id=%s) : %s",
+                    device.name,
+                    device.id,
+                    repr(result),
+                )
+                errors[device.id] = result
+        return errors
+
+    async def _load_devices_config(
+        self, devices: "list[AsyncDevice]", type: str, force: bool = False
+    ) -> "dict[str, Exception]":
+        """Load devices configs concurrently and return errors by device id"""
+        results = await asyncio.gather(
+            *[device.get_config(type, force) for device in devices],
+            return_exceptions=True,
+        )
+        errors = {}
+        for device, result in zip(devices, results):
+            if isinstance(result, Exception):
+                _LOGGER.error(
+                    "Unable to load config of Device(name=%s, id=%s) : %s",
+                    device.name,
+                    device.id,
+                    repr(result),
+                )
+                errors[device.id] = result
+        return errors
+
+    async def _get_token(self) -> str:
+        """Return current token: stored one if still valid, else login (also when about to expire)"""
+        if self._token is None or self._is_token_expired():
+            async with self._login_lock:
+                if self._token is None and self._load_stored_token():
+                    return self._token
+                if self._token is None or self._is_token_expired():
+                    await self._login()
+        return self._token
+
+    async def _login(self) -> str:
+        """Login to  AirzoneCloud and return token"""
+
+        url = "{}/auth/login".format(self._api_url)
+        login_payload = {"email": self._email, "password": self._password}
+        headers = {"User-Agent": self._user_agent}
+        await self._wait_rate_limit()
+        async with self._semaphore:
+            start = time.perf_counter()
+            async with self._session.post(
+                url, headers=headers, json=login_payload, timeout=self._client_timeout
+            ) as response:
+                if self._metrics is not None:
+                    self._metrics.observe(
+                        "POST",
+                        "/auth/login",
+                        str(response.status),
+                        time.perf_counter() - start,
+                    )
+                if response.status >= 400:
+                    raise Exception(
+                        "Unable to login to AirzoneCloud with the email {} and the given password".format(
+                            self._email
+                        )
+                    )
+                data = await response.json(content_type=None)
+
+        return self._set_token(data)
+
+    async def _wait_rate_limit(self) -> None:
+        """Wait until a request is allowed by rate_limit (if any)"""
+        if self._rate_limiter is not None:
+            wait = self._rate_limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    async def _load_installations(self) -> "list[AsyncInstallation]":
+        """Load all installations for this account, then their groups concurrently"""
+        try:
+            installations_data = await self._api_get_installations_list()
+        except RuntimeError:
+            raise Exception("Unable to load installations from AirzoneCloud")
+        previous_ids = [installation.id for installation in self._installations]
+        self._set_installations_data(installations_data)
+        # load groups (and devices states) of new installations in parallel
+        await asyncio.gather(
+            *[
+                installation._load_groups()
+                for installation in self._installations
+                if installation.id not in previous_ids
+            ]
+        )
+        return self._installations
+
+    def _new_installation(self, installation_data: dict) -> AsyncInstallation:
+        """Instance a new installation without loading its groups"""
+        return AsyncInstallation(self, installation_data)
+
+    #
+    # API calls
+    #
+
+    async def _api_get_installations_list(self) -> list:
+        """Http GET to load installations relations (all pages)"""
+        _LOGGER.debug("_api_get_installations_list()")
+        result = []
+        seen_ids = set()
+        page = 0
+        while True:
+            installations_data, is_last = self._parse_installations_page(
+                (
+                    await self._api_get(
+                        "/installations",
+                        {"items": INSTALLATIONS_PAGE_SIZE, "page": page},
+                    )
+                ).get("installations", []),
+                seen_ids,
+            )
+            result.extend(installations_data)
+            if is_last:
+                return result
+            page += 1
+
+    async def _api_get_installation_groups_list(self, installation_id: str) -> list:
+        """Http GET to load groups in a specific installation"""
+        _LOGGER.debug(
+            "_api_get_installation_groups_list(installation_id=%s)", installation_id
+        )
+        return (await self._api_get("/installations/{}".format(installation_id))).get(
+            "groups", []
+        )
+
+    async def _api_get_device_state(self, device_id: str, installation_id: str) -> dict:
+        """Http GET to load state of a specific device"""
+        _LOGGER.debug(
+            "_api_get_device_state(device_id=%s, installation_id=%s)",
+            device_id,
+            installation_id,
+        )
+        return await self._api_get(
+            "/devices/{}/status".format(device_id),
+            {"installation_id": installation_id},
+        )
+
+    async def _api_get_device_config(
+        self, device_id: str, installation_id: str, type: str = "all"
+    ) -> dict:
+        """Http GET to load config of a specific device"""
+        _LOGGER.debug(
+            "_api_get_device_config(device_id=%s, installation_id=%s, type=%s)",
+            device_id,
+            installation_id,
+            type,
+        )
+        return await self._api_get(
+            "/devices/{}/config".format(device_id),
+            {"installation_id": installation_id, "type": type},
+        )
+
+    async def _api_patch_device(
+        self,
+        device_id: str,
+        installation_id: str,
+        param: str,
+        value: Union[str, int, float, bool],
+        opts: dict = {},
+    ) -> Any:
+        """Http PATCH to change a device parameter (state or config)"""
+        _LOGGER.debug(
+            "_api_patch_device(device_id=%s, installation_id=%s, param=%s, value=%s, opts=%s)",
+            device_id,
+            installation_id,
+            param,
+            value,
+            opts,
+        )
+        return await self._api_patch(
+            "/devices/{}".format(device_id),
+            {
+                "installation_id": installation_id,
+                "param": param,
+                "value": value,
+                "opts": opts,
+            },
+        )
+
+    async def _api_get(self, api_endpoint: str, params: dict = {}) -> Any:
+        """Do a http GET request on an api endpoint"""
+
+        params = dict(params, format="json")
+
+        return await self._api_request(
+            method="GET", api_endpoint=api_endpoint, params=params
+        )
+
+    async def _api_post(self, api_endpoint: str, payload: dict = {}) -> Any:
+        """Do a http POST request on an api endpoint"""
+
+        headers = {
+            "Content-Type": "application/json;charset=UTF-8",
+            "Accept": "application/json",
+        }
+
+        return await self._api_request(
+            method="POST", api_endpoint=api_endpoint, headers=headers, json=payload
+        )
+
+    async def _api_put(self, api_endpoint: str, payload: dict = {}) -> Any:
+        """Do a http PUT request on an api endpoint"""
+
+        headers = {
+            "Content-Type": "application/json;charset=UTF-8",
+            "Accept": "application/json",
+        }
+
+        return await self._api_request(
+            method="PUT", api_endpoint=api_endpoint, headers=headers, json=payload
+        )
+
+    async def _api_patch(self, api_endpoint: str, payload: dict = {}) -> Any:
+        """Do a http PATCH request on an api endpoint"""
+
+        headers = {
+            "Content-Type": "application/json;charset=UTF-8",
+            "Accept": "application/json",
+        }
+
+        return await self._api_request(
+            method="PATCH", api_endpoint=api_endpoint, headers=headers, json=payload
+        )
+
+    async def _api_request(
+        self,
+        method: str,
+        api_endpoint: str,
+        params: dict = {},
+        headers: dict = {},
+        json: dict = None,
+        autoreconnect: bool = True,
+    ) -> Any:
+        """Do a http generic request on an api endpoint (limited to max_concurrency in parallel)"""
+        import aiohttp
+
+        # set headers (login again if the token is about to expire)
+        token = await self._get_token()
+        headers = dict(headers)
+        headers["Authorization"] = "Bearer {}".format(token)
+        headers["User-Agent"] = self._user_agent
+
+        # generate url
+        url = self._get_request_url(api_endpoint, params)
+
+        # make call (retried according to retry policy)
+        attempt = 0
+        while True:
+            await self._wait_rate_limit()
+            start = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    async with self._session.request(
+                        method=method,
+                        url=url,
+                        headers=headers,
+                        json=json,
+                        timeout=self._client_timeout,
+                    ) as call:
+                        status = call.status
+                        text = await call.text()
+                        # decode json only if response is not empty
+                        data = (
+                            await call.json(content_type=None)
+                            if len(text) and status < 400
+                            else None
+                        )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                if self._metrics is not None:
+                    self._metrics.observe(
+                        method,
+                        api_endpoint,
+                        type(err).__name__,
+                        time.perf_counter() - start,
+                    )
+                delay = self._get_retry_delay(
+                    method,
+                    api_endpoint,
+                    attempt,
+                    error=err,
+                    request_sent=not isinstance(err, aiohttp.ClientConnectorError),
+                )
+                if delay is None:
+                    raise
+            else:
+                if self._metrics is not None:
+                    self._metrics.observe(
+                        method,
+                        api_endpoint,
+                        str(status),
+                        time.perf_counter() - start,
+                        int(call.request_info.headers.get("Content-Length", 0)),
+                        len(text.encode()),
+                    )
+                if status < 400:
+                    break
+                delay = self._get_retry_delay(
+                    method,
+                    api_endpoint,
+                    attempt,
+                    status_code=status,
+                    retry_after=call.headers.get("Retry-After"),
+                )
+                if delay is None:
+                    break
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        if status == 401 and autoreconnect:  # unauthorized error
+            # log
+            _LOGGER.info(
+                "Get unauthorized error (token expired ?), trying to reconnect..."
+            )
+
+            # try to reconnect (only once if several coroutines get the error)
+            async with self._login_lock:
+                if self._token == token:
+                    if self._metrics is not None:
+                        self._metrics.count_relogin()
+                    await self._login()
+
+            # retry get without autoreconnect (to avoid infinite loop)
+            return await self._api_request(
+                method=method,
+                api_endpoint=api_endpoint,
+                params=params,
+                headers=headers,
+                json=json,
+                autoreconnect=False,
+            )
+
+        # raise other error if needed
+        if status >= 400:
+            _LOGGER.error("%s", text)
+            call.raise_for_status()
+
+        return data
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from types import MappingProxyType
+from typing import Mapping, Union
+
+from .DeviceBase import DeviceBase
+from .DeviceState import DeviceState
+from .constants import CONFIG_TYPE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AsyncDevice(DeviceBase):
+    """Manage a AirzoneCloud device (thermostat) with asyncio (see AsyncAirzoneCloud)"""
+
+    def __init__(
+        self, api: "AsyncAirzoneCloud", group: "AsyncGroup", data: dict
+    ) -> None:
+        self._api = api
+        self._group = group
+        self._data = data
+        # state is loaded concurrently by parent installation
+        self._state = None
+        self._configs = {}
+
+        # log
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("Init %s", self.str_verbose)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("%s", data)
+
+    @property
+    def config(self) -> Mapping:
+        """Return device user config if cached (None until get_config() or parent installation prefetch_config() is awaited)"""
+        return self._get_cached_config(CONFIG_TYPE)
+
+    #
+    # setters
+    #
+
+    async def turn_on(
+        self, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncDevice":
+        """Turn device on"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call turn_on() on %s", self.str_verbose)
+
+        await self._set("power", True)
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh()
+
+        return self
+
+    async def turn_off(
+        self, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncDevice":
+        """Turn device off"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call turn_off() on %s", self.str_verbose)
+
+        await self._set("power", False)
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh()
+
+        return self
+
+    async def set_temperature(
+        self, temperature: float, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncDevice":
+        """Set target_temperature for current device (degrees celsius)"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info(
+                "call set_temperature(%s) on %s", temperature, self.str_verbose
+            )
+        if self.min_temperature is not None and temperature < self.min_temperature:
+            temperature = self.min_temperature
+        if self.max_temperature is not None and temperature > self.max_temperature:
+            temperature = self.max_temperature
+
+        await self._set("setpoint", temperature)
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh()
+
+        return self
+
+    async def set_mode(
+        self, mode_name: str, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncDevice":
+        """Set mode of the device"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call set_mode(%s) on %s", mode_name, self.str_verbose)
+
+        await self._set("mode", self._get_mode_id(mode_name))
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh()
+
+        return self
+
+    #
+    # Refresh
+    #
+
+    async def refresh(self) -> "AsyncDevice":
+        """Refresh current device states"""
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("call refresh() on %s", self.str_verbose)
+        raw_state = await self._api._api_get_device_state(
+            self.id, self.group.installation.id
+        )
+        self._set_state(DeviceState.parse(raw_state))
+        return self
+
+    #
+    # Config
+    #
+
+    async def get_config(self, type: str = CONFIG_TYPE, force: bool = False) -> Mapping:
+        """Return device config subset (user┃advanced┃all) as a read-only mapping, served from cache during the api config_ttl unless force is True"""
+        if not force:
+            config = self._get_cached_config(type)
+            if config is not None:
+                return config
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("call get_config(%s) on %s", type, self.str_verbose)
+        config = MappingProxyType(
+            await self._api._api_get_device_config(
+                self.id, self.group.installation.id, type
+            )
+        )
+        self._configs = dict(self._configs, **{type: (config, time.monotonic())})
+        return config
+
+    #
+    # private
+    #
+
+    async def _set(
+        self, param: str, value: Union[str, int, float, bool]
+    ) -> "AsyncDevice":
+        """Execute a command to the current device (power, mode, setpoint, ...)"""
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("call _set(%s, %s) on %s", param, value, self.str_verbose)
+        await self._api._api_patch_device(
+            self.id, self.group.installation.id, param, value, {"units": 0}
+        )
+        return self
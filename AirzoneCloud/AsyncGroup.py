@@ -0,0 +1,103 @@
+import asyncio
+import logging
+
+from .AsyncDevice import AsyncDevice
+from .GroupBase import GroupBase
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AsyncGroup(GroupBase):
+    """Manage a AirzoneCloud group with asyncio (see AsyncAirzoneCloud)"""
+
+    #
+    # setters
+    #
+
+    async def turn_on(
+        self, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncGroup":
+        """Turn on all devices in the group"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call turn_on() on %s", self.str_verbose)
+
+        await asyncio.gather(
+            *[device.turn_on(auto_refresh=False) for device in self.devices]
+        )
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh_devices()
+
+        return self
+
+    async def turn_off(
+        self, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncGroup":
+        """Turn off all devices in the group"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call turn_off() on %s", self.str_verbose)
+
+        await asyncio.gather(
+            *[device.turn_off(auto_refresh=False) for device in self.devices]
+        )
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh_devices()
+
+        return self
+
+    async def set_temperature(
+        self, temperature: float, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncGroup":
+        """Set target_temperature for current all devices in the group (in degrees celsius)"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info(
+                "call set_temperature(%s) on %s", temperature, self.str_verbose
+            )
+
+        await asyncio.gather(
+            *[
+                device.set_temperature(temperature=temperature, auto_refresh=False)
+                for device in self.devices
+            ]
+        )
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh_devices()
+
+        return self
+
+    async def set_mode(
+        self, mode_name: str, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncGroup":
+        """Set mode of the all devices in the group"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call set_mode(%s) on %s", mode_name, self.str_verbose)
+
+        await self.master_device.set_mode(mode_name=mode_name, auto_refresh=False)
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh_devices()
+
+        return self
+
+    #
+    # Refresh
+    #
+
+    async def refresh_devices(self) -> "AsyncGroup":
+        """Refresh all devices of this group concurrently (errors are available in refresh_errors)"""
+        self._refresh_errors = await self._api._refresh_devices(self.devices)
+        return self
+
+    #
+    # private
+    #
+
+    def _new_device(self, device_data: dict) -> AsyncDevice:
+        """Instance a new device without loading its state"""
+        return AsyncDevice(self._api, self, device_data)
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+
+from .AsyncGroup import AsyncGroup
+from .InstallationBase import InstallationBase
+from .constants import CONFIG_TYPE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AsyncInstallation(InstallationBase):
+    """Manage a AirzoneCloud installation with asyncio (see AsyncAirzoneCloud)"""
+
+    def __init__(self, api: "AsyncAirzoneCloud", data: dict) -> None:
+        self._api = api
+        self._data = data
+        self._groups = []
+
+        # log
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("Init %s", self.str_verbose)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("%s", data)
+
+    #
+    # setters
+    #
+
+    async def turn_on(
+        self, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncInstallation":
+        """Turn on all devices in the installation"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call turn_on() on %s", self.str_verbose)
+
+        await asyncio.gather(
+            *[group.turn_on(auto_refresh=False) for group in self.groups]
+        )
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh_devices()
+
+        return self
+
+    async def turn_off(
+        self, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncInstallation":
+        """Turn off all devices in the installation"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call turn_off() on %s", self.str_verbose)
+
+        await asyncio.gather(
+            *[group.turn_off(auto_refresh=False) for group in self.groups]
+        )
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh_devices()
+
+        return self
+
+    async def set_temperature(
+        self, temperature: float, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncInstallation":
+        """Set target_temperature for current all devices in the installation (in degrees celsius)"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info(
+                "call set_temperature(%s) on %s", temperature, self.str_verbose
+            )
+
+        await asyncio.gather(
+            *[
+                group.set_temperature(temperature=temperature, auto_refresh=False)
+                for group in self.groups
+            ]
+        )
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh_devices()
+
+        return self
+
+    async def set_mode(
+        self, mode_name: str, auto_refresh: bool = True, delay_refresh: int = 1
+    ) -> "AsyncInstallation":
+        """Set mode of the all devices in the installation"""
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call set_mode(%s) on %s", mode_name, self.str_verbose)
+
+        await asyncio.gather(
+            *[
+                group.set_mode(mode_name=mode_name, auto_refresh=False)
+                for group in self.groups
+            ]
+        )
+
+        if auto_refresh:
+            await asyncio.sleep(delay_refresh)  # wait data refresh by airzone
+            await self.refresh_devices()
+
+        return self
+
+    #
+    # Refresh
+    #
+
+    async def refresh_groups(self) -> "AsyncInstallation":
+        """Refresh all groups of this installation"""
+        await self._load_groups()
+        return self
+
+    async def refresh_devices(self) -> "AsyncInstallation":
+        """Refresh all devices of this installation concurrently (errors are available in refresh_errors)"""
+        self._refresh_errors = await self._api._refresh_devices(self.all_devices)
+        return self
+
+    async def prefetch_config(
+        self, type: str = CONFIG_TYPE, force: bool = False
+    ) -> "AsyncInstallation":
+        """Load config of all devices of this installation concurrently (errors are available in config_errors)"""
+        self._config_errors = await self._api._load_devices_config(
+            self.all_devices, type, force
+        )
+        return self
+
+    #
+    # private
+    #
+
+    async def _load_groups(self) -> "list[AsyncGroup]":
+        """Load all groups for this installation, then new devices states concurrently"""
+        try:
+            groups_data = await self._api._api_get_installation_groups_list(self.id)
+        except RuntimeError:
+            raise Exception(
+                "Unable to load groups for Installation " + self.str_verbose
+            )
+        self._set_groups_data(groups_data)
+        await asyncio.gather(
+            *[device.refresh() for device in self.all_devices if device._state is None]
+        )
+        return self._groups
+
+    def _new_group(self, group_data: dict) -> AsyncGroup:
+        """Instance a new group without loading its devices states"""
+        return AsyncGroup(self._api, self, group_data)
@@ -0,0 +1,4 @@
+from collections import namedtuple
+
+# a device field which changed on refresh: Change(device, field, old, new)
+Change = namedtuple("Change", ["device", "field", "old", "new"])
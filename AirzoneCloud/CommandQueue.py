@@ -0,0 +1,230 @@
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, Union
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CommandQueue:
+    """Queue devices commands in front of AirzoneCloud._api_patch_device
+
+    Repeated commands on the same (device, param) are coalesced to the last value.
+    Pending commands are sent when flushed: devices are updated concurrently on the
+    api thread pool while commands of a same device are sent in order.
+
+    Commands are flushed:
+    - immediately if window is 0 (default),
+    - after window seconds otherwise (useful to drop intermediate values of a slider),
+    - at the end of a batch() block (used by groups & installations commands).
+
+    Commands queued in a batch() block are kept by thread until the block ends,
+    so that a flush from another thread never sends half of a batch.
+
+    With a window, devices auto refreshes are held until their commands are sent
+    (see call_after_send()), so that setters return at once and keep coalescing.
+    """
+
+    _api: "AirzoneCloud" = None
+    _window: float = 0
+    _pending: "dict[str, OrderedDict]" = {}
+    _lock: threading.Lock = None
+    _flush_lock: threading.Lock = None
+    _timer: threading.Timer = None
+    _local: threading.local = None
+    _last_errors: "dict[str, Exception]" = {}
+    _after_send: "dict[str, Callable[[], None]]" = {}
+
+    def __init__(self, api: "AirzoneCloud", window: float = 0) -> None:
+        self._api = api
+        self._window = window
+        self._pending = OrderedDict()
+        self._after_send = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+
+    #
+    # getters
+    #
+
+    @property
+    def window(self) -> float:
+        """Return seconds during which commands are queued before being sent (0 if sent immediately)"""
+        return self._window
+
+    @property
+    def pending_count(self) -> int:
+        """Return number of commands waiting to be sent"""
+        with self._lock:
+            return sum(len(commands) for commands in self._pending.values())
+
+    @property
+    def last_errors(self) -> "dict[str, Exception]":
+        """Return errors of the last flush by device id, including flushes of the window timer (empty if all commands were sent)"""
+        return self._last_errors
+
+    #
+    # commands
+    #
+
+    def put(
+        self,
+        device_id: str,
+        installation_id: str,
+        param: str,
+        value: Union[str, int, float, bool],
+        opts: dict = {},
+    ) -> None:
+        """Queue a command, replacing a pending command on the same device param"""
+        command = (installation_id, value, opts)
+        if getattr(self._local, "batch_depth", 0) > 0:
+            self._queue(self._local.pending, device_id, param, command)
+            return
+        if self._window > 0:
+            with self._lock:
+                self._queue(self._pending, device_id, param, command)
+                if self._timer is None:
+                    self._timer = threading.Timer(self._window, self._flush_timer)
+                    self._timer.daemon = True
+                    self._timer.start()
+            return
+
+        # only this command is sent (not the ones queued by batches of other threads)
+        pending = OrderedDict()
+        self._queue(pending, device_id, param, command)
+        self._send_pending(pending, {}, raise_errors=True)
+
+    def call_after_send(self, device_id: str, callback: "Callable[[], None]") -> None:
+        """Call callback in a thread once pending commands of a device are sent (at once if none is pending)
+
+        Only the last callback of a device is kept, and it isn't called if its
+        commands fail.
+        """
+        with self._lock:
+            if device_id in self._pending:
+                self._after_send[device_id] = callback
+                return
+        self._start_callback(device_id, callback)
+
+    @contextmanager
+    def batch(self) -> Iterator["CommandQueue"]:
+        """Queue all commands of the block, then send them together (raise first error)
+
+        Commands of the same devices pending in the window are sent with them.
+        """
+        if getattr(self._local, "batch_depth", 0) == 0:
+            self._local.pending = OrderedDict()
+        self._local.batch_depth = getattr(self._local, "batch_depth", 0) + 1
+        try:
+            yield self
+        finally:
+            self._local.batch_depth -= 1
+            if self._local.batch_depth == 0:
+                batch_pending, self._local.pending = self._local.pending, None
+                pending = OrderedDict()
+                callbacks = {}
+                with self._lock:
+                    for device_id, commands in batch_pending.items():
+                        pending[device_id] = self._pending.pop(device_id, OrderedDict())
+                        for param, command in commands.items():
+                            self._queue(pending, device_id, param, command)
+                        if device_id in self._after_send:
+                            callbacks[device_id] = self._after_send.pop(device_id)
+                # don't hide an error raised in the block
+                self._send_pending(
+                    pending, callbacks, raise_errors=sys.exc_info()[0] is None
+                )
+
+    def flush(self, raise_errors: bool = True) -> "dict[str, Exception]":
+        """Send all commands pending in the window and return errors by device id
+
+        raise_errors: raise the first error once all commands were sent
+        """
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+            callbacks, self._after_send = self._after_send, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return self._send_pending(pending, callbacks, raise_errors)
+
+    #
+    # private
+    #
+
+    @staticmethod
+    def _queue(
+        pending: OrderedDict, device_id: str, param: str, command: tuple
+    ) -> None:
+        """Add a command to pending commands, replacing a command on the same device param"""
+        commands = pending.setdefault(device_id, OrderedDict())
+        # keep commands in the order of their last value
+        commands.pop(param, None)
+        commands[param] = command
+
+    def _send_pending(
+        self,
+        pending: OrderedDict,
+        callbacks: "dict[str, Callable[[], None]]",
+        raise_errors: bool,
+    ) -> "dict[str, Exception]":
+        """Send commands by device, then start callbacks of devices without error"""
+        with self._flush_lock:
+            errors = {}
+            if len(pending) == 1:
+                device_id, commands = next(iter(pending.items()))
+                try:
+                    self._send(device_id, commands)
+                except Exception as err:
+                    errors[device_id] = err
+            elif len(pending) > 1:
+                executor = self._api._get_executor()
+                futures = [
+                    (device_id, executor.submit(self._send, device_id, commands))
+                    for device_id, commands in pending.items()
+                ]
+                for device_id, future in futures:
+                    err = future.exception()
+                    if err is not None:
+                        errors[device_id] = err
+            self._last_errors = errors
+
+        for device_id, err in errors.items():
+            _LOGGER.error(
+                "Unable to send commands to device %s : %s", device_id, repr(err)
+            )
+        for device_id, callback in callbacks.items():
+            if device_id not in errors:
+                self._start_callback(device_id, callback)
+        if raise_errors and errors:
+            raise next(iter(errors.values()))
+        return errors
+
+    def _send(self, device_id: str, commands: OrderedDict) -> None:
+        """Send commands of a device in order"""
+        for param, (installation_id, value, opts) in commands.items():
+            self._api._api_patch_device(device_id, installation_id, param, value, opts)
+
+    def _start_callback(self, device_id: str, callback: "Callable[[], None]") -> None:
+        """Run a call_after_send() callback in its own thread (it may wait on the api thread pool)"""
+
+        def run():
+            try:
+                callback()
+            except Exception as err:
+                _LOGGER.error(
+                    "Error after sending commands to device %s : %s",
+                    device_id,
+                    repr(err),
+                )
+
+        threading.Thread(target=run, name="AirzoneCloudAfterSend", daemon=True).start()
+
+    def _flush_timer(self) -> None:
+        """Flush called by the timer after window seconds (errors are logged and kept in last_errors)"""
+        with self._lock:
+            self._timer = None
+        self.flush(raise_errors=False)
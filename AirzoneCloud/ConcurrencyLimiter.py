@@ -0,0 +1,62 @@
+import threading
+
+
+class ConcurrencyLimiter:
+    """Limit requests sent at the same time (thread safe)
+
+    Used as a context manager around each request. With a parent (like a limiter
+    shared by several accounts), a slot of this limiter is taken first, then a
+    slot of the parent, so that an account waiting for its own slots never holds
+    shared ones.
+
+    limit: maximum requests at the same time (None for no limit)
+    parent: optional limiter also acquired for each request
+    """
+
+    _limit: int = None
+    _semaphore: threading.BoundedSemaphore = None
+    _parent: "ConcurrencyLimiter" = None
+
+    def __init__(self, limit: int = None, parent: "ConcurrencyLimiter" = None) -> None:
+        if limit is not None:
+            if limit < 1:
+                raise ValueError("limit must be at least 1")
+            self._limit = int(limit)
+            self._semaphore = threading.BoundedSemaphore(self._limit)
+        self._parent = parent
+
+    def __repr__(self) -> str:
+        return "ConcurrencyLimiter(limit={}, parent={})".format(
+            self._limit, self._parent
+        )
+
+    def __enter__(self) -> "ConcurrencyLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    @property
+    def limit(self) -> int:
+        """Return maximum requests at the same time (None for no limit)"""
+        return self._limit
+
+    def acquire(self) -> None:
+        """Wait until a request can be sent"""
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        if self._parent is not None:
+            try:
+                self._parent.acquire()
+            except BaseException:
+                if self._semaphore is not None:
+                    self._semaphore.release()
+                raise
+
+    def release(self) -> None:
+        """Release a slot taken by acquire()"""
+        if self._parent is not None:
+            self._parent.release()
+        if self._semaphore is not None:
+            self._semaphore.release()
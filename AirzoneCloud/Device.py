@@ -1,247 +1,108 @@
 import logging
 import time
-from typing import Union
-from . import AirzoneCloud, Group
-from .constants import MODES_CONVERTER
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Mapping, Union
+from .DeviceBase import DeviceBase
+from .DeviceState import DeviceState
+from .constants import CONFIG_TYPE
+
+if TYPE_CHECKING:
+    from .AirzoneCloud import AirzoneCloud
+    from .Group import Group
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class Device:
+class Device(DeviceBase):
     """Manage a AirzoneCloud device (thermostat)"""
 
     _api: "AirzoneCloud" = None
     _group: "Group" = None
-    _data: dict = {}
-    _state: dict = {}
+    _state_refreshed_at: float = None
+    _state_refreshing: bool = False
+    _expected: dict = {}
+    _confirmed: bool = None
 
     def __init__(self, api: "AirzoneCloud", group: "Group", data: dict) -> None:
         self._api = api
         self._group = group
         self._data = data
+        self._configs = {}
 
-        # load state
-        self.refresh()
+        # load state (on first access in lazy mode)
+        if api._lazy:
+            self._state = None
+        else:
+            self.refresh()
 
         # log
-        _LOGGER.info("Init {}".format(self.str_verbose))
-        _LOGGER.debug(data)
-
-    def __str__(self) -> str:
-        return "Device(name={}, is_connected={}, is_on={}, mode={}, current_temp={}, target_temp={})".format(
-            self.name,
-            self.is_connected,
-            self.is_on,
-            self.mode,
-            self.current_temperature,
-            self.target_temperature,
-        )
-
-    @property
-    def str_verbose(self) -> str:
-        """More verbose description of current device"""
-        return "Device(name={}, is_connected={}, is_on={}, mode={}, current_temp={}, target_temp={}, id={}, ws_id={})".format(
-            self.name,
-            self.is_connected,
-            self.is_on,
-            self.mode,
-            self.current_temperature,
-            self.target_temperature,
-            self.id,
-            self.ws_id,
-        )
-
-    @property
-    def all_properties(self) -> dict:
-        """Return all group properties values"""
-        result = {}
-        for prop in [
-            "id",
-            "name",
-            "type",
-            "ws_id",
-            "system_number",
-            "zone_number",
-            "is_connected",
-            "is_on",
-            "mode_id",
-            "mode",
-            "mode_generic",
-            "mode_description",
-            "modes_availables",
-            "modes_availables_generics",
-            "current_humidity",
-            "current_temperature",
-            "target_temperature",
-            "min_temperature",
-            "max_temperature",
-            "step_temperature",
-        ]:
-            result[prop] = getattr(self, prop)
-        return result
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("Init %s", self._str_log)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("%s", data)
 
     #
     # getters
     #
 
     @property
-    def id(self) -> str:
-        """Return device id"""
-        return self._data.get("device_id")
-
-    @property
-    def name(self) -> str:
-        """Return device name"""
-        return self._data.get("name")
-
-    @property
-    def type(self) -> str:
-        """Return device type (az_zone┃aidoo)"""
-        return self._data.get("type")
-
-    @property
-    def ws_id(self) -> str:
-        """Return device webserver id (mac address)"""
-        return self._data.get("ws_id")
-
-    @property
-    def system_number(self) -> str:
-        """Return device system_number"""
-        return self._data.get("meta", {}).get("system_number")
-
-    @property
-    def zone_number(self) -> str:
-        """Return device zone_number"""
-        return self._data.get("meta", {}).get("zone_number")
-
-    @property
-    def is_connected(self) -> bool:
-        """Return if the device is online (True) or offline (False)"""
-        return self._state.get("isConnected", False)
-
-    @property
-    def is_on(self) -> bool:
-        """Return True if the device is on"""
-        return self._state.get("power", False)
-
-    @property
-    def is_master(self) -> bool:
-        """Return True if the device is a master thermostat (allowed to update the mode of all devices)"""
-        return len(self.modes_availables_ids) > 0
-
-    @property
-    def mode_id(self) -> int:
-        """Return device current id mode (0┃1┃2┃3┃4┃5┃6┃7┃8┃9┃10┃11┃12)"""
-        return self._state.get("mode", 0)
-
-    @property
-    def mode(self) -> str:
-        """Return device current mode name (stop | auto | cooling | heating | ventilation | dehumidify | emergency-heating | air-heating | radiant-heating | combined-heating | air-cooling | radiant-cooling | combined-cooling)"""
-        return MODES_CONVERTER.get(str(self.mode_id), {}).get("name")
-
-    @property
-    def mode_generic(self) -> str:
-        """Return device current generic mode (stop | auto | cooling | heating | ventilation | dehumidify | emergency)"""
-        return MODES_CONVERTER.get(str(self.mode_id), {}).get("generic")
-
-    @property
-    def mode_description(self) -> str:
-        """Return device current mode description (pretty name to display)"""
-        return MODES_CONVERTER.get(str(self.mode_id), {}).get("description")
-
-    @property
-    def modes_availables_ids(self) -> "list[int]":
-        """Return device availables modes list ([0┃1┃2┃3┃4┃5┃6┃7┃8┃9┃10┃11┃12, ...])"""
-        return self._state.get("mode_available", [])
-
-    @property
-    def modes_availables(self) -> "list[str]":
-        """Return device availables modes names list ([stop | auto | cooling | heating | ventilation | dehumidify | emergency-heating | air-heating | radiant-heating | combined-heating | air-cooling | radiant-cooling | combined-cooling, ...])"""
-        return [
-            MODES_CONVERTER.get(str(mode_id), {}).get("name")
-            for mode_id in self.modes_availables_ids
-        ]
-
-    @property
-    def modes_availables_generics(self) -> "list[str]":
-        """Return device availables modes generics list ([stop | auto | cooling | heating | ventilation | dehumidify | emergency, ...])"""
-        return list(
-            set(
-                [
-                    MODES_CONVERTER.get(str(mode_id), {}).get("generic")
-                    for mode_id in self.modes_availables_ids
-                ]
-            )
-        )
-
-    @property
-    def current_temperature(self) -> float:
-        """Return device current temperature in °C"""
-        return float(self._state.get("local_temp", {}).get("celsius", 0))
+    def config(self) -> Mapping:
+        """Return device user config (firmware, units, timezone, ...), loaded on first access then cached for config_ttl"""
+        return self.get_config()
 
     @property
-    def current_humidity(self) -> int:
-        """Return device current humidity in percentage (0-100)"""
-        return int(self._state.get("humidity", 0))
-
-    @property
-    def target_temperature(self) -> float:
-        """Return device target temperature for current mode"""
-        key = MODES_CONVERTER.get(str(self.mode_id), {}).get("setpoint_key")
-        return float(self._state.get(key, {}).get("celsius", 0))
-
-    @property
-    def min_temperature(self) -> float:
-        """Return device minimal temperature for current mode"""
-        key = MODES_CONVERTER.get(str(self.mode_id), {}).get("range_key_prefix") + "min"
-        return float(self._state.get(key, {}).get("celsius", 0))
-
-    @property
-    def max_temperature(self) -> float:
-        """Return device maximal temperature for current mode"""
-        key = MODES_CONVERTER.get(str(self.mode_id), {}).get("range_key_prefix") + "max"
-        return float(self._state.get(key, {}).get("celsius", 0))
-
-    @property
-    def step_temperature(self) -> float:
-        """Return device step temperature (minimum increase/decrease step)"""
-        return float(self._state.get("step", {}).get("celsius", 0.5))
+    def last_confirmed(self) -> bool:
+        """Return True if the state confirmed the last command sent with auto_refresh, False if not confirmed before confirm_timeout (None if confirmation is disabled)"""
+        return self._confirmed
 
     #
     # setters
     #
 
-    def turn_on(self, auto_refresh: bool = True, delay_refresh: int = 1) -> "Device":
+    def turn_on(
+        self,
+        auto_refresh: bool = True,
+        delay_refresh: int = 1,
+        confirm_timeout: float = None,
+    ) -> "Device":
         """Turn device on"""
-        _LOGGER.info("call turn_on() on {}".format(self.str_verbose))
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call turn_on() on %s", self._str_log)
 
         self._set("power", True)
 
         if auto_refresh:
-            time.sleep(delay_refresh)  # wait data refresh by airzone
-            self.refresh()
+            self._auto_refresh(delay_refresh, confirm_timeout)
 
         return self
 
-    def turn_off(self, auto_refresh: bool = True, delay_refresh: int = 1) -> "Device":
+    def turn_off(
+        self,
+        auto_refresh: bool = True,
+        delay_refresh: int = 1,
+        confirm_timeout: float = None,
+    ) -> "Device":
         """Turn device off"""
-        _LOGGER.info("call turn_off() on {}".format(self.str_verbose))
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call turn_off() on %s", self._str_log)
 
         self._set("power", False)
 
         if auto_refresh:
-            time.sleep(delay_refresh)  # wait data refresh by airzone
-            self.refresh()
+            self._auto_refresh(delay_refresh, confirm_timeout)
 
         return self
 
     def set_temperature(
-        self, temperature: float, auto_refresh: bool = True, delay_refresh: int = 1
+        self,
+        temperature: float,
+        auto_refresh: bool = True,
+        delay_refresh: int = 1,
+        confirm_timeout: float = None,
     ) -> "Device":
         """Set target_temperature for current device (degrees celsius)"""
-        _LOGGER.info(
-            "call set_temperature({}) on {}".format(temperature, self.str_verbose)
-        )
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call set_temperature(%s) on %s", temperature, self._str_log)
         if self.min_temperature is not None and temperature < self.min_temperature:
             temperature = self.min_temperature
         if self.max_temperature is not None and temperature > self.max_temperature:
@@ -250,91 +111,181 @@ class Device:
         self._set("setpoint", temperature)
 
         if auto_refresh:
-            time.sleep(delay_refresh)  # wait data refresh by airzone
-            self.refresh()
+            self._auto_refresh(delay_refresh, confirm_timeout)
 
         return self
 
     def set_mode(
-        self, mode_name: str, auto_refresh: bool = True, delay_refresh: int = 1
+        self,
+        mode_name: str,
+        auto_refresh: bool = True,
+        delay_refresh: int = 1,
+        confirm_timeout: float = None,
     ) -> "Device":
         """Set mode of the device"""
-        _LOGGER.info("call set_mode({}) on {}".format(mode_name, self.str_verbose))
-
-        # search mode id
-        mode_id_found = None
-        for mode_id, mode in MODES_CONVERTER.items():
-            if mode["name"] == mode_name:
-                mode_id_found = int(mode_id)
-                break
-        if mode_id_found is None:
-            raise ValueError(
-                'mode name "{}" not found for {}'.format(mode_name, self.str_verbose)
-            )
-
-        if mode_id_found not in self.modes_availables_ids:
-            if len(self.modes_availables_ids) == 0:
-                raise ValueError(
-                    'mode name "{}" (id: {}) not availables for {} : only master thermostat device can set the mode'.format(
-                        mode_name,
-                        mode_id_found,
-                        self.str_verbose,
-                        self.modes_availables,
-                    )
-                )
-
-            raise ValueError(
-                'mode name "{}" (id: {}) not availables for {}. Allowed values: {}'.format(
-                    mode_name, mode_id_found, self.str_verbose, self.modes_availables
-                )
-            )
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call set_mode(%s) on %s", mode_name, self._str_log)
 
-        self._set("mode", mode_id_found)
+        self._set("mode", self._get_mode_id(mode_name))
 
         if auto_refresh:
-            time.sleep(delay_refresh)  # wait data refresh by airzone
-            self.refresh()
+            self._auto_refresh(delay_refresh, confirm_timeout)
 
         return self
 
     #
-    # parent group
+    # Refresh
     #
 
-    @property
-    def group(self) -> Group:
-        """Get parent group"""
-        return self._group
+    def refresh(self, force: bool = False) -> "Device":
+        """Refresh current device states
+
+        If the api has a state_ttl, a recent state is kept as is, and a state expired
+        since less than state_stale_ttl is kept while being refreshed in background.
+        Use force=True to always request the state.
+        """
+        if not force and self._api._state_ttl and self._state_refreshed_at is not None:
+            age = time.monotonic() - self._state_refreshed_at
+            if age < self._api._state_ttl:
+                self._api._count_state_cache("hits")
+                return self
+            if age < self._api._state_ttl + self._api._state_stale_ttl:
+                self._api._count_state_cache("stale_hits")
+                self._refresh_in_background()
+                return self
+        if self._api._state_ttl:
+            self._api._count_state_cache("misses")
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("call refresh() on %s", self._str_log)
+        raw_state = self._api._api_get_device_state(self.id, self.group.installation.id)
+        self._set_state(DeviceState.parse(raw_state))
+        self._state_refreshed_at = time.monotonic()
+        return self
 
     #
-    # Refresh
+    # Config
     #
 
-    def refresh(self) -> "Device":
-        """Refresh current device states"""
-        _LOGGER.debug("call refresh() on {}".format(self.str_verbose))
-        self._state = self._api._api_get_device_state(
-            self.id, self.group.installation.id
+    def get_config(self, type: str = CONFIG_TYPE, force: bool = False) -> Mapping:
+        """Return device config subset (user┃advanced┃all) as a read-only mapping
+
+        Only the given subset is requested, then served from cache during the api
+        config_ttl (an "all" config loaded before also serves other subsets).
+        Use force=True to always request it.
+        """
+        if not force:
+            config = self._get_cached_config(type)
+            if config is not None:
+                return config
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("call get_config(%s) on %s", type, self._str_log)
+        config = MappingProxyType(
+            self._api._api_get_device_config(self.id, self.group.installation.id, type)
         )
-        _LOGGER.debug(self._state)
-        return self
+        self._configs = dict(self._configs, **{type: (config, time.monotonic())})
+        return config
 
     #
     # private
     #
 
+    def _get_state(self) -> DeviceState:
+        """Return device state, loaded on first access in lazy mode"""
+        if self._state is None:
+            self.refresh()
+        return self._state
+
+    def _refresh_in_background(self) -> None:
+        """Refresh state in a thread of the api pool (only once at a time)"""
+        with self._api._state_cache_lock:
+            if self._state_refreshing:
+                return
+            self._state_refreshing = True
+
+        def refresh():
+            try:
+                self.refresh(force=True)
+            except Exception as err:
+                _LOGGER.error(
+                    "Unable to refresh in background %s : %s", self._str_log, repr(err)
+                )
+            finally:
+                self._state_refreshing = False
+
+        self._api._get_executor().submit(refresh)
+
+    def _auto_refresh(self, delay_refresh: int, confirm_timeout: float) -> None:
+        """Refresh state after a command: wait delay_refresh, or poll until the state confirms it
+
+        With a commands_window, the refresh is done in background once the window
+        timer sent the commands (so that next values are still coalesced).
+        """
+        queue = self._api._command_queue
+        if queue.window > 0:
+            queue.call_after_send(
+                self.id,
+                lambda: self._refresh_after_commands(delay_refresh, confirm_timeout),
+            )
+            return
+        queue.flush()
+        self._refresh_after_commands(delay_refresh, confirm_timeout)
+
+    def _refresh_after_commands(
+        self, delay_refresh: int, confirm_timeout: float
+    ) -> None:
+        """Wait delay_refresh then refresh, or poll until the state confirms commands sent"""
+        if confirm_timeout is None:
+            confirm_timeout = self._api._confirm_timeout
+        if confirm_timeout:
+            self._confirmed = self._api._wait_confirmed([self], confirm_timeout)
+        else:
+            self._confirmed = None
+            self._expected = {}
+            time.sleep(delay_refresh)  # wait data refresh by airzone
+            self.refresh()
+
+    def _expect(self, param: str, value: Union[str, int, float, bool]) -> "Device":
+        """Register a value which should be soon reflected by the state (power, mode or setpoint)"""
+        self._expected = dict(self._expected, **{param: value})
+        return self
+
+    def _check_expected(self) -> bool:
+        """Remove expected values reflected by the state, return True if none is left"""
+        state = self._get_state()
+        expected = {}
+        for param, value in self._expected.items():
+            if param == "power":
+                confirmed = state.is_on == bool(value)
+            elif param == "mode":
+                confirmed = state.mode_id == value
+            elif param == "setpoint":
+                # the device rounds the setpoint to its step
+                step = state.step_temperature or 0.1
+                confirmed = state.target_temperature is not None and round(
+                    state.target_temperature / step
+                ) == round(value / step)
+            else:
+                confirmed = True
+            if not confirmed:
+                expected[param] = value
+        self._expected = expected
+        return not expected
+
     def _set(self, param: str, value: Union[str, int, float, bool]) -> "Device":
         """Execute a command to the current device (power, mode, setpoint, ...)"""
-        _LOGGER.debug("call _set({}, {}) on {}".format(param, value, self.str_verbose))
-        self._api._api_patch_device(
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("call _set(%s, %s) on %s", param, value, self._str_log)
+        self._api._command_queue.put(
             self.id, self.group.installation.id, param, value, {"units": 0}
         )
-        return self
-
-    def _set_data_refreshed(self, data: dict) -> "Device":
-        """Set data refreshed (called by parent AirzoneCloud on refresh_devices())"""
-        self._data = data
-        _LOGGER.info("Data refreshed for {}".format(self.str_verbose))
+        self._expect(param, value)
+        # cached state is outdated
+        self._state_refreshed_at = None
+        # poll soon to see the command applied
+        if self._api._poll_scheduler is not None:
+            self._api._poll_scheduler.poke(self)
         return self
 
 
@@ -0,0 +1,331 @@
+import logging
+import time
+from typing import TYPE_CHECKING, Mapping
+from .Change import Change
+from .DeviceState import DeviceState
+from .Observable import Observable
+from .constants import DEVICE_DATA_FIELDS, DEVICE_STATE_FIELDS, MODES_CONVERTER
+
+if TYPE_CHECKING:
+    from .AirzoneCloudBase import AirzoneCloudBase
+    from .GroupBase import GroupBase
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DeviceBase(Observable):
+    """Device data & state shared by Device and AsyncDevice (without any request)"""
+
+    _api: "AirzoneCloudBase" = None
+    _group: "GroupBase" = None
+    _data: dict = {}
+    _state: DeviceState = None
+    _configs: "dict[str, tuple[Mapping, float]]" = {}
+
+    def __str__(self) -> str:
+        return "Device(name={}, is_connected={}, is_on={}, mode={}, current_temp={}, target_temp={})".format(
+            self.name,
+            self.is_connected,
+            self.is_on,
+            self.mode,
+            self.current_temperature,
+            self.target_temperature,
+        )
+
+    @property
+    def str_verbose(self) -> str:
+        """More verbose description of current device"""
+        return "Device(name={}, is_connected={}, is_on={}, mode={}, current_temp={}, target_temp={}, id={}, ws_id={})".format(
+            self.name,
+            self.is_connected,
+            self.is_on,
+            self.mode,
+            self.current_temperature,
+            self.target_temperature,
+            self.id,
+            self.ws_id,
+        )
+
+    @property
+    def _str_log(self) -> str:
+        """Description used in logs (str_verbose without loading the state in lazy mode)"""
+        if self._state is None:
+            return "Device(name={}, state=not loaded, id={}, ws_id={})".format(
+                self.name, self.id, self.ws_id
+            )
+        return self.str_verbose
+
+    @property
+    def all_properties(self) -> dict:
+        """Return all group properties values"""
+        result = {}
+        for prop in [
+            "id",
+            "name",
+            "type",
+            "ws_id",
+            "system_number",
+            "zone_number",
+            "is_connected",
+            "is_on",
+            "mode_id",
+            "mode",
+            "mode_generic",
+            "mode_description",
+            "modes_availables",
+            "modes_availables_generics",
+            "current_humidity",
+            "current_temperature",
+            "target_temperature",
+            "min_temperature",
+            "max_temperature",
+            "step_temperature",
+        ]:
+            result[prop] = getattr(self, prop)
+        return result
+
+    #
+    # getters
+    #
+
+    @property
+    def id(self) -> str:
+        """Return device id"""
+        return self._data.get("device_id")
+
+    @property
+    def name(self) -> str:
+        """Return device name"""
+        return self._data.get("name")
+
+    @property
+    def type(self) -> str:
+        """Return device type (az_zone┃aidoo)"""
+        return self._data.get("type")
+
+    @property
+    def ws_id(self) -> str:
+        """Return device webserver id (mac address)"""
+        return self._data.get("ws_id")
+
+    @property
+    def system_number(self) -> str:
+        """Return device system_number"""
+        return self._data.get("meta", {}).get("system_number")
+
+    @property
+    def zone_number(self) -> str:
+        """Return device zone_number"""
+        return self._data.get("meta", {}).get("zone_number")
+
+    @property
+    def is_connected(self) -> bool:
+        """Return if the device is online (True) or offline (False)"""
+        return self._get_state().is_connected
+
+    @property
+    def is_on(self) -> bool:
+        """Return True if the device is on"""
+        return self._get_state().is_on
+
+    @property
+    def is_master(self) -> bool:
+        """Return True if the device is a master thermostat (allowed to update the mode of all devices)"""
+        return len(self.modes_availables_ids) > 0
+
+    @property
+    def mode_id(self) -> int:
+        """Return device current id mode (0┃1┃2┃3┃4┃5┃6┃7┃8┃9┃10┃11┃12)"""
+        return self._get_state().mode_id
+
+    @property
+    def mode(self) -> str:
+        """Return device current mode name (stop | auto | cooling | heating | ventilation | dehumidify | emergency-heating | air-heating | radiant-heating | combined-heating | air-cooling | radiant-cooling | combined-cooling)"""
+        return self._get_state().mode_info.get("name")
+
+    @property
+    def mode_generic(self) -> str:
+        """Return device current generic mode (stop | auto | cooling | heating | ventilation | dehumidify | emergency)"""
+        return self._get_state().mode_info.get("generic")
+
+    @property
+    def mode_description(self) -> str:
+        """Return device current mode description (pretty name to display)"""
+        return self._get_state().mode_info.get("description")
+
+    @property
+    def modes_availables_ids(self) -> "list[int]":
+        """Return device availables modes list ([0┃1┃2┃3┃4┃5┃6┃7┃8┃9┃10┃11┃12, ...])"""
+        return list(self._get_state().modes_availables_ids)
+
+    @property
+    def modes_availables(self) -> "list[str]":
+        """Return device availables modes names list ([stop | auto | cooling | heating | ventilation | dehumidify | emergency-heating | air-heating | radiant-heating | combined-heating | air-cooling | radiant-cooling | combined-cooling, ...])"""
+        return [
+            MODES_CONVERTER.get(str(mode_id), {}).get("name")
+            for mode_id in self._get_state().modes_availables_ids
+        ]
+
+    @property
+    def modes_availables_generics(self) -> "list[str]":
+        """Return device availables modes generics list ([stop | auto | cooling | heating | ventilation | dehumidify | emergency, ...])"""
+        return list(
+            set(
+                [
+                    MODES_CONVERTER.get(str(mode_id), {}).get("generic")
+                    for mode_id in self._get_state().modes_availables_ids
+                ]
+            )
+        )
+
+    @property
+    def current_temperature(self) -> float:
+        """Return device current temperature in °C"""
+        return self._get_state().current_temperature
+
+    @property
+    def current_humidity(self) -> int:
+        """Return device current humidity in percentage (0-100)"""
+        return self._get_state().current_humidity
+
+    @property
+    def target_temperature(self) -> float:
+        """Return device target temperature for current mode"""
+        return self._get_state().target_temperature
+
+    @property
+    def min_temperature(self) -> float:
+        """Return device minimal temperature for current mode"""
+        return self._get_state().min_temperature
+
+    @property
+    def max_temperature(self) -> float:
+        """Return device maximal temperature for current mode"""
+        return self._get_state().max_temperature
+
+    @property
+    def step_temperature(self) -> float:
+        """Return device step temperature (minimum increase/decrease step)"""
+        return self._get_state().step_temperature
+
+    #
+    # parent group
+    #
+
+    @property
+    def group(self) -> "GroupBase":
+        """Get parent group"""
+        return self._group
+
+    #
+    # private
+    #
+
+    def _get_cached_config(self, type: str) -> Mapping:
+        """Return a config subset from cache, None if not loaded or expired"""
+        configs = self._configs
+        ttl = self._api._config_ttl
+        for key in (type, "all"):
+            cached = configs.get(key)
+            if cached is not None and (
+                ttl is None or time.monotonic() - cached[1] < ttl
+            ):
+                return cached[0]
+        return None
+
+    def _get_state(self) -> DeviceState:
+        """Return device state (default values until loaded)"""
+        if self._state is None:
+            return DeviceState()
+        return self._state
+
+    def _patch_state(self, patch: dict) -> "DeviceBase":
+        """Update some state values in place (called by RealtimeListener on pushed updates)"""
+        # not loaded yet in lazy mode: the full state will be loaded on first access
+        if self._state is None:
+            return self
+        return self._set_state(DeviceState.parse(patch, self._state))
+
+    def _get_mode_id(self, mode_name: str) -> int:
+        """Return mode id from its name, raise ValueError if not available for this device"""
+        # search mode id
+        mode_id_found = None
+        for mode_id, mode in MODES_CONVERTER.items():
+            if mode["name"] == mode_name:
+                mode_id_found = int(mode_id)
+                break
+        if mode_id_found is None:
+            raise ValueError(
+                'mode name "{}" not found for {}'.format(mode_name, self.str_verbose)
+            )
+
+        if mode_id_found not in self.modes_availables_ids:
+            if len(self.modes_availables_ids) == 0:
+                raise ValueError(
+                    'mode name "{}" (id: {}) not availables for {} : only master thermostat device can set the mode'.format(
+                        mode_name,
+                        mode_id_found,
+                        self.str_verbose,
+                        self.modes_availables,
+                    )
+                )
+
+            raise ValueError(
+                'mode name "{}" (id: {}) not availables for {}. Allowed values: {}'.format(
+                    mode_name, mode_id_found, self.str_verbose, self.modes_availables
+                )
+            )
+
+        return mode_id_found
+
+    def _set_state(self, state: DeviceState) -> "DeviceBase":
+        """Replace state and notify changed fields to listeners (nothing to do if unchanged)"""
+        # recorders get every state, even unchanged ones
+        for recorder in self._api._state_recorders:
+            recorder.record(self, state)
+        previous_state = self._state
+        if state == previous_state:
+            return self
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("%s", state)
+        # first load or nobody listening: no need to compare fields
+        if previous_state is None or not self._has_listeners():
+            self._state = state
+            return self
+        previous = self._get_fields(DEVICE_STATE_FIELDS)
+        self._state = state
+        self._notify_changes(previous, self._get_fields(DEVICE_STATE_FIELDS))
+        return self
+
+    def _get_fields(self, fields: "tuple[str]") -> dict:
+        """Return values of some properties"""
+        return dict((field, getattr(self, field)) for field in fields)
+
+    def _notify_changes(self, previous: dict, current: dict) -> None:
+        """Notify listeners of fields with a different value"""
+        changes = [
+            Change(self, field, previous[field], current[field])
+            for field in current
+            if previous[field] != current[field]
+        ]
+        if changes:
+            self._notify(changes)
+
+    def _get_observable_parent(self) -> "GroupBase":
+        return self._group
+
+    def _set_data_refreshed(self, data: dict) -> "DeviceBase":
+        """Set data refreshed (called by parent Group on refresh_groups())"""
+        if data == self._data:
+            return self
+        previous = None
+        if self._has_listeners():
+            previous = self._get_fields(DEVICE_DATA_FIELDS)
+        self._data = data
+        # configs include data (like the name): load them again on next access
+        self._configs = {}
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("Data refreshed for %s", self._str_log)
+        if previous is not None:
+            self._notify_changes(previous, self._get_fields(DEVICE_DATA_FIELDS))
+        return self
@@ -0,0 +1,167 @@
+from .constants import MODES_CONVERTER
+
+# modes availables tuples shared by all states (only a few combinations exist)
+_MODES_AVAILABLES = {}
+
+# raw keys of (setpoint, min, max) of modes in DeviceState.modes_values, and
+# index of the values of each setpoint key (shared by several modes)
+_MODES_VALUES_KEYS = []
+_MODES_VALUES_INDEX = {}
+for _mode in MODES_CONVERTER.values():
+    if "setpoint_key" in _mode and "range_key_prefix" in _mode:
+        if _mode["setpoint_key"] not in _MODES_VALUES_INDEX:
+            _MODES_VALUES_INDEX[_mode["setpoint_key"]] = len(_MODES_VALUES_KEYS)
+            _MODES_VALUES_KEYS.extend(
+                (
+                    _mode["setpoint_key"],
+                    _mode["range_key_prefix"] + "min",
+                    _mode["range_key_prefix"] + "max",
+                )
+            )
+_MODES_VALUES_KEYS = tuple(_MODES_VALUES_KEYS)
+_MODES_VALUES_RAW_KEYS = frozenset(_MODES_VALUES_KEYS)
+_NO_MODES_VALUES = (None,) * len(_MODES_VALUES_KEYS)
+
+# modes_values tuples shared by all states (most devices have the same setpoints
+# & ranges)
+_MODES_VALUES = {}
+
+
+class DeviceState:
+    """Device state parsed once from the raw AirzoneCloud status
+
+    Only values exposed by Device are kept (temperatures in °C), the raw status
+    with all modes ranges in °C and °F is dropped. Setpoints & ranges of all modes
+    are kept in modes_values, so that a realtime update only changing the mode
+    gets the setpoint & range of the new mode.
+    """
+
+    __slots__ = (
+        "is_connected",
+        "is_on",
+        "mode_id",
+        "mode_info",
+        "modes_availables_ids",
+        "current_temperature",
+        "current_humidity",
+        "target_temperature",
+        "min_temperature",
+        "max_temperature",
+        "step_temperature",
+        "modes_values",
+    )
+
+    def __init__(self) -> None:
+        self.is_connected = False
+        self.is_on = False
+        self.mode_id = 0
+        self.mode_info = MODES_CONVERTER["0"]
+        self.modes_availables_ids = ()
+        self.current_temperature = 0.0
+        self.current_humidity = 0
+        self.target_temperature = 0.0
+        self.min_temperature = 0.0
+        self.max_temperature = 0.0
+        self.step_temperature = 0.5
+        self.modes_values = _NO_MODES_VALUES
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DeviceState):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        return "DeviceState({})".format(
+            ", ".join(
+                "{}={}".format(slot, getattr(self, slot))
+                for slot in self.__slots__
+                if slot not in ("mode_info", "modes_values")
+            )
+        )
+
+    @classmethod
+    def parse(cls, raw: dict, base: "DeviceState" = None) -> "DeviceState":
+        """Parse a raw status (or some values of it on top of base, for realtime updates)"""
+        state = cls()
+        if base is not None:
+            for slot in cls.__slots__:
+                setattr(state, slot, getattr(base, slot))
+
+        if "isConnected" in raw:
+            state.is_connected = bool(raw["isConnected"])
+        if "power" in raw:
+            state.is_on = bool(raw["power"])
+        if "mode" in raw:
+            state.mode_id = raw["mode"] if raw["mode"] is not None else 0
+            state.mode_info = MODES_CONVERTER.get(str(state.mode_id), {})
+        if "mode_available" in raw:
+            modes = tuple(raw["mode_available"] or ())
+            state.modes_availables_ids = _MODES_AVAILABLES.setdefault(modes, modes)
+        if "local_temp" in raw:
+            state.current_temperature = cls._celsius(raw["local_temp"], 0)
+        if "humidity" in raw:
+            state.current_humidity = int(raw["humidity"] or 0)
+        if "step" in raw:
+            state.step_temperature = cls._celsius(raw["step"], 0.5)
+
+        # setpoints & ranges of all modes (kept from base if not in raw)
+        if base is None or not _MODES_VALUES_RAW_KEYS.isdisjoint(raw):
+            modes_values = tuple(
+                [
+                    (
+                        float(value["celsius"])
+                        if value.__class__ is dict and value.get("celsius") is not None
+                        else base_value
+                    )
+                    for value, base_value in zip(
+                        map(raw.get, _MODES_VALUES_KEYS), state.modes_values
+                    )
+                ]
+            )
+            state.modes_values = _MODES_VALUES.setdefault(modes_values, modes_values)
+
+        # values of current mode
+        index = _MODES_VALUES_INDEX.get(state.mode_info.get("setpoint_key"))
+        if index is not None:
+            target, minimum, maximum = state.modes_values[index : index + 3]
+        else:
+            target = minimum = maximum = None
+        if target is not None or base is None:
+            state.target_temperature = target if target is not None else 0.0
+        if minimum is not None or base is None:
+            state.min_temperature = minimum if minimum is not None else 0.0
+        if maximum is not None or base is None:
+            state.max_temperature = maximum if maximum is not None else 0.0
+        return state
+
+    def to_raw(self) -> dict:
+        """Return a raw status with the kept values (parsed back by parse())"""
+        raw = {
+            "isConnected": self.is_connected,
+            "power": self.is_on,
+            "mode": self.mode_id,
+            "mode_available": list(self.modes_availables_ids),
+            "local_temp": {"celsius": self.current_temperature},
+            "humidity": self.current_humidity,
+            "step": {"celsius": self.step_temperature},
+        }
+        for key, value in zip(_MODES_VALUES_KEYS, self.modes_values):
+            if value is not None:
+                raw[key] = {"celsius": value}
+        if "setpoint_key" in self.mode_info:
+            raw[self.mode_info["setpoint_key"]] = {"celsius": self.target_temperature}
+        if "range_key_prefix" in self.mode_info:
+            prefix = self.mode_info["range_key_prefix"]
+            raw[prefix + "min"] = {"celsius": self.min_temperature}
+            raw[prefix + "max"] = {"celsius": self.max_temperature}
+        return raw
+
+    @staticmethod
+    def _celsius(value: dict, default: float) -> float:
+        """Return celsius value of a raw temperature ({"celsius": 20, "fah": 68})"""
+        if not isinstance(value, dict):
+            return float(default)
+        celsius = value.get("celsius")
+        return float(celsius) if celsius is not None else float(default)
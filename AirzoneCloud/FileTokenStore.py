@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+import tempfile
+
+from .TokenStore import TokenStore
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FileTokenStore(TokenStore):
+    """Keep AirzoneCloud tokens in a json file only readable by the current user
+
+    The file is written atomically (temporary file then rename) with 0600
+    permissions, in a directory created with 0700 permissions. Passwords are
+    never stored.
+    """
+
+    _path: str = None
+
+    def __init__(self, path: str = None) -> None:
+        """Initialize store
+
+        path: json file (default to ~/.cache/AirzoneCloud/tokens.json)
+        """
+        super().__init__()
+        if path is None:
+            path = os.path.join(
+                os.environ.get("XDG_CACHE_HOME")
+                or os.path.join(os.path.expanduser("~"), ".cache"),
+                "AirzoneCloud",
+                "tokens.json",
+            )
+        self._path = path
+
+    @property
+    def path(self) -> str:
+        """Return path of the json file"""
+        return self._path
+
+    def load(self, key: str) -> dict:
+        with self._lock:
+            return self._read().get(key)
+
+    def save(self, key: str, token: str, expires_at: float = None) -> None:
+        with self._lock:
+            tokens = self._read()
+            tokens[key] = {"token": token, "expires_at": expires_at}
+            self._write(tokens)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            tokens = self._read()
+            if tokens.pop(key, None) is not None:
+                self._write(tokens)
+
+    #
+    # private
+    #
+
+    def _read(self) -> "dict[str, dict]":
+        """Read all tokens (empty if the file doesn't exist or is invalid)"""
+        try:
+            with open(self._path, "r") as file:
+                tokens = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as err:
+            _LOGGER.warning("Unable to read tokens from %s : %s", self._path, repr(err))
+            return {}
+        return tokens if isinstance(tokens, dict) else {}
+
+    def _write(self, tokens: "dict[str, dict]") -> None:
+        """Replace the file with tokens (errors are only logged)"""
+        directory = os.path.dirname(os.path.abspath(self._path))
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tokens-")
+            try:
+                os.chmod(tmp_path, 0o600)
+                with os.fdopen(fd, "w") as file:
+                    json.dump(tokens, file)
+                os.replace(tmp_path, self._path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as err:
+            _LOGGER.warning("Unable to save tokens to %s : %s", self._path, repr(err))
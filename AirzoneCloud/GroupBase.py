@@ -0,0 +1,200 @@
+import logging
+from typing import TYPE_CHECKING
+from .Observable import Observable
+
+if TYPE_CHECKING:
+    from .AirzoneCloudBase import AirzoneCloudBase
+    from .DeviceBase import DeviceBase
+    from .InstallationBase import InstallationBase
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class GroupBase(Observable):
+    """Group data & devices shared by Group and AsyncGroup (without any request)
+
+    Subclasses instance their devices in _new_device().
+    """
+
+    _api: "AirzoneCloudBase" = None
+    _installation: "InstallationBase" = None
+    _data: dict = {}
+    _devices: "list[DeviceBase]" = []
+    _refresh_errors: "dict[str, Exception]" = {}
+
+    def __init__(
+        self, api: "AirzoneCloudBase", installation: "InstallationBase", data: dict
+    ) -> None:
+        self._api = api
+        self._installation = installation
+        self._data = data
+
+        # log
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("Init %s", self.str_verbose)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("%s", data)
+
+        # load all devices
+        self._load_devices()
+
+    def __str__(self) -> str:
+        return "Group(name={}, installation={})".format(
+            self.name, self._installation.name
+        )
+
+    @property
+    def str_verbose(self) -> str:
+        """More verbose description of current group"""
+        return "Group(name={}, installation={}, id={})".format(
+            self.name, self._installation.name, self.id
+        )
+
+    @property
+    def all_properties(self) -> dict:
+        """Return all group properties values"""
+        result = {}
+        for prop in [
+            "id",
+            "name",
+            "is_on",
+            "mode_id",
+            "mode",
+            "mode_generic",
+            "mode_description",
+            "modes_availables",
+            "modes_availables_generics",
+        ]:
+            result[prop] = getattr(self, prop)
+        return result
+
+    #
+    # getters
+    #
+
+    @property
+    def id(self) -> str:
+        """Return group id"""
+        return self._data.get("group_id")
+
+    @property
+    def name(self) -> str:
+        """Return group name"""
+        return self._data.get("name")
+
+    @property
+    def is_on(self) -> bool:
+        """Return True if at least one device is on in the group"""
+        for device in self.devices:
+            if device.is_on:
+                return True
+        return False
+
+    @property
+    def mode_id(self) -> int:
+        """Return group current id mode (0┃1┃2┃3┃4┃5┃6┃7┃8┃9┃10┃11┃12)"""
+        return self.master_device.mode_id
+
+    @property
+    def mode(self) -> str:
+        """Return group current mode name (stop | auto | cooling | heating | ventilation | dehumidify | emergency-heating | air-heating | radiant-heating | combined-heating | air-cooling | radiant-cooling | combined-cooling)"""
+        return self.master_device.mode
+
+    @property
+    def mode_generic(self) -> str:
+        """Return group current generic mode (stop | auto | cooling | heating | ventilation | dehumidify | emergency)"""
+        return self.master_device.mode_generic
+
+    @property
+    def mode_description(self) -> str:
+        """Return group current mode description (pretty name to display)"""
+        return self.master_device.mode_description
+
+    @property
+    def modes_availables_ids(self) -> "list[int]":
+        """Return group availables modes list ([0┃1┃2┃3┃4┃5┃6┃7┃8┃9┃10┃11┃12, ...])"""
+        return self.master_device.modes_availables_ids
+
+    @property
+    def modes_availables(self) -> "list[str]":
+        """Return group availables modes names list ([stop | auto | cooling | heating | ventilation | dehumidify | emergency-heating | air-heating | radiant-heating | combined-heating | air-cooling | radiant-cooling | combined-cooling, ...])"""
+        return self.master_device.modes_availables
+
+    @property
+    def modes_availables_generics(self) -> "list[str]":
+        """Return group availables modes generics list ([stop | auto | cooling | heating | ventilation | dehumidify | emergency, ...])"""
+        return self.master_device.modes_availables_generics
+
+    #
+    # parent installation
+    #
+
+    @property
+    def installation(self) -> "InstallationBase":
+        """Get parent installation"""
+        return self._installation
+
+    #
+    # children
+    #
+
+    @property
+    def devices(self) -> "list[DeviceBase]":
+        """Return all devices in this group"""
+        return self._devices
+
+    @property
+    def master_device(self) -> "DeviceBase":
+        """Return master device in this group (only device allowed to change mode)"""
+        for device in self.devices:
+            if device.is_master:
+                return device
+        raise Exception(
+            "Cannot find master device in group {}".format(self.str_verbose)
+        )
+
+    #
+    # Refresh
+    #
+
+    @property
+    def refresh_errors(self) -> "dict[str, Exception]":
+        """Return errors of the last refresh_devices() by device id (empty if all devices were refreshed)"""
+        return self._refresh_errors
+
+    #
+    # private
+    #
+
+    def _load_devices(self) -> "list[DeviceBase]":
+        """Load all devices for this group"""
+        previous_devices = self._devices
+        previous_by_id = dict((device.id, device) for device in previous_devices)
+        self._devices = []
+        for device_data in self._data.get("devices", []):
+            # skip fake system device
+            if device_data.get("type") not in ("az_zone", "aidoo"):
+                continue
+            # search device in previous devices (if where are refreshing devices)
+            device = previous_by_id.get(device_data.get("device_id"))
+            if device is not None:
+                # update data
+                device._set_data_refreshed(device_data)
+            # device not found => instance new device
+            else:
+                device = self._new_device(device_data)
+            self._devices.append(device)
+        self._api._identity_map.replace_devices(previous_devices, self._devices)
+        return self._devices
+
+    def _get_observable_parent(self) -> "InstallationBase":
+        return self._installation
+
+    def _set_data_refreshed(self, data: dict) -> "GroupBase":
+        """Set data refreshed (called by parent Installation on refresh_groups()), then devices data"""
+        self._data = data
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("Data refreshed for %s", self.str_verbose)
+        # renamed, added & removed devices
+        self._load_devices()
+        return self
@@ -0,0 +1,145 @@
+import threading
+
+
+class IdentityMap:
+    """Index installations, groups & devices of an account (thread safe)
+
+    Objects are indexed by id, and devices also by ws_id, name and
+    (system_number, zone_number), so that lookups don't scan all devices.
+    Indexes are updated by the api each time children are (re)loaded.
+    """
+
+    _installations: "dict[str, Installation]" = {}
+    _groups: "dict[str, Group]" = {}
+    _devices: "dict[str, Device]" = {}
+    _devices_by_ws_id: "dict[str, dict[str, Device]]" = {}
+    _devices_by_name: "dict[str, dict[str, Device]]" = {}
+    _devices_by_zone: "dict[tuple, dict[str, Device]]" = {}
+    _devices_keys: "dict[str, tuple]" = {}
+    _lock: threading.RLock = None
+
+    def __init__(self) -> None:
+        self._installations = {}
+        self._groups = {}
+        self._devices = {}
+        self._devices_by_ws_id = {}
+        self._devices_by_name = {}
+        self._devices_by_zone = {}
+        self._devices_keys = {}
+        self._lock = threading.RLock()
+
+    #
+    # getters
+    #
+
+    def get_installation(self, installation_id: str) -> "Installation":
+        """Return installation by id (None if unknown)"""
+        return self._installations.get(installation_id)
+
+    def get_group(self, group_id: str) -> "Group":
+        """Return group by id (None if unknown)"""
+        return self._groups.get(group_id)
+
+    def get_device(self, device_id: str) -> "Device":
+        """Return device by id (None if unknown)"""
+        return self._devices.get(device_id)
+
+    def find_devices(
+        self,
+        ws_id: str = None,
+        name: str = None,
+        system_number: int = None,
+        zone_number: int = None,
+    ) -> "list[Device]":
+        """Return devices matching all given criteria"""
+        with self._lock:
+            # start from the most selective index
+            if system_number is not None and zone_number is not None:
+                candidates = self._devices_by_zone.get(
+                    (system_number, zone_number), {}
+                )
+            elif name is not None:
+                candidates = self._devices_by_name.get(name, {})
+            elif ws_id is not None:
+                candidates = self._devices_by_ws_id.get(ws_id, {})
+            else:
+                candidates = self._devices
+            candidates = list(candidates.values())
+
+        return [
+            device
+            for device in candidates
+            if (ws_id is None or device.ws_id == ws_id)
+            and (name is None or device.name == name)
+            and (system_number is None or device.system_number == system_number)
+            and (zone_number is None or device.zone_number == zone_number)
+        ]
+
+    #
+    # update
+    #
+
+    def replace_installations(
+        self,
+        previous: "list[Installation]",
+        current: "list[Installation]",
+    ) -> None:
+        """Replace previous installations by current ones (with children of removed ones)"""
+        with self._lock:
+            current_ids = set(installation.id for installation in current)
+            for installation in previous:
+                if installation.id not in current_ids:
+                    self._installations.pop(installation.id, None)
+                    self.replace_groups(installation._groups or [], [])
+            for installation in current:
+                self._installations[installation.id] = installation
+
+    def replace_groups(self, previous: "list[Group]", current: "list[Group]") -> None:
+        """Replace previous groups by current ones (with devices of removed ones)"""
+        with self._lock:
+            current_ids = set(group.id for group in current)
+            for group in previous:
+                if group.id not in current_ids:
+                    self._groups.pop(group.id, None)
+                    self.replace_devices(group._devices, [])
+            for group in current:
+                self._groups[group.id] = group
+
+    def replace_devices(
+        self, previous: "list[Device]", current: "list[Device]"
+    ) -> None:
+        """Replace previous devices by current ones (reindexing their data)"""
+        with self._lock:
+            for device in previous:
+                self._remove_device(device)
+            for device in current:
+                self._add_device(device)
+
+    #
+    # private
+    #
+
+    def _add_device(self, device: "Device") -> None:
+        keys = (device.ws_id, device.name, (device.system_number, device.zone_number))
+        self._devices[device.id] = device
+        self._devices_keys[device.id] = keys
+        for index, key in zip(
+            (self._devices_by_ws_id, self._devices_by_name, self._devices_by_zone),
+            keys,
+        ):
+            index.setdefault(key, {})[device.id] = device
+
+    def _remove_device(self, device: "Device") -> None:
+        # use keys indexed before, device data may have been refreshed since
+        keys = self._devices_keys.pop(device.id, None)
+        if keys is None:
+            return
+        self._devices.pop(device.id, None)
+        for index, key in zip(
+            (self._devices_by_ws_id, self._devices_by_name, self._devices_by_zone),
+            keys,
+        ):
+            devices = index.get(key, {})
+            devices.pop(device.id, None)
+            if not devices:
+                index.pop(key, None)
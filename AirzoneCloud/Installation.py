@@ -1,133 +1,130 @@
 import logging
 import time
+from typing import TYPE_CHECKING
 
-from . import AirzoneCloud
 from .Group import Group
-from .Device import Device
+from .InstallationBase import InstallationBase
+from .constants import CONFIG_TYPE
+
+if TYPE_CHECKING:
+    from .AirzoneCloud import AirzoneCloud
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class Installation:
+class Installation(InstallationBase):
     """Manage a AirzoneCloud installation"""
 
-    _api: AirzoneCloud = None
-    _data: dict = {}
+    _api: "AirzoneCloud" = None
     _groups: "list[Group]" = []
+    _confirmed: bool = None
 
-    def __init__(self, api: AirzoneCloud, data: dict) -> None:
+    def __init__(self, api: "AirzoneCloud", data: dict) -> None:
         self._api = api
         self._data = data
 
         # log
-        _LOGGER.info("Init {}".format(self.str_verbose))
-        _LOGGER.debug(data)
-
-        # load all groups
-        self._load_groups()
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("Init %s", self.str_verbose)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("%s", data)
 
-    def __str__(self) -> str:
-        return "Installation(name={})".format(self.name)
-
-    @property
-    def str_verbose(self) -> str:
-        """More verbose description of current installation"""
-        return "Installation(name={}, access_type={}, ws_ids=[{}], id={})".format(
-            self.name, self.access_type, ", ".join(self.ws_ids), self.id
-        )
+        # load all groups (on first access in lazy mode)
+        if api._lazy:
+            self._groups = None
+        else:
+            self._load_groups()
 
     #
     # getters
     #
 
     @property
-    def id(self) -> str:
-        """Return installation id"""
-        return self._data.get("installation_id")
-
-    @property
-    def name(self) -> str:
-        """Return installation name"""
-        return self._data.get("name")
-
-    @property
-    def access_type(self) -> str:
-        """Return installation access_type (admin┃advanced┃basic)"""
-        return self._data.get("access_type")
-
-    @property
-    def location_id(self) -> str:
-        """Return installation location id"""
-        return self._data.get("location_id")
-
-    @property
-    def ws_ids(self) -> str:
-        """Return array of Webserver MAC addresses belonging to the installation"""
-        return self._data.get("ws_ids", [])
+    def last_confirmed(self) -> bool:
+        """Return True if devices states confirmed the last command sent with auto_refresh, False if not confirmed before confirm_timeout (None if confirmation is disabled)"""
+        return self._confirmed
 
     #
     # setters
     #
 
     def turn_on(
-        self, auto_refresh: bool = True, delay_refresh: int = 1
+        self,
+        auto_refresh: bool = True,
+        delay_refresh: int = 1,
+        confirm_timeout: float = None,
     ) -> "Installation":
         """Turn on all devices in the installation"""
-        _LOGGER.info("call turn_on() on {}".format(self.str_verbose))
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call turn_on() on %s", self.str_verbose)
 
-        for group in self.groups:
-            group.turn_on(auto_refresh=False)
+        with self._api._command_queue.batch():
+            for group in self.groups:
+                group.turn_on(auto_refresh=False)
 
         if auto_refresh:
-            time.sleep(delay_refresh)  # wait data refresh by airzone
-            self.refresh_devices()
+            self._auto_refresh(delay_refresh, confirm_timeout)
 
         return self
 
     def turn_off(
-        self, auto_refresh: bool = True, delay_refresh: int = 1
+        self,
+        auto_refresh: bool = True,
+        delay_refresh: int = 1,
+        confirm_timeout: float = None,
     ) -> "Installation":
         """Turn off all devices in the installation"""
-        _LOGGER.info("call turn_off() on {}".format(self.str_verbose))
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call turn_off() on %s", self.str_verbose)
 
-        for group in self.groups:
-            group.turn_off(auto_refresh=False)
+        with self._api._command_queue.batch():
+            for group in self.groups:
+                group.turn_off(auto_refresh=False)
 
         if auto_refresh:
-            time.sleep(delay_refresh)  # wait data refresh by airzone
-            self.refresh_devices()
+            self._auto_refresh(delay_refresh, confirm_timeout)
 
         return self
 
     def set_temperature(
-        self, temperature: float, auto_refresh: bool = True, delay_refresh: int = 1
+        self,
+        temperature: float,
+        auto_refresh: bool = True,
+        delay_refresh: int = 1,
+        confirm_timeout: float = None,
     ) -> "Installation":
         """Set target_temperature for current all devices in the installation (in degrees celsius)"""
-        _LOGGER.info(
-            "call set_temperature({}) on {}".format(temperature, self.str_verbose)
-        )
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info(
+                "call set_temperature(%s) on %s", temperature, self.str_verbose
+            )
 
-        for group in self.groups:
-            group.set_temperature(temperature=temperature, auto_refresh=False)
+        with self._api._command_queue.batch():
+            for group in self.groups:
+                group.set_temperature(temperature=temperature, auto_refresh=False)
 
         if auto_refresh:
-            time.sleep(delay_refresh)  # wait data refresh by airzone
-            self.refresh_devices()
+            self._auto_refresh(delay_refresh, confirm_timeout)
 
         return self
 
     def set_mode(
-        self, mode_name: str, auto_refresh: bool = True, delay_refresh: int = 1
+        self,
+        mode_name: str,
+        auto_refresh: bool = True,
+        delay_refresh: int = 1,
+        confirm_timeout: float = None,
     ) -> "Installation":
         """Set mode of the all devices in the installation"""
-        _LOGGER.info("call set_mode({}) on {}".format(mode_name, self.str_verbose))
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("call set_mode(%s) on %s", mode_name, self.str_verbose)
 
-        for group in self.groups:
-            group.set_mode(mode_name=mode_name, auto_refresh=False)
+        with self._api._command_queue.batch():
+            for group in self.groups:
+                group.set_mode(mode_name=mode_name, auto_refresh=False)
 
         if auto_refresh:
-            time.sleep(delay_refresh)  # wait data refresh by airzone
-            self.refresh_devices()
+            self._auto_refresh(delay_refresh, confirm_timeout)
 
         return self
 
@@ -138,17 +135,10 @@ class Installation:
     @property
     def groups(self) -> "list[Group]":
         """Get all groups in the current installation"""
+        if self._groups is None:
+            self._load_groups()
         return self._groups
 
-    @property
-    def all_devices(self) -> "list[Device]":
-        """Get all devices from all groups in the current installation"""
-        result = []
-        for group in self.groups:
-            for device in group.devices:
-                result.append(device)
-        return result
-
     #
     # Refresh
     #
@@ -159,9 +149,20 @@ class Installation:
         return self
 
     def refresh_devices(self) -> "Installation":
-        """Refresh all devices of this installation"""
-        for group in self.groups:
-            group.refresh_devices()
+        """Refresh all devices of this installation in parallel (errors are available in refresh_errors)"""
+        self._refresh_errors = self._api._refresh_devices(self.all_devices)
+        return self
+
+    def prefetch_config(
+        self, type: str = CONFIG_TYPE, force: bool = False
+    ) -> "Installation":
+        """Load config of all devices of this installation in parallel (see Device.get_config(), errors are available in config_errors)
+
+        Configs still cached are not requested again, unless force is True.
+        """
+        self._config_errors = self._api._load_devices_config(
+            self.all_devices, type, force
+        )
         return self
 
     #
@@ -170,32 +171,33 @@ class Installation:
 
     def _load_groups(self) -> "list[Group]":
         """Load all groups for this installation"""
-        previous_groups = self._groups
-        self._groups = []
         try:
-            for group_data in self._api._api_get_installation_groups_list(self.id):
-                group = None
-                # search group in previous_groups (if where are refreshing groups)
-                for previous_group in previous_groups:
-                    if previous_group.id == group_data.get("group_id"):
-                        group = previous_group
-                        group._set_data_refreshed(group_data)
-                        break
-                # group not found => instance new group
-                if group is None:
-                    group = Group(self._api, self, group_data)
-                self._groups.append(group)
+            return self._set_groups_data(
+                self._api._api_get_installation_groups_list(self.id)
+            )
         except RuntimeError:
             raise Exception(
                 "Unable to load groups for Installation " + self.str_verbose
             )
-        return self._groups
 
-    def _set_data_refreshed(self, data: dict) -> "Installation":
-        """Set data refreshed (called by parent AirzoneCloud on refresh_installations())"""
-        self._data = data
-        _LOGGER.info("Data refreshed for {}".format(self.str_verbose))
-        return self
+    def _new_group(self, group_data: dict) -> Group:
+        """Instance a new group"""
+        return Group(self._api, self, group_data)
+
+    def _auto_refresh(self, delay_refresh: int, confirm_timeout: float) -> None:
+        """Refresh devices after a command: wait delay_refresh, or poll until their states confirm it"""
+        if confirm_timeout is None:
+            confirm_timeout = self._api._confirm_timeout
+        if confirm_timeout:
+            self._confirmed = self._api._wait_confirmed(
+                self.all_devices, confirm_timeout
+            )
+        else:
+            self._confirmed = None
+            for device in self.all_devices:
+                device._expected = {}
+            time.sleep(delay_refresh)  # wait data refresh by airzone
+            self.refresh_devices()
 
 
 #
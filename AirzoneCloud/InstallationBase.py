@@ -0,0 +1,126 @@
+import logging
+from typing import TYPE_CHECKING, Iterator
+from .Observable import Observable
+
+if TYPE_CHECKING:
+    from .AirzoneCloudBase import AirzoneCloudBase
+    from .DeviceBase import DeviceBase
+    from .GroupBase import GroupBase
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class InstallationBase(Observable):
+    """Installation data & groups shared by Installation and AsyncInstallation (without any request)
+
+    Subclasses instance their groups in _new_group().
+    """
+
+    _api: "AirzoneCloudBase" = None
+    _data: dict = {}
+    _groups: "list[GroupBase]" = []
+    _refresh_errors: "dict[str, Exception]" = {}
+    _config_errors: "dict[str, Exception]" = {}
+
+    def __str__(self) -> str:
+        return "Installation(name={})".format(self.name)
+
+    @property
+    def str_verbose(self) -> str:
+        """More verbose description of current installation"""
+        return "Installation(name={}, access_type={}, ws_ids=[{}], id={})".format(
+            self.name, self.access_type, ", ".join(self.ws_ids), self.id
+        )
+
+    #
+    # getters
+    #
+
+    @property
+    def id(self) -> str:
+        """Return installation id"""
+        return self._data.get("installation_id")
+
+    @property
+    def name(self) -> str:
+        """Return installation name"""
+        return self._data.get("name")
+
+    @property
+    def access_type(self) -> str:
+        """Return installation access_type (admin┃advanced┃basic)"""
+        return self._data.get("access_type")
+
+    @property
+    def location_id(self) -> str:
+        """Return installation location id"""
+        return self._data.get("location_id")
+
+    @property
+    def ws_ids(self) -> str:
+        """Return array of Webserver MAC addresses belonging to the installation"""
+        return self._data.get("ws_ids", [])
+
+    #
+    # children
+    #
+
+    @property
+    def groups(self) -> "list[GroupBase]":
+        """Get all groups in the current installation"""
+        return self._groups
+
+    @property
+    def all_devices(self) -> "list[DeviceBase]":
+        """Get all devices from all groups in the current installation"""
+        return list(self.iter_devices())
+
+    def iter_devices(self) -> "Iterator[DeviceBase]":
+        """Iterate over all devices from all groups without building a list"""
+        for group in self.groups:
+            yield from group.devices
+
+    #
+    # Refresh
+    #
+
+    @property
+    def refresh_errors(self) -> "dict[str, Exception]":
+        """Return errors of the last refresh_devices() by device id (empty if all devices were refreshed)"""
+        return self._refresh_errors
+
+    @property
+    def config_errors(self) -> "dict[str, Exception]":
+        """Return errors of the last prefetch_config() by device id (empty if all configs were loaded)"""
+        return self._config_errors
+
+    #
+    # private
+    #
+
+    def _set_groups_data(self, groups_data: "list[dict]") -> "list[GroupBase]":
+        """Set groups from raw data, reusing already known groups"""
+        previous_groups = self._groups or []
+        previous_by_id = dict((group.id, group) for group in previous_groups)
+        self._groups = []
+        for group_data in groups_data:
+            # search group in previous groups (if where are refreshing groups)
+            group = previous_by_id.get(group_data.get("group_id"))
+            if group is not None:
+                group._set_data_refreshed(group_data)
+            # group not found => instance new group
+            else:
+                group = self._new_group(group_data)
+            self._groups.append(group)
+        self._api._identity_map.replace_groups(previous_groups, self._groups)
+        return self._groups
+
+    def _get_observable_parent(self) -> "AirzoneCloudBase":
+        return self._api
+
+    def _set_data_refreshed(self, data: dict) -> "InstallationBase":
+        """Set data refreshed (called by parent AirzoneCloud on refresh_installations())"""
+        self._data = data
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info("Data refreshed for %s", self.str_verbose)
+        return self
@@ -0,0 +1,53 @@
+import socket
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter keeping pooled connections warm
+
+    pool_connections: number of hosts kept in the pool
+    pool_maxsize: maximum connections kept open per host
+    pool_block: wait for a free connection when pool_maxsize connections are in
+    use, instead of opening (then dropping) extra connections
+    tcp_keepalive: seconds of inactivity before TCP keep-alive probes are sent on
+    idle connections, so that dead connections are detected (None to disable)
+    """
+
+    _tcp_keepalive: int = None
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = True,
+        tcp_keepalive: int = 60,
+        **kwargs
+    ) -> None:
+        self._tcp_keepalive = tcp_keepalive
+        super().__init__(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            **kwargs
+        )
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        if self._tcp_keepalive:
+            kwargs.setdefault("socket_options", self._socket_options())
+        super().init_poolmanager(*args, **kwargs)
+
+    def _socket_options(self) -> list:
+        """Return socket options enabling TCP keep-alive (when supported by the OS)"""
+        options = list(HTTPConnection.default_socket_options)
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        interval = max(1, int(self._tcp_keepalive) // 4)
+        for name, value in (
+            ("TCP_KEEPIDLE", int(self._tcp_keepalive)),
+            ("TCP_KEEPINTVL", interval),
+            ("TCP_KEEPCNT", 4),
+        ):
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+        return options
@@ -0,0 +1,251 @@
+import re
+import threading
+
+from .constants import METRICS_DURATION_BUCKETS
+
+# ids in api endpoints are replaced to count requests by endpoint template
+_ENDPOINT_ID_REGEX = re.compile(r"^/(installations|devices|groups)/[^/]+")
+
+
+class Metrics:
+    """Count requests sent to AirzoneCloud (thread safe)
+
+    By method & endpoint template (like "/devices/{id}/status"): requests by
+    status, durations histogram, bytes sent & received and retries. Logins and
+    unauthorized errors leading to a new login (relogins) are also counted.
+    Read them with as_dict() or to_prometheus().
+    """
+
+    _buckets: "tuple[float]" = METRICS_DURATION_BUCKETS
+    _endpoints: "dict[tuple[str, str], dict]" = {}
+    _logins: int = 0
+    _relogins: int = 0
+    _lock: threading.Lock = None
+
+    def __init__(self, buckets: "tuple[float]" = METRICS_DURATION_BUCKETS) -> None:
+        """Initialize counters
+
+        buckets: upper bounds in seconds of the durations histogram
+        """
+        self._buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> "Metrics":
+        """Reset all counters"""
+        with self._lock:
+            self._endpoints = {}
+            self._logins = 0
+            self._relogins = 0
+        return self
+
+    #
+    # record
+    #
+
+    def observe(
+        self,
+        method: str,
+        api_endpoint: str,
+        status: str,
+        duration: float,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+    ) -> None:
+        """Record a request (status is the http status, or the exception name if no response)"""
+        with self._lock:
+            endpoint = self._get_endpoint(method, api_endpoint)
+            endpoint["statuses"][status] = endpoint["statuses"].get(status, 0) + 1
+            endpoint["count"] += 1
+            endpoint["duration_sum"] += duration
+            for index, bound in enumerate(self._buckets):
+                if duration <= bound:
+                    endpoint["buckets"][index] += 1
+                    break
+            endpoint["bytes_sent"] += bytes_sent
+            endpoint["bytes_received"] += bytes_received
+
+    def count_retry(self, method: str, api_endpoint: str) -> None:
+        """Record a retry of a failed request"""
+        with self._lock:
+            self._get_endpoint(method, api_endpoint)["retries"] += 1
+
+    def count_login(self) -> None:
+        """Record a successful login"""
+        with self._lock:
+            self._logins += 1
+
+    def count_relogin(self) -> None:
+        """Record a login needed by an unauthorized error (expired token)"""
+        with self._lock:
+            self._relogins += 1
+
+    #
+    # export
+    #
+
+    def as_dict(self) -> dict:
+        """Return all counters
+
+        {"logins": 1, "relogins": 0, "endpoints": {"GET /devices/{id}/status": {
+        "count": 42, "statuses": {"200": 42}, "duration_sum": 4.2, "duration_buckets":
+        {0.05: 30, 0.1: 12, ...}, "bytes_sent": 0, "bytes_received": 4242, "retries": 0}}}
+        """
+        with self._lock:
+            endpoints = {}
+            for (method, template), endpoint in self._endpoints.items():
+                endpoints["{} {}".format(method, template)] = {
+                    "count": endpoint["count"],
+                    "statuses": dict(endpoint["statuses"]),
+                    "duration_sum": endpoint["duration_sum"],
+                    "duration_buckets": dict(zip(self._buckets, endpoint["buckets"])),
+                    "bytes_sent": endpoint["bytes_sent"],
+                    "bytes_received": endpoint["bytes_received"],
+                    "retries": endpoint["retries"],
+                }
+            return {
+                "logins": self._logins,
+                "relogins": self._relogins,
+                "endpoints": endpoints,
+            }
+
+    def to_prometheus(self, prefix: str = "airzonecloud", labels: dict = {}) -> str:
+        """Return counters in Prometheus text exposition format
+
+        labels: labels added to all metrics (like {"account": "..."})
+        """
+        with self._lock:
+            endpoints = [
+                (
+                    method,
+                    template,
+                    dict(
+                        endpoint,
+                        statuses=dict(endpoint["statuses"]),
+                        buckets=list(endpoint["buckets"]),
+                    ),
+                )
+                for (method, template), endpoint in self._endpoints.items()
+            ]
+            logins, relogins = self._logins, self._relogins
+
+        lines = []
+
+        def add(name, kind, help, samples):
+            lines.append("# HELP {}_{} {}".format(prefix, name, help))
+            lines.append("# TYPE {}_{} {}".format(prefix, name, kind))
+            for suffix, sample_labels, value in samples:
+                lines.append(
+                    "{}_{}{}{} {}".format(
+                        prefix,
+                        name,
+                        suffix,
+                        self._format_labels(dict(labels, **sample_labels)),
+                        self._format_value(value),
+                    )
+                )
+
+        add(
+            "requests_total",
+            "counter",
+            "Requests sent to AirzoneCloud by endpoint and status",
+            [
+                ("", {"method": method, "endpoint": template, "status": status}, count)
+                for method, template, endpoint in endpoints
+                for status, count in sorted(endpoint["statuses"].items())
+            ],
+        )
+        duration_samples = []
+        for method, template, endpoint in endpoints:
+            endpoint_labels = {"method": method, "endpoint": template}
+            cumulative = 0
+            for bound, count in zip(self._buckets, endpoint["buckets"]):
+                cumulative += count
+                duration_samples.append(
+                    (
+                        "_bucket",
+                        dict(endpoint_labels, le=self._format_value(bound)),
+                        cumulative,
+                    )
+                )
+            duration_samples.append(
+                ("_bucket", dict(endpoint_labels, le="+Inf"), endpoint["count"])
+            )
+            duration_samples.append(("_sum", endpoint_labels, endpoint["duration_sum"]))
+            duration_samples.append(("_count", endpoint_labels, endpoint["count"]))
+        add(
+            "request_duration_seconds",
+            "histogram",
+            "Duration of requests sent to AirzoneCloud",
+            duration_samples,
+        )
+        for name, key, help in (
+            ("request_bytes_total", "bytes_sent", "Bytes sent in requests bodies"),
+            (
+                "response_bytes_total",
+                "bytes_received",
+                "Bytes received in responses bodies",
+            ),
+            ("retries_total", "retries", "Failed requests retried"),
+        ):
+            add(
+                name,
+                "counter",
+                help,
+                [
+                    ("", {"method": method, "endpoint": template}, endpoint[key])
+                    for method, template, endpoint in endpoints
+                ],
+            )
+        add("logins_total", "counter", "Logins to AirzoneCloud", [("", {}, logins)])
+        add(
+            "relogins_total",
+            "counter",
+            "Logins after an unauthorized error (expired token)",
+            [("", {}, relogins)],
+        )
+        return "\n".join(lines) + "\n"
+
+    #
+    # private
+    #
+
+    def _get_endpoint(self, method: str, api_endpoint: str) -> dict:
+        """Return counters of an endpoint template (lock must be held)"""
+        template = _ENDPOINT_ID_REGEX.sub(r"/\1/{id}", api_endpoint)
+        endpoint = self._endpoints.get((method, template))
+        if endpoint is None:
+            endpoint = {
+                "count": 0,
+                "statuses": {},
+                "duration_sum": 0.0,
+                "buckets": [0] * len(self._buckets),
+                "bytes_sent": 0,
+                "bytes_received": 0,
+                "retries": 0,
+            }
+            self._endpoints[(method, template)] = endpoint
+        return endpoint
+
+    @staticmethod
+    def _format_labels(labels: dict) -> str:
+        if not labels:
+            return ""
+        return "{{{}}}".format(
+            ",".join(
+                '{}="{}"'.format(
+                    name,
+                    str(value)
+                    .replace("\\", "\\\\")
+                    .replace("\n", "\\n")
+                    .replace('"', '\\"'),
+                )
+                for name, value in labels.items()
+            )
+        )
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        if isinstance(value, float) and value.is_integer():
+            return "{:.1f}".format(value)
+        return str(value)
@@ -0,0 +1,752 @@
+#!/usr/bin/python3
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import socket
+import struct
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .constants import (
+    MODES_CONVERTER,
+    WEBSOCKET_LISTEN_EVENT,
+    WEBSOCKET_UPDATE_EVENTS,
+)
+
+# key suffix of the websocket handshake (RFC 6455)
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class MockServer:
+    """Local stand-in of the AirzoneCloud api endpoints used by this library (for tests & benchmarks)
+
+    Serves a synthetic account of installations * groups_per_installation *
+    devices_per_group devices, with an optional latency and errors. Requests
+    counts by endpoint are available in requests_counts (or with GET
+    /_mock/stats when the server runs in another process).
+
+    The realtime channel (engine.io v3 over websocket, see websocket_url) pushes
+    devices changes to clients listening their installation, and disconnects
+    clients not pinging within ping_interval + ping_timeout.
+
+    Usage:
+        with MockServer(installations=2, devices_per_group=10) as server:
+            api = AirzoneCloud("user@example.com", "password", api_url=server.url)
+    """
+
+    _host: str = "127.0.0.1"
+    _port: int = 0
+    _installations_count: int = 1
+    _groups_per_installation: int = 1
+    _devices_per_group: int = 4
+    _latency: float = 0
+    _error_rate: float = 0
+    _error_status: int = 503
+    _apply_delay: float = 0
+    _token_ttl: float = 3600
+    _ping_interval: float = 25
+    _ping_timeout: float = 5
+    _random: random.Random = None
+    _server: ThreadingHTTPServer = None
+    _thread: threading.Thread = None
+    _lock: threading.Lock = None
+    _installations: "list[dict]" = []
+    _groups: "dict[str, list[dict]]" = {}
+    _devices: "dict[str, dict]" = {}
+    _states: "dict[str, dict]" = {}
+    _tokens: "dict[str, float]" = {}
+    _failures: "list[dict]" = []
+    _websockets: "list[_MockWebsocket]" = []
+    _requests_counts: "dict[str, int]" = {}
+
+    def __init__(
+        self,
+        installations: int = 1,
+        groups_per_installation: int = 1,
+        devices_per_group: int = 4,
+        latency: float = 0,
+        error_rate: float = 0,
+        error_status: int = 503,
+        apply_delay: float = 0,
+        token_ttl: float = 3600,
+        ping_interval: float = 25,
+        ping_timeout: float = 5,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0,
+    ) -> None:
+        """Initialize server (call start() to serve)
+
+        latency: seconds waited before each response
+        error_rate: probability (0-1) that a request fails with error_status
+        apply_delay: seconds before a PATCH is reflected by the device status
+        token_ttl: seconds before a token expires (a 401 is then returned)
+        ping_interval, ping_timeout: seconds announced to realtime channel clients
+        port: port to listen (0 to use a free port)
+        """
+        self._installations_count = installations
+        self._groups_per_installation = groups_per_installation
+        self._devices_per_group = devices_per_group
+        self._latency = latency
+        self._error_rate = error_rate
+        self._error_status = error_status
+        self._apply_delay = apply_delay
+        self._token_ttl = token_ttl
+        self._ping_interval = ping_interval
+        self._ping_timeout = ping_timeout
+        self._host = host
+        self._port = port
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._failures = []
+        self._websockets = []
+        self._requests_counts = {}
+        self._generate_account()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    #
+    # getters
+    #
+
+    @property
+    def url(self) -> str:
+        """Return api base url to give as api_url to AirzoneCloud"""
+        return "http://{}:{}/api/v1".format(self._host, self._port)
+
+    @property
+    def websocket_url(self) -> str:
+        """Return realtime channel url to give as url to RealtimeListener"""
+        return "ws://{}:{}/api/v1/websockets".format(self._host, self._port)
+
+    @property
+    def devices_count(self) -> int:
+        """Return number of devices (zones) of the account"""
+        return len(self._devices)
+
+    @property
+    def requests_counts(self) -> "dict[str, int]":
+        """Return number of requests received by endpoint ("GET /devices/{id}/status": 42, ...)"""
+        with self._lock:
+            return dict(self._requests_counts)
+
+    #
+    # control
+    #
+
+    def start(self) -> "MockServer":
+        """Serve in a background thread"""
+        server = self
+
+        class Handler(_MockHandler):
+            mock = server
+
+        self._server = _MockHTTPServer((self._host, self._port), Handler)
+        self._port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="AirzoneCloudMock", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving"""
+        self.disconnect_websockets()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset_counts(self) -> "MockServer":
+        """Reset requests counts"""
+        with self._lock:
+            self._requests_counts = {}
+        return self
+
+    def fail_next(
+        self,
+        status: int,
+        method: str = None,
+        endpoint: str = None,
+        count: int = 1,
+        retry_after: float = None,
+    ) -> "MockServer":
+        """Answer the next count requests matching method & endpoint (like "/devices/{id}/status") with status"""
+        with self._lock:
+            self._failures.append(
+                {
+                    "status": status,
+                    "method": method,
+                    "endpoint": endpoint,
+                    "count": count,
+                    "retry_after": retry_after,
+                }
+            )
+        return self
+
+    def expire_tokens(self) -> "MockServer":
+        """Expire all tokens (next requests get a 401 until a new login)"""
+        with self._lock:
+            self._tokens = {}
+        return self
+
+    def push_update(self, device_id: str, status: dict) -> "MockServer":
+        """Push some values of a device status to realtime channel clients (without changing it)"""
+        self._push_updates({device_id: status})
+        return self
+
+    def disconnect_websockets(self) -> "MockServer":
+        """Close all realtime channel connections"""
+        with self._lock:
+            websockets = list(self._websockets)
+        for websocket in websockets:
+            websocket.close()
+        return self
+
+    def rename_device(self, device_id: str, name: str) -> "MockServer":
+        """Rename a device (seen by clients on their next groups refresh)"""
+        with self._lock:
+            self._devices[device_id]["name"] = name
+        return self
+
+    def add_device(self, group_id: str, name: str = None) -> str:
+        """Add a zone to a group (seen by clients on their next groups refresh), return its id"""
+        with self._lock:
+            group = next(
+                group
+                for groups in self._groups.values()
+                for group in groups
+                if group["group_id"] == group_id
+            )
+            system_number = group["devices"][0]["meta"]["system_number"]
+            zone_number = len(group["devices"])
+            device = {
+                "device_id": "{:024x}".format(0x60F5CB2000000 + len(self._devices)),
+                "meta": {"system_number": system_number, "zone_number": zone_number},
+                "type": "az_zone",
+                "ws_id": group["devices"][0]["ws_id"],
+                "name": name or "Zone {}.{}".format(system_number, zone_number),
+            }
+            group["devices"].append(device)
+            self._devices[device["device_id"]] = device
+            self._states[device["device_id"]] = self._generate_state(False)
+        return device["device_id"]
+
+    #
+    # private
+    #
+
+    def _generate_account(self) -> None:
+        """Generate installations, groups & devices"""
+        self._installations = []
+        self._groups = {}
+        self._devices = {}
+        self._states = {}
+        for installation_index in range(self._installations_count):
+            ws_id = ":".join(
+                "{:02X}".format(byte)
+                for byte in (
+                    0xAA,
+                    0xBB,
+                    0,
+                    0,
+                    installation_index >> 8 & 0xFF,
+                    installation_index & 0xFF,
+                )
+            )
+            installation_id = "{:024x}".format(0x60F5CB0000 + installation_index)
+            self._installations.append(
+                {
+                    "_id": installation_id,
+                    "installation_id": installation_id,
+                    "location_id": installation_id,
+                    "name": "Installation {}".format(installation_index),
+                    "ws_ids": [ws_id],
+                    "access_type": "admin",
+                    "color": 2,
+                }
+            )
+            groups = []
+            for group_index in range(self._groups_per_installation):
+                system_number = group_index + 1
+                devices = [
+                    {
+                        "device_id": "{:024x}".format(
+                            0x60F5CB1000000 + len(self._devices) + len(groups)
+                        ),
+                        "meta": {"system_number": system_number},
+                        "type": "az_system",
+                        "ws_id": ws_id,
+                    }
+                ]
+                for zone_index in range(self._devices_per_group):
+                    device = {
+                        "device_id": "{:024x}".format(
+                            0x60F5CB2000000 + len(self._devices)
+                        ),
+                        "meta": {
+                            "system_number": system_number,
+                            "zone_number": zone_index + 1,
+                        },
+                        "type": "az_zone",
+                        "ws_id": ws_id,
+                        "name": "Zone {}.{}".format(system_number, zone_index + 1),
+                    }
+                    devices.append(device)
+                    self._devices[device["device_id"]] = device
+                    self._states[device["device_id"]] = self._generate_state(
+                        zone_index == 0
+                    )
+                groups.append(
+                    {
+                        "group_id": "{:024x}".format(
+                            0x60F5CB3000000 + installation_index * 1000 + group_index
+                        ),
+                        "name": "System {}".format(system_number),
+                        "devices": devices,
+                    }
+                )
+            self._groups[installation_id] = groups
+
+    def _generate_state(self, is_master: bool) -> dict:
+        """Generate a device status (the first zone of each group is the master thermostat)"""
+        state = {
+            "isConnected": True,
+            "power": self._random.random() < 0.5,
+            "mode": 3,
+            "mode_available": [2, 3, 4, 5, 0] if is_master else [],
+            "local_temp": self._temperature(round(self._random.uniform(17, 24), 1)),
+            "humidity": self._random.randint(30, 60),
+            "step": {"celsius": 0.5, "fah": 1},
+            "units": 0,
+            "eco_conf": "off",
+            "eco_values": ["off", "manual", "a", "a_p", "a_pp"],
+            "sleep": 0,
+            "sleep_values": [0, 30, 60, 90],
+        }
+        for mode in MODES_CONVERTER.values():
+            state[mode["setpoint_key"]] = self._temperature(20)
+            state[mode["range_key_prefix"] + "min"] = self._temperature(15)
+            state[mode["range_key_prefix"] + "max"] = self._temperature(30)
+        return state
+
+    @staticmethod
+    def _temperature(celsius: float) -> dict:
+        return {"celsius": celsius, "fah": round(celsius * 9 / 5 + 32)}
+
+    def _new_token(self) -> str:
+        """Return a new JWT like token (only its exp claim is meaningful)"""
+        expires_at = int(time.time() + self._token_ttl)
+        payload = base64.urlsafe_b64encode(
+            json.dumps({"exp": expires_at, "n": self._random.random()}).encode()
+        ).decode()
+        token = "mock.{}.signature".format(payload.rstrip("="))
+        with self._lock:
+            self._tokens[token] = expires_at
+        return token
+
+    def _is_authorized(self, authorization: str) -> bool:
+        token = (authorization or "").replace("Bearer ", "", 1)
+        with self._lock:
+            expires_at = self._tokens.get(token)
+        return expires_at is not None and expires_at > time.time()
+
+    def _pop_failure(self, method: str, endpoint: str) -> dict:
+        """Return the failure to apply to a request (None to answer normally)"""
+        with self._lock:
+            for failure in self._failures:
+                if failure["method"] not in (None, method) or failure[
+                    "endpoint"
+                ] not in (
+                    None,
+                    endpoint,
+                ):
+                    continue
+                failure["count"] -= 1
+                if failure["count"] <= 0:
+                    self._failures.remove(failure)
+                return failure
+            if self._error_rate and self._random.random() < self._error_rate:
+                return {"status": self._error_status, "retry_after": None}
+        return None
+
+    def _count(self, method: str, endpoint: str) -> None:
+        key = "{} {}".format(method, endpoint)
+        with self._lock:
+            self._requests_counts[key] = self._requests_counts.get(key, 0) + 1
+
+    def _handle(
+        self, method: str, path: str, query: dict, headers, body: dict
+    ) -> tuple:
+        """Return (status, json data, headers) of a request"""
+        path = path.rstrip("/")
+        if path == "/_mock/stats":
+            return 200, {"requests": self.requests_counts}, {}
+        if path == "/_mock/reset":
+            self.reset_counts()
+            return 200, None, {}
+
+        if not path.startswith("/api/v1/"):
+            return 404, {"msg": "not found"}, {}
+        path = path[len("/api/v1") :]
+        endpoint = re.sub(r"^/(installations|devices)/[^/]+", r"/\1/{id}", path)
+        self._count(method, endpoint)
+
+        if self._latency:
+            time.sleep(self._latency)
+
+        failure = self._pop_failure(method, endpoint)
+        if failure is not None:
+            response_headers = {}
+            if failure.get("retry_after") is not None:
+                response_headers["Retry-After"] = str(failure["retry_after"])
+            return failure["status"], {"msg": "mock error"}, response_headers
+
+        if method == "POST" and endpoint == "/auth/login":
+            if not body or not body.get("email") or not body.get("password"):
+                return 401, {"msg": "invalid credentials"}, {}
+            return 200, {"token": self._new_token()}, {}
+
+        if not self._is_authorized(headers.get("Authorization")):
+            return 401, {"msg": "unauthorized"}, {}
+
+        parts = path.strip("/").split("/")
+        if method == "GET" and endpoint == "/installations":
+            items = int(query.get("items", len(self._installations) or 1))
+            page = int(query.get("page", 0))
+            return (
+                200,
+                {
+                    "installations": self._installations[
+                        page * items : (page + 1) * items
+                    ]
+                },
+                {},
+            )
+        if method == "GET" and endpoint == "/installations/{id}":
+            if parts[1] not in self._groups:
+                return 404, {"msg": "installation not found"}, {}
+            with self._lock:
+                groups = json.loads(json.dumps(self._groups[parts[1]]))
+            return 200, {"groups": groups}, {}
+        if parts[0] == "devices" and parts[1] not in self._states:
+            return 404, {"msg": "device not found"}, {}
+        if method == "GET" and endpoint == "/devices/{id}/status":
+            with self._lock:
+                return 200, json.loads(json.dumps(self._states[parts[1]])), {}
+        if method == "GET" and endpoint == "/devices/{id}/config":
+            return 200, self._config(parts[1], query.get("type", "all")), {}
+        if method == "PATCH" and endpoint == "/devices/{id}":
+            if not body or "param" not in body:
+                return 400, {"msg": "param required"}, {}
+            if self._apply_delay:
+                timer = threading.Timer(
+                    self._apply_delay,
+                    self._apply,
+                    (parts[1], body["param"], body.get("value")),
+                )
+                timer.daemon = True
+                timer.start()
+            else:
+                self._apply(parts[1], body["param"], body.get("value"))
+            return 200, None, {}
+        return 404, {"msg": "not found"}, {}
+
+    def _apply(self, device_id: str, param: str, value) -> None:
+        """Apply a device command to its status, then push changes to realtime channel clients"""
+        with self._lock:
+            state = self._states[device_id]
+            if param == "setpoint":
+                mode = MODES_CONVERTER.get(str(state.get("mode")), {})
+                key = mode.get("setpoint_key", "setpoint_air_heat")
+                state[key] = self._temperature(float(value))
+                patches = {device_id: {key: state[key]}}
+            elif param == "mode" and state.get("mode_available"):
+                # zones of a system follow the mode of its master thermostat
+                device = self._devices[device_id]
+                patches = {}
+                for other_id, other in self._devices.items():
+                    if (other["ws_id"], other["meta"]["system_number"]) == (
+                        device["ws_id"],
+                        device["meta"]["system_number"],
+                    ):
+                        self._states[other_id]["mode"] = value
+                        patches[other_id] = {"mode": value}
+            else:
+                state[param] = value
+                patches = {device_id: {param: value}}
+        self._push_updates(patches)
+
+    def _push_updates(self, patches: "dict[str, dict]") -> None:
+        """Send devices status patches to realtime channel clients listening their installation"""
+        with self._lock:
+            websockets = list(self._websockets)
+            installations_ids = dict(
+                (device["device_id"], installation_id)
+                for installation_id, groups in self._groups.items()
+                for group in groups
+                for device in group["devices"]
+                if device["device_id"] in patches
+            )
+        for device_id, status in patches.items():
+            message = "42" + json.dumps(
+                [
+                    WEBSOCKET_UPDATE_EVENTS[0],
+                    {"device_id": device_id, "change": {"status": status}},
+                ]
+            )
+            for websocket in websockets:
+                if installations_ids.get(device_id) in websocket.installations:
+                    websocket.send(message)
+
+    def _serve_websocket(self, handler: "_MockHandler") -> None:
+        """Serve a realtime channel connection until closed (engine.io v3 packets in websocket text frames)"""
+        self._count("GET", "/websockets")
+        if not self._is_authorized(handler.headers.get("Authorization")):
+            handler._send(401, {"msg": "unauthorized"}, {})
+            return
+        accept = base64.b64encode(
+            hashlib.sha1(
+                (
+                    handler.headers.get("Sec-WebSocket-Key", "") + _WEBSOCKET_GUID
+                ).encode()
+            ).digest()
+        ).decode()
+        handler.send_response(101)
+        handler.send_header("Upgrade", "websocket")
+        handler.send_header("Connection", "Upgrade")
+        handler.send_header("Sec-WebSocket-Accept", accept)
+        handler.end_headers()
+        handler.close_connection = True
+
+        websocket = _MockWebsocket(handler.connection, handler.rfile, handler.wfile)
+        websocket.send(
+            "0"
+            + json.dumps(
+                {
+                    "sid": "{:x}".format(self._random.getrandbits(64)),
+                    "upgrades": [],
+                    "pingInterval": int(self._ping_interval * 1000),
+                    "pingTimeout": int(self._ping_timeout * 1000),
+                }
+            )
+        )
+        with self._lock:
+            self._websockets.append(websocket)
+        # a client not pinging in time is disconnected, like by AirzoneCloud
+        handler.connection.settimeout(self._ping_interval + self._ping_timeout)
+        try:
+            while True:
+                message = websocket.recv()
+                if message is None:
+                    break
+                if message == "2":
+                    self._count("WS", "ping")
+                    websocket.send("3")
+                elif message.startswith("42"):
+                    event = json.loads(message[2:])
+                    if event[0] == WEBSOCKET_LISTEN_EVENT:
+                        websocket.installations.add(event[1])
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self._lock:
+                self._websockets.remove(websocket)
+            websocket.close()
+
+    def _config(self, device_id: str, type: str) -> dict:
+        """Return a device config"""
+        device = self._devices[device_id]
+        config = {
+            "ws_id": device["ws_id"],
+            "system_number": device["meta"]["system_number"],
+            "zone_number": device["meta"]["zone_number"],
+            "name": device["name"],
+            "firmware": "3.44",
+            "units": 0,
+            "timezoneId": "Europe/Paris",
+        }
+        if type == "all":
+            config.update(
+                {
+                    "antifreeze": False,
+                    "master_conf": {"mode": 3},
+                    "zone_sched_available": True,
+                    "slats_vswing": False,
+                }
+            )
+        return config
+
+
+class _MockWebsocket:
+    """Server side of a websocket connection (text messages only)"""
+
+    installations: "set[str]" = set()
+    _connection: socket.socket = None
+    _rfile = None
+    _wfile = None
+    _lock: threading.Lock = None
+    _closed: bool = False
+
+    def __init__(self, connection: socket.socket, rfile, wfile) -> None:
+        self.installations = set()
+        self._connection = connection
+        self._rfile = rfile
+        self._wfile = wfile
+        self._lock = threading.Lock()
+
+    def recv(self) -> str:
+        """Return next text message (None once closed by the client)"""
+        while True:
+            header = self._rfile.read(2)
+            if len(header) < 2:
+                return None
+            opcode = header[0] & 0x0F
+            length = header[1] & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", self._rfile.read(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", self._rfile.read(8))[0]
+            # client frames are masked
+            mask = self._rfile.read(4) if header[1] & 0x80 else b"\0\0\0\0"
+            payload = bytes(
+                byte ^ mask[index % 4]
+                for index, byte in enumerate(self._rfile.read(length))
+            )
+            if opcode == 0x8:  # close
+                return None
+            if opcode == 0x9:  # ping
+                self._send_frame(0xA, payload)
+            elif opcode == 0x1:  # text
+                return payload.decode()
+
+    def send(self, message: str) -> None:
+        """Send a text message (ignored once closed)"""
+        try:
+            self._send_frame(0x1, message.encode())
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        """Send a close frame and shut the connection down"""
+        try:
+            self._send_frame(0x8, b"")
+        except OSError:
+            pass
+        with self._lock:
+            self._closed = True
+        try:
+            self._connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _send_frame(self, opcode: int, payload: bytes) -> None:
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 65536:
+            header += bytes([126]) + struct.pack("!H", len(payload))
+        else:
+            header += bytes([127]) + struct.pack("!Q", len(payload))
+        with self._lock:
+            if self._closed:
+                return
+            self._wfile.write(header + payload)
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """Http handler forwarding requests to MockServer._handle()"""
+
+    protocol_version = "HTTP/1.1"
+    # headers & body are written separately: don't wait for delayed acks
+    disable_nagle_algorithm = True
+    mock: MockServer = None
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.headers.get("Upgrade", "").lower() == "websocket":
+            self.mock._serve_websocket(self)
+            return
+        self._respond("GET")
+
+    def do_POST(self) -> None:
+        self._respond("POST")
+
+    def do_PUT(self) -> None:
+        self._respond("PUT")
+
+    def do_PATCH(self) -> None:
+        self._respond("PATCH")
+
+    def _respond(self, method: str) -> None:
+        url = urllib.parse.urlparse(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        body = None
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length))
+            except ValueError:
+                body = None
+
+        status, data, headers = self.mock._handle(
+            method, url.path, query, self.headers, body
+        )
+        self._send(status, data, headers)
+
+    def _send(self, status: int, data, headers: dict) -> None:
+        content = json.dumps(data).encode() if data is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local AirzoneCloud mock server")
+    parser.add_argument("--installations", type=int, default=1)
+    parser.add_argument("--groups-per-installation", type=int, default=1)
+    parser.add_argument("--devices-per-group", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--apply-delay", type=float, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+
+    mock_server = MockServer(
+        installations=args.installations,
+        groups_per_installation=args.groups_per_installation,
+        devices_per_group=args.devices_per_group,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        apply_delay=args.apply_delay,
+        host=args.host,
+        port=args.port,
+    ).start()
+    print(mock_server.url, flush=True)
+    try:
+        mock_server._thread.join()
+    except KeyboardInterrupt:
+        mock_server.stop()
@@ -0,0 +1,55 @@
+import logging
+from typing import Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Observable:
+    """Let callers subscribe to devices changes of an object and of its children
+
+    Changes of a device are notified to the listeners of the device, then of its
+    group, its installation and its api.
+    """
+
+    _listeners: "tuple[Callable]" = ()
+
+    def subscribe(self, callback: "Callable[[list[Change]], None]") -> Callable:
+        """Call callback(changes) with the list of fields changed on each device refresh, return a function to unsubscribe"""
+        self._listeners = self._listeners + (callback,)
+
+        def unsubscribe() -> None:
+            self._listeners = tuple(
+                listener for listener in self._listeners if listener is not callback
+            )
+
+        return unsubscribe
+
+    #
+    # private
+    #
+
+    def _get_observable_parent(self) -> "Observable":
+        """Return the object notified after this one (None for the api)"""
+        return None
+
+    def _has_listeners(self) -> bool:
+        """Return True if this object or one of its parents has listeners"""
+        observable = self
+        while observable is not None:
+            if observable._listeners:
+                return True
+            observable = observable._get_observable_parent()
+        return False
+
+    def _notify(self, changes: "list[Change]") -> None:
+        """Call listeners of this object then of its parents (errors are only logged)"""
+        observable = self
+        while observable is not None:
+            for listener in observable._listeners:
+                try:
+                    listener(changes)
+                except Exception as err:
+                    _LOGGER.error(
+                        "Error in changes listener %s : %s", listener, repr(err)
+                    )
+            observable = observable._get_observable_parent()
@@ -0,0 +1,290 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Union
+
+from .AirzoneCloud import AirzoneCloud
+from .AirzoneCloudPool import AirzoneCloudPool
+from .Device import Device
+from .RateLimiter import RateLimiter
+from .constants import (
+    POLL_ACTIVE_PERIOD,
+    POLL_BASE_INTERVAL,
+    POLL_FAST_INTERVAL,
+    POLL_IDLE_INTERVAL,
+    POLL_OFF_INTERVAL,
+    POLL_OFFLINE_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """Poll devices states in background, each at a rate depending on its activity
+
+    A device is polled every fast_interval during active_period after a command
+    or a detected change. Otherwise its interval is doubled after each poll, from
+    base_interval up to idle_interval (off_interval if the device is off,
+    offline_interval if it is disconnected). Polls are spread with jitter and
+    limited to requests_per_minute for all devices.
+    """
+
+    _api: "Union[AirzoneCloud, AirzoneCloudPool]" = None
+    _devices_ids: "set[str]" = None
+    _requests_per_minute: float = None
+    _fast_interval: float = POLL_FAST_INTERVAL
+    _active_period: float = POLL_ACTIVE_PERIOD
+    _base_interval: float = POLL_BASE_INTERVAL
+    _idle_interval: float = POLL_IDLE_INTERVAL
+    _off_interval: float = POLL_OFF_INTERVAL
+    _offline_interval: float = POLL_OFFLINE_INTERVAL
+    _jitter: float = 0.1
+    _max_workers: int = 4
+    _entries: "dict[str, dict]" = {}
+    _heap: "list[tuple]" = []
+    _sequence: "itertools.count" = None
+    _condition: threading.Condition = None
+    _rate_limiter: RateLimiter = None
+    _executor: ThreadPoolExecutor = None
+    _thread: threading.Thread = None
+    _running: bool = False
+    _stats: "dict[str, int]" = {}
+
+    def __init__(
+        self,
+        api: "Union[AirzoneCloud, AirzoneCloudPool]",
+        requests_per_minute: float = None,
+        devices: "Iterable[Union[Device, str]]" = None,
+        fast_interval: float = POLL_FAST_INTERVAL,
+        active_period: float = POLL_ACTIVE_PERIOD,
+        base_interval: float = POLL_BASE_INTERVAL,
+        idle_interval: float = POLL_IDLE_INTERVAL,
+        off_interval: float = POLL_OFF_INTERVAL,
+        offline_interval: float = POLL_OFFLINE_INTERVAL,
+        jitter: float = 0.1,
+        max_workers: int = 4,
+    ) -> None:
+        """Initialize scheduler (call start() to poll)
+
+        api: AirzoneCloud or AirzoneCloudPool whose devices are polled
+        requests_per_minute: maximum polls per minute for all devices (None for no
+        limit), polls due first are sent first when the budget is exceeded
+        devices: only poll these devices (or ids) of the api, default to all
+        fast_interval: seconds between polls of an active device
+        active_period: seconds during which a device stays active after a command
+        or a change
+        base_interval: first interval of an inactive device, doubled after each
+        poll up to idle_interval, off_interval or offline_interval
+        jitter: random part (0-1) of each interval, to avoid polls bursts
+        max_workers: maximum number of polls at the same time
+        """
+        self._api = api
+        if devices is not None:
+            self._devices_ids = set(
+                device if isinstance(device, str) else device.id for device in devices
+            )
+        self._requests_per_minute = requests_per_minute
+        self._fast_interval = fast_interval
+        self._active_period = active_period
+        self._base_interval = max(base_interval, fast_interval)
+        self._idle_interval = max(idle_interval, self._base_interval)
+        self._off_interval = max(off_interval, self._base_interval)
+        self._offline_interval = max(offline_interval, self._base_interval)
+        self._jitter = min(max(jitter, 0), 1)
+        self._max_workers = max(1, int(max_workers))
+        self._entries = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        if requests_per_minute:
+            self._rate_limiter = RateLimiter(requests_per_minute / 60.0, 1)
+        self._stats = {"polls": 0, "changes": 0, "errors": 0}
+
+    def __enter__(self) -> "PollScheduler":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> "PollScheduler":
+        """Start polling devices of the api in background"""
+        with self._condition:
+            if self._running:
+                return self
+            self._running = True
+        self.sync_devices()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="PollScheduler"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="PollScheduler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop polling (waiting for polls in progress)"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+        for entry in self._entries.values():
+            if entry["device"]._api._poll_scheduler is self:
+                entry["device"]._api._poll_scheduler = None
+
+    #
+    # devices
+    #
+
+    def sync_devices(self) -> "PollScheduler":
+        """Poll devices added to the api since start() and forget removed ones"""
+        devices = [
+            device
+            for device in self._api.iter_devices()
+            if self._devices_ids is None or device.id in self._devices_ids
+        ]
+        now = time.monotonic()
+        with self._condition:
+            previous_entries, self._entries = self._entries, {}
+            for device in devices:
+                entry = previous_entries.get(device.id)
+                if entry is None or entry["device"] is not device:
+                    entry = {
+                        "device": device,
+                        "interval": self._base_interval,
+                        "active_until": 0.0,
+                        "version": 0,
+                        "polling": False,
+                    }
+                    # first polls spread over base_interval
+                    self._schedule(entry, now + random.uniform(0, self._base_interval))
+                self._entries[device.id] = entry
+                device._api._poll_scheduler = self
+            self._condition.notify_all()
+        return self
+
+    def poke(self, device: Device, delay: float = None) -> "PollScheduler":
+        """Make a device active and poll it after delay (default to fast_interval), called on each command"""
+        if delay is None:
+            delay = self._fast_interval
+        now = time.monotonic()
+        with self._condition:
+            entry = self._entries.get(device.id)
+            if entry is None:
+                return self
+            entry["active_until"] = now + delay + self._active_period
+            entry["interval"] = self._fast_interval
+            # a device being polled is rescheduled (as active) when its poll ends
+            if not entry["polling"] and entry["due"] > now + delay:
+                self._schedule(entry, now + delay)
+                self._condition.notify_all()
+        return self
+
+    #
+    # getters
+    #
+
+    def get_interval(self, device: Device) -> float:
+        """Return current seconds between polls of a device (None if not polled)"""
+        entry = self._entries.get(device.id)
+        return entry["interval"] if entry is not None else None
+
+    @property
+    def stats(self) -> "dict[str, int]":
+        """Return polls, changes detected & errors counters"""
+        with self._condition:
+            return dict(self._stats)
+
+    #
+    # private
+    #
+
+    def _schedule(self, entry: dict, due: float) -> None:
+        """(Re)schedule a device poll (condition must be held)"""
+        entry["version"] += 1
+        entry["due"] = due
+        heapq.heappush(
+            self._heap,
+            (due, next(self._sequence), entry["device"].id, entry["version"]),
+        )
+
+    def _run(self) -> None:
+        """Submit polls when due (scheduler thread)"""
+        while True:
+            with self._condition:
+                entry = None
+                while self._running and entry is None:
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    due, _, device_id, version = self._heap[0]
+                    wait = due - time.monotonic()
+                    if wait > 0:
+                        self._condition.wait(wait)
+                        continue
+                    heapq.heappop(self._heap)
+                    entry = self._entries.get(device_id)
+                    # outdated item: device removed or rescheduled since
+                    if entry is None or entry["version"] != version:
+                        entry = None
+                if not self._running:
+                    return
+                entry["polling"] = True
+
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+            self._executor.submit(self._poll, entry)
+
+    def _poll(self, entry: dict) -> None:
+        """Refresh a device state and schedule its next poll (executor threads)"""
+        device = entry["device"]
+        previous_state = device._state
+        error = None
+        try:
+            device.refresh(force=True)
+        except Exception as err:
+            error = err
+            _LOGGER.warning("Unable to poll %s : %s", device._str_log, repr(err))
+        # the state object is only replaced when a value changed
+        changed = (
+            error is None
+            and previous_state is not None
+            and device._state is not previous_state
+        )
+
+        now = time.monotonic()
+        with self._condition:
+            self._stats["polls"] += 1
+            if changed:
+                self._stats["changes"] += 1
+            if error is not None:
+                self._stats["errors"] += 1
+            entry["polling"] = False
+
+            if changed:
+                entry["active_until"] = now + self._active_period
+            if now < entry["active_until"]:
+                interval = self._fast_interval
+            else:
+                if error is not None or not device._state.is_connected:
+                    ceiling = self._offline_interval
+                elif not device._state.is_on:
+                    ceiling = self._off_interval
+                else:
+                    ceiling = self._idle_interval
+                interval = min(max(entry["interval"] * 2, self._base_interval), ceiling)
+            entry["interval"] = interval
+
+            if self._entries.get(device.id) is entry:
+                self._schedule(
+                    entry,
+                    now + interval * random.uniform(1 - self._jitter, 1 + self._jitter),
+                )
+                self._condition.notify_all()
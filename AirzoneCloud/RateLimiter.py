@@ -0,0 +1,52 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket limiting requests rate (thread safe)
+
+    rate: requests allowed per second in average
+    burst: maximum number of requests allowed at once (default to max(1, rate))
+    """
+
+    _rate: float = 1
+    _burst: float = 1
+    _tokens: float = 1
+    _updated_at: float = None
+    _lock: threading.Lock = None
+
+    def __init__(self, rate: float, burst: float = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self._rate = float(rate)
+        self._burst = float(burst) if burst is not None else max(1.0, self._rate)
+        self._tokens = self._burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return "RateLimiter(rate={}, burst={})".format(self._rate, self._burst)
+
+    @property
+    def rate(self) -> float:
+        """Return allowed requests per second"""
+        return self._rate
+
+    def acquire(self) -> float:
+        """Wait until a request is allowed, return seconds waited"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def reserve(self) -> float:
+        """Reserve a request without waiting, return seconds to wait before sending it (like with asyncio.sleep())"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._updated_at) * self._rate
+            )
+            self._updated_at = now
+            # reserve a token (may be negative: next callers will wait longer)
+            self._tokens -= 1
+            return -self._tokens / self._rate if self._tokens < 0 else 0.0
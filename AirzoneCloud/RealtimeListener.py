@@ -0,0 +1,236 @@
+import json
+import logging
+import socket
+import threading
+import time
+from typing import Callable
+
+from .constants import (
+    WEBSOCKET_URL,
+    WEBSOCKET_LISTEN_EVENT,
+    WEBSOCKET_UPDATE_EVENTS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RealtimeListener:
+    """Keep devices states up to date with the AirzoneCloud realtime channel (requires websocket-client)
+
+    The channel is the socket.io websocket used by the Airzone web app: each
+    pushed update patches the state of the matching device in place. While the
+    channel is disconnected, devices are refreshed every poll_interval seconds
+    and the connection is retried with an exponential backoff.
+    """
+
+    _api: "AirzoneCloud" = None
+    _url: str = WEBSOCKET_URL
+    _poll_interval: float = 30.0
+    _reconnect_delay: float = 1.0
+    _max_reconnect_delay: float = 60.0
+    _connection_factory: Callable = None
+    _connection = None
+    _thread: threading.Thread = None
+    _stop_event: threading.Event = None
+    _connected: bool = False
+    _ping_interval: float = 25.0
+    _devices: "dict[str, Device]" = {}
+
+    def __init__(
+        self,
+        api: "AirzoneCloud",
+        poll_interval: float = 30.0,
+        url: str = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 60.0,
+        connection_factory: Callable = None,
+    ) -> None:
+        """Initialize listener (call start() to connect)
+
+        poll_interval: seconds between devices refresh while disconnected
+        url: websocket url (to connect to another server, like a local one for tests)
+        connection_factory: callable(url, header=[...]) returning a connected websocket
+        (default to websocket.create_connection)
+        """
+        self._api = api
+        self._poll_interval = poll_interval
+        if url is not None:
+            self._url = url
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._connection_factory = connection_factory
+        self._stop_event = threading.Event()
+
+    def __enter__(self) -> "RealtimeListener":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    #
+    # getters
+    #
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if updates are currently pushed by the realtime channel"""
+        return self._connected
+
+    #
+    # start / stop
+    #
+
+    def start(self) -> "RealtimeListener":
+        """Start listening in a background thread"""
+        if self._connection_factory is None:
+            try:
+                import websocket
+            except ImportError:
+                raise ImportError(
+                    "websocket-client is required by RealtimeListener: pip3 install AirzoneCloud[realtime]"
+                ) from None
+            self._connection_factory = websocket.create_connection
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="AirzoneCloudRealtime", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> "RealtimeListener":
+        """Stop listening and close the connection"""
+        self._stop_event.set()
+        self._close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        return self
+
+    #
+    # private
+    #
+
+    def _run(self) -> None:
+        """Listen until stopped, polling devices while disconnected"""
+        delay = self._reconnect_delay
+        while not self._stop_event.is_set():
+            try:
+                self._connect()
+                delay = self._reconnect_delay
+                self._listen()
+            except Exception as err:
+                # errors of a connection closed by stop() aren't disconnections
+                if self._stop_event.is_set():
+                    break
+                _LOGGER.warning(
+                    "Realtime channel disconnected (%s), polling devices every %ss",
+                    repr(err),
+                    self._poll_interval,
+                )
+            finally:
+                self._connected = False
+                self._close()
+
+            # fallback: poll devices until reconnection
+            next_try = time.monotonic() + delay
+            while not self._stop_event.is_set():
+                self._poll()
+                wait = min(self._poll_interval, next_try - time.monotonic())
+                if wait <= 0 or self._stop_event.wait(wait):
+                    break
+            delay = min(delay * 2, self._max_reconnect_delay)
+
+    def _connect(self) -> None:
+        """Open the websocket, wait socket.io handshake and listen installations"""
+        url = "{}{}EIO=3&transport=websocket".format(
+            self._url, "&" if "?" in self._url else "?"
+        )
+        self._connection = self._connection_factory(
+            url, header=["Authorization: Bearer {}".format(self._api._get_token())]
+        )
+
+        # engine.io open packet: 0{"sid": ..., "pingInterval": ..., ...}
+        packet = self._connection.recv()
+        if not packet.startswith("0"):
+            raise Exception("Unexpected realtime handshake : {}".format(packet))
+        handshake = json.loads(packet[1:] or "{}")
+        self._ping_interval = handshake.get("pingInterval", 25000) / 1000
+        self._connection.settimeout(self._ping_interval)
+
+        for installation in self._api.iter_installations():
+            self._emit(WEBSOCKET_LISTEN_EVENT, installation.id)
+        self._devices = dict((device.id, device) for device in self._api.iter_devices())
+
+        self._connected = True
+        _LOGGER.info("Realtime channel connected to %s", self._url)
+
+    def _listen(self) -> None:
+        """Read packets until the connection is closed, pinging every ping interval"""
+        next_ping = time.monotonic() + self._ping_interval
+        while not self._stop_event.is_set():
+            # engine.io v3 client ping, also sent while updates keep coming
+            now = time.monotonic()
+            if now >= next_ping:
+                self._connection.send("2")
+                next_ping = now + self._ping_interval
+            self._connection.settimeout(next_ping - now)
+            try:
+                packet = self._connection.recv()
+            except Exception as err:
+                if not self._is_timeout(err):
+                    raise
+                continue
+            if not packet:
+                raise Exception("connection closed")
+            self._on_packet(packet)
+
+    def _on_packet(self, packet: str) -> None:
+        """Handle an engine.io / socket.io packet"""
+        if packet == "2":  # server ping (engine.io v4)
+            self._connection.send("3")
+        elif packet.startswith("41") or packet.startswith("1"):
+            raise Exception("closed by server")
+        elif packet.startswith("42"):
+            event = json.loads(packet[2:])
+            if len(event) >= 2 and event[0] in WEBSOCKET_UPDATE_EVENTS:
+                self._on_update(event[1])
+
+    def _on_update(self, data: dict) -> None:
+        """Patch the state of the device targeted by a pushed update"""
+        if not isinstance(data, dict):
+            return
+        change = data.get("change", data)
+        patch = change.get("status", change.get("state"))
+        if not isinstance(patch, dict):
+            return
+        device = self._devices.get(data.get("device_id"))
+        if device is not None:
+            _LOGGER.debug("Realtime update for %s : %s", device.id, patch)
+            device._patch_state(patch)
+
+    def _emit(self, event: str, data) -> None:
+        """Send a socket.io event"""
+        self._connection.send("42" + json.dumps([event, data]))
+
+    def _poll(self) -> None:
+        """Refresh all devices (errors are only logged)"""
+        try:
+            self._api.refresh_all_devices()
+        except Exception as err:
+            _LOGGER.error("Unable to poll devices : %s", repr(err))
+
+    def _close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _is_timeout(err: Exception) -> bool:
+        return isinstance(err, (socket.timeout, TimeoutError)) or (
+            type(err).__name__ == "WebSocketTimeoutException"
+        )
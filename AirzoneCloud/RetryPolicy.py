@@ -0,0 +1,98 @@
+import random
+import time
+
+# methods which can be sent twice without side effect
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+class RetryPolicy:
+    """Define which failed requests are retried and how long to wait before
+
+    - 429 (too many requests) is retried for all methods (the request was rejected)
+    - other retry_statuses and timeouts are only retried for idempotent methods
+    (GET, PUT, ...), unless retry_non_idempotent is True (PATCH, POST)
+    - delay before retry n is random between 0 and backoff_factor * 2^n (full
+    jitter, capped to max_backoff), or the Retry-After header if given
+    """
+
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+    max_backoff: float = 30
+    retry_statuses: "tuple[int]" = (429, 500, 502, 503, 504)
+    retry_non_idempotent: bool = False
+    max_retry_after: float = 120
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30,
+        retry_statuses: "tuple[int]" = (429, 500, 502, 503, 504),
+        retry_non_idempotent: bool = False,
+        max_retry_after: float = 120,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = tuple(retry_statuses)
+        self.retry_non_idempotent = retry_non_idempotent
+        self.max_retry_after = max_retry_after
+
+    def __repr__(self) -> str:
+        return "RetryPolicy(max_retries={}, backoff_factor={}, max_backoff={}, retry_statuses={}, retry_non_idempotent={})".format(
+            self.max_retries,
+            self.backoff_factor,
+            self.max_backoff,
+            self.retry_statuses,
+            self.retry_non_idempotent,
+        )
+
+    def should_retry(
+        self,
+        method: str,
+        attempt: int,
+        status_code: int = None,
+        request_sent: bool = True,
+    ) -> bool:
+        """Return True if a request should be retried
+
+        attempt: number of retries already done (0 after the first call)
+        status_code: http status received (None if no response was received)
+        request_sent: False if the connection failed before sending the request
+        """
+        if attempt >= self.max_retries:
+            return False
+        if status_code == 429 or not request_sent:
+            return True
+        if status_code is not None and status_code not in self.retry_statuses:
+            return False
+        return self.retry_non_idempotent or method.upper() in IDEMPOTENT_METHODS
+
+    def get_delay(self, attempt: int, retry_after: str = None) -> float:
+        """Return seconds to wait before a retry (attempt: retries already done)"""
+        delay = self._parse_retry_after(retry_after)
+        if delay is not None:
+            return min(delay, self.max_retry_after)
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff_factor * (2**attempt))
+        )
+
+    @staticmethod
+    def _parse_retry_after(retry_after: str) -> float:
+        """Return seconds from a Retry-After header (seconds or http date), None if invalid"""
+        if not retry_after:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        # http dates are rare: email is only imported to parse them
+        import email.utils
+
+        try:
+            date = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        if date is None:
+            return None
+        return max(0.0, date.timestamp() - time.time())
@@ -0,0 +1,306 @@
+import threading
+import time
+from typing import Iterable, Union
+
+from .AirzoneCloud import AirzoneCloud
+from .AirzoneCloudPool import AirzoneCloudPool
+from .Device import Device
+from .DeviceState import DeviceState
+from .constants import TELEMETRY_CAPACITY, TELEMETRY_METRICS
+
+try:
+    import numpy
+except ImportError:  # optional dependency, required when a recorder is created
+    numpy = None
+
+
+class TelemetryRecorder:
+    """Keep the last readings of devices states in memory (thread safe)
+
+    Each device gets a row of fixed capacity ring buffers (one numpy column per
+    metric of TELEMETRY_METRICS, plus timestamps), filled on each refresh of the
+    devices of attached apis. Memory is preallocated: capacity x (8 + 4 x
+    metrics) bytes by device. Queries and aggregates are computed on all
+    devices at once.
+    """
+
+    _capacity: int = TELEMETRY_CAPACITY
+    _metrics: "tuple[str]" = TELEMETRY_METRICS
+    _rows: "dict[str, int]" = {}
+    _times: "numpy.ndarray" = None
+    _columns: "dict[str, numpy.ndarray]" = {}
+    _positions: "numpy.ndarray" = None
+    _apis: "list[AirzoneCloud]" = []
+    _lock: threading.Lock = None
+
+    def __init__(
+        self,
+        api: "Union[AirzoneCloud, AirzoneCloudPool]" = None,
+        capacity: int = TELEMETRY_CAPACITY,
+        metrics: "tuple[str]" = TELEMETRY_METRICS,
+        devices: int = 64,
+    ) -> None:
+        """Initialize recorder
+
+        api: optional api (or pool) whose devices states are recorded (see attach())
+        capacity: readings kept by device (oldest ones are overwritten)
+        metrics: DeviceState values recorded (default to TELEMETRY_METRICS)
+        devices: number of devices rows allocated at first (doubled when needed)
+        """
+        if numpy is None:
+            raise ImportError(
+                "numpy is required by TelemetryRecorder: pip3 install AirzoneCloud[telemetry]"
+            )
+        unknown = set(metrics) - set(DeviceState.__slots__)
+        if unknown:
+            raise ValueError("Unknown metrics {}".format(sorted(unknown)))
+        self._capacity = max(1, int(capacity))
+        self._metrics = tuple(metrics)
+        self._rows = {}
+        self._times = numpy.full((max(1, devices), self._capacity), numpy.nan)
+        self._columns = dict(
+            (
+                metric,
+                numpy.full((max(1, devices), self._capacity), numpy.nan, "float32"),
+            )
+            for metric in self._metrics
+        )
+        self._positions = numpy.zeros(max(1, devices), "int64")
+        self._apis = []
+        self._lock = threading.Lock()
+        if api is not None:
+            self.attach(api)
+
+    #
+    # record
+    #
+
+    def attach(
+        self, api: "Union[AirzoneCloud, AirzoneCloudPool]"
+    ) -> "TelemetryRecorder":
+        """Record each state of the devices of an api (or of the accounts already in a pool)"""
+        apis = (
+            list(api.accounts.values()) if isinstance(api, AirzoneCloudPool) else [api]
+        )
+        for account in apis:
+            if self not in account._state_recorders:
+                account._state_recorders = account._state_recorders + (self,)
+                self._apis.append(account)
+        return self
+
+    def detach(self) -> "TelemetryRecorder":
+        """Stop recording states of attached apis"""
+        apis, self._apis = self._apis, []
+        for api in apis:
+            api._state_recorders = tuple(
+                recorder for recorder in api._state_recorders if recorder is not self
+            )
+        return self
+
+    def record(
+        self, device: Device, state: DeviceState = None, timestamp: float = None
+    ) -> None:
+        """Append a reading of a device (default to its current state, now)"""
+        if state is None:
+            state = device._state
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            row = self._rows.get(device.id)
+            if row is None:
+                row = self._add_row(device.id)
+            column = self._positions[row] % self._capacity
+            self._times[row, column] = timestamp
+            for metric, values in self._columns.items():
+                values[row, column] = getattr(state, metric)
+            self._positions[row] += 1
+
+    #
+    # getters
+    #
+
+    @property
+    def capacity(self) -> int:
+        """Return readings kept by device"""
+        return self._capacity
+
+    @property
+    def metrics(self) -> "tuple[str]":
+        """Return recorded metrics"""
+        return self._metrics
+
+    @property
+    def device_ids(self) -> "list[str]":
+        """Return ids of recorded devices"""
+        with self._lock:
+            return list(self._rows)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Return bytes allocated by buffers"""
+        with self._lock:
+            return (
+                self._times.nbytes
+                + self._positions.nbytes
+                + sum(values.nbytes for values in self._columns.values())
+            )
+
+    #
+    # queries
+    #
+
+    def get_series(
+        self, device: "Union[Device, str]", start: float = None, end: float = None
+    ) -> "dict[str, numpy.ndarray]":
+        """Return readings of a device between start & end timestamps, oldest first
+
+        {"time": array([...]), "current_temperature": array([...]), ...}
+        """
+        device_id = device if isinstance(device, str) else device.id
+        with self._lock:
+            row = self._rows.get(device_id)
+            if row is None:
+                return dict(
+                    [("time", numpy.empty(0))]
+                    + [(metric, numpy.empty(0, "float32")) for metric in self._metrics]
+                )
+            # rotate ring buffer from its oldest reading
+            order = numpy.roll(
+                numpy.arange(self._capacity), -(self._positions[row] % self._capacity)
+            )
+            times = self._times[row, order]
+            mask = self._get_mask(times, start, end)
+            series = {"time": times[mask]}
+            for metric, values in self._columns.items():
+                series[metric] = values[row, order][mask]
+        return series
+
+    def aggregate(
+        self,
+        metric: str,
+        start: float = None,
+        end: float = None,
+        devices: "Iterable[Union[Device, str]]" = None,
+    ) -> "dict[str, dict[str, float]]":
+        """Return min, max, mean & count of a metric between start & end by device id (all devices by default)"""
+        device_ids, times, values = self._select(metric, devices)
+        mask = self._get_mask(times, start, end)
+        counts = mask.sum(axis=1)
+        masked = numpy.where(mask, values, numpy.nan)
+        # fmin/fmax ignore nan (rows without readings give nan)
+        with numpy.errstate(invalid="ignore"):
+            sums = numpy.nansum(masked, axis=1, dtype="float64")
+            minimums = numpy.where(
+                counts > 0, numpy.fmin.reduce(masked, axis=1), numpy.nan
+            )
+            maximums = numpy.where(
+                counts > 0, numpy.fmax.reduce(masked, axis=1), numpy.nan
+            )
+            means = numpy.where(counts > 0, sums / numpy.maximum(counts, 1), numpy.nan)
+        return dict(
+            (
+                device_id,
+                {
+                    "min": float(minimums[index]),
+                    "max": float(maximums[index]),
+                    "mean": float(means[index]),
+                    "count": int(counts[index]),
+                },
+            )
+            for index, device_id in enumerate(device_ids)
+        )
+
+    def resample(
+        self,
+        metric: str,
+        period: float,
+        start: float,
+        end: float = None,
+        devices: "Iterable[Union[Device, str]]" = None,
+    ) -> "tuple[list[str], numpy.ndarray, numpy.ndarray]":
+        """Return mean of a metric by period (seconds) between start & end, for each device
+
+        Returns (device_ids, periods_starts, means) where means[i][j] is the mean of
+        device_ids[i] during the period starting at periods_starts[j] (nan if no
+        reading).
+        """
+        if period <= 0:
+            raise ValueError("period must be positive")
+        if end is None:
+            end = time.time()
+        device_ids, times, values = self._select(metric, devices)
+        periods_count = max(1, int(numpy.ceil((end - start) / period)))
+        mask = self._get_mask(times, start, end)
+        # one more bucket by device collects readings out of range
+        buckets_count = periods_count + 1
+        buckets = numpy.where(mask, (times - start) // period, periods_count)
+        buckets += numpy.arange(len(device_ids))[:, None] * buckets_count
+        buckets = buckets.astype("int64").ravel()
+        size = len(device_ids) * buckets_count
+        sums = numpy.bincount(
+            buckets, numpy.where(mask, values, 0).ravel(), minlength=size
+        )
+        counts = numpy.bincount(buckets, minlength=size)
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            means = numpy.where(counts > 0, sums / counts, numpy.nan)
+        means = means.reshape(len(device_ids), buckets_count)[:, :periods_count]
+        return (
+            device_ids,
+            start + numpy.arange(periods_count) * period,
+            means,
+        )
+
+    #
+    # private
+    #
+
+    def _add_row(self, device_id: str) -> int:
+        """Allocate a row for a new device, doubling buffers if full (lock must be held)"""
+        row = len(self._rows)
+        if row >= len(self._positions):
+            grow = len(self._positions)
+            self._times = numpy.vstack(
+                (self._times, numpy.full((grow, self._capacity), numpy.nan))
+            )
+            for metric, values in self._columns.items():
+                self._columns[metric] = numpy.vstack(
+                    (values, numpy.full((grow, self._capacity), numpy.nan, "float32"))
+                )
+            self._positions = numpy.concatenate(
+                (self._positions, numpy.zeros(grow, "int64"))
+            )
+        self._rows[device_id] = row
+        return row
+
+    def _select(
+        self, metric: str, devices: "Iterable[Union[Device, str]]"
+    ) -> "tuple[list[str], numpy.ndarray, numpy.ndarray]":
+        """Return (device_ids, times, values) copies of some devices rows"""
+        if metric not in self._columns:
+            raise ValueError("Metric {} not recorded".format(metric))
+        with self._lock:
+            if devices is None:
+                device_ids = list(self._rows)
+            else:
+                device_ids = [
+                    device if isinstance(device, str) else device.id
+                    for device in devices
+                ]
+                device_ids = [
+                    device_id for device_id in device_ids if device_id in self._rows
+                ]
+            rows = [self._rows[device_id] for device_id in device_ids]
+            # fancy indexing copies rows: computed without the lock
+            return device_ids, self._times[rows], self._columns[metric][rows]
+
+    @staticmethod
+    def _get_mask(
+        times: "numpy.ndarray", start: float = None, end: float = None
+    ) -> "numpy.ndarray":
+        """Return readings between start (included) & end (excluded), never the empty slots (nan)"""
+        mask = ~numpy.isnan(times)
+        if start is not None:
+            mask &= times >= start
+        if end is not None:
+            mask &= times < end
+        return mask
@@ -0,0 +1,417 @@
+import calendar
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from typing import Iterable, Union
+
+from .AirzoneCloud import AirzoneCloud
+from .AirzoneCloudPool import AirzoneCloudPool
+from .Device import Device
+from .DeviceState import DeviceState
+from .constants import TELEMETRY_FLUSH_INTERVAL, TELEMETRY_FLUSH_RECORDS
+
+try:
+    import numpy
+except ImportError:  # optional dependency, required when a store is opened
+    numpy = None
+
+_LOGGER = logging.getLogger(__name__)
+
+# fixed width record: time, device index, temperatures, humidity, flags & mode
+_RECORD_STRUCT = struct.Struct("<dIfffBBBx")
+_RECORD_FIELDS = [
+    ("time", "<f8"),
+    ("device", "<u4"),
+    ("current_temperature", "<f4"),
+    ("target_temperature", "<f4"),
+    ("current_humidity", "<f4"),
+    ("is_on", "u1"),
+    ("mode_id", "u1"),
+    ("is_connected", "u1"),
+    ("padding", "u1"),
+]
+
+# segments files are named by UTC day
+_SEGMENT_REGEX = re.compile(r"^(\d{4}-\d{2}-\d{2})\.bin$")
+
+
+class TelemetryStore:
+    """Append devices readings to files of fixed width binary records (thread safe)
+
+    Readings are appended to a segment by UTC day in directory/raw, and read with
+    numpy memory maps: a query only maps segments of the requested days and
+    filters all their records at once, nothing is parsed record by record.
+    rollup() replaces old raw segments by means over periods (in
+    directory/rollup), delete_before() drops old segments.
+
+    Records (28 bytes) are numpy structured arrays with fields time, device (index
+    in devices), current_temperature, target_temperature, current_humidity,
+    is_on, mode_id & is_connected.
+    """
+
+    _directory: str = None
+    _flush_records: int = TELEMETRY_FLUSH_RECORDS
+    _flush_interval: float = TELEMETRY_FLUSH_INTERVAL
+    _devices: "list[dict]" = []
+    _devices_indexes: "dict[str, int]" = {}
+    _devices_changed: bool = False
+    _buffer: "dict[str, bytearray]" = {}
+    _buffered: int = 0
+    _flushed_at: float = None
+    _day: str = None
+    _day_bounds: "tuple[float, float]" = (0, 0)
+    _apis: "list[AirzoneCloud]" = []
+    _lock: threading.RLock = None
+
+    def __init__(
+        self,
+        directory: str,
+        api: "Union[AirzoneCloud, AirzoneCloudPool]" = None,
+        flush_records: int = TELEMETRY_FLUSH_RECORDS,
+        flush_interval: float = TELEMETRY_FLUSH_INTERVAL,
+    ) -> None:
+        """Open (or create) a store
+
+        directory: where segments are written
+        api: optional api (or pool) whose devices states are recorded (see attach())
+        flush_records: readings buffered in memory before being written
+        flush_interval: maximum seconds readings stay buffered (checked on record)
+        """
+        if numpy is None:
+            raise ImportError(
+                "numpy is required by TelemetryStore: pip3 install AirzoneCloud[telemetry]"
+            )
+        self._directory = directory
+        self._flush_records = max(1, int(flush_records))
+        self._flush_interval = flush_interval
+        self._buffer = {}
+        self._flushed_at = time.monotonic()
+        self._apis = []
+        self._lock = threading.RLock()
+        for kind in ("raw", "rollup"):
+            os.makedirs(os.path.join(directory, kind), exist_ok=True)
+        self._devices = self._read_devices()
+        self._devices_indexes = dict(
+            (device["id"], index) for index, device in enumerate(self._devices)
+        )
+        if api is not None:
+            self.attach(api)
+
+    def __enter__(self) -> "TelemetryStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop recording attached apis and write buffered readings"""
+        self.detach()
+        self.flush()
+
+    #
+    # record
+    #
+
+    def attach(self, api: "Union[AirzoneCloud, AirzoneCloudPool]") -> "TelemetryStore":
+        """Record each state of the devices of an api (or of the accounts already in a pool)"""
+        apis = (
+            list(api.accounts.values()) if isinstance(api, AirzoneCloudPool) else [api]
+        )
+        for account in apis:
+            if self not in account._state_recorders:
+                account._state_recorders = account._state_recorders + (self,)
+                self._apis.append(account)
+        return self
+
+    def detach(self) -> "TelemetryStore":
+        """Stop recording states of attached apis"""
+        apis, self._apis = self._apis, []
+        for api in apis:
+            api._state_recorders = tuple(
+                recorder for recorder in api._state_recorders if recorder is not self
+            )
+        return self
+
+    def record(
+        self, device: Device, state: DeviceState = None, timestamp: float = None
+    ) -> None:
+        """Append a reading of a device (default to its current state, now)"""
+        if state is None:
+            state = device._state
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            index = self._devices_indexes.get(device.id)
+            if index is None:
+                index = self._add_device(device)
+            if not self._day_bounds[0] <= timestamp < self._day_bounds[1]:
+                self._set_day(timestamp)
+            self._buffer.setdefault(self._day, bytearray()).extend(
+                _RECORD_STRUCT.pack(
+                    timestamp,
+                    index,
+                    state.current_temperature,
+                    state.target_temperature,
+                    state.current_humidity,
+                    state.is_on,
+                    state.mode_id,
+                    state.is_connected,
+                )
+            )
+            self._buffered += 1
+            if (
+                self._buffered >= self._flush_records
+                or time.monotonic() - self._flushed_at >= self._flush_interval
+            ):
+                self.flush()
+
+    def flush(self, fsync: bool = False) -> "TelemetryStore":
+        """Write buffered readings & new devices (fsync: also wait for them to be on disk)"""
+        with self._lock:
+            # devices first, so that written records never refer to unknown indexes
+            if self._devices_changed:
+                self._write_devices()
+            buffer, self._buffer = self._buffer, {}
+            self._buffered = 0
+            self._flushed_at = time.monotonic()
+            for day, records in buffer.items():
+                with open(self._get_segment_path("raw", day), "ab") as file:
+                    file.write(records)
+                    if fsync:
+                        file.flush()
+                        os.fsync(file.fileno())
+        return self
+
+    #
+    # getters
+    #
+
+    @property
+    def directory(self) -> str:
+        """Return directory of segments"""
+        return self._directory
+
+    @property
+    def devices(self) -> "list[dict]":
+        """Return recorded devices ({"id", "name", "installation_id"}), by index used in records"""
+        with self._lock:
+            return list(self._devices)
+
+    @property
+    def days(self) -> "list[str]":
+        """Return UTC days with readings ("YYYY-MM-DD")"""
+        return sorted(
+            set(self._list_segments("raw")) | set(self._list_segments("rollup"))
+        )
+
+    def query(
+        self,
+        start: float = None,
+        end: float = None,
+        installation_id: str = None,
+        devices: "Iterable[Union[Device, str]]" = None,
+    ) -> "numpy.ndarray":
+        """Return records between start (included) & end (excluded) timestamps, of an installation or some devices
+
+        Records of each segment are kept in writing order, segments are in days
+        order (rollup records before raw ones of the same day).
+        """
+        self.flush()
+        with self._lock:
+            selected = None
+            if installation_id is not None:
+                selected = set(
+                    index
+                    for index, device in enumerate(self._devices)
+                    if device["installation_id"] == installation_id
+                )
+            if devices is not None:
+                indexes = set(
+                    self._devices_indexes.get(
+                        device if isinstance(device, str) else device.id
+                    )
+                    for device in devices
+                )
+                selected = indexes if selected is None else selected & indexes
+        if selected is not None:
+            selected = numpy.array(
+                sorted(index for index in selected if index is not None), "uint32"
+            )
+
+        first_day = self._get_day(start) if start is not None else None
+        last_day = self._get_day(end) if end is not None else None
+        results = []
+        for day in self.days:
+            if (first_day is not None and day < first_day) or (
+                last_day is not None and day > last_day
+            ):
+                continue
+            for kind in ("rollup", "raw"):
+                records = self._map_segment(kind, day)
+                if records is None:
+                    continue
+                mask = numpy.ones(len(records), bool)
+                if start is not None:
+                    mask &= records["time"] >= start
+                if end is not None:
+                    mask &= records["time"] < end
+                if selected is not None:
+                    mask &= numpy.isin(records["device"], selected)
+                # copy matching records, the segment is unmapped after
+                results.append(records[mask])
+                del records
+        if not results:
+            return numpy.empty(0, _RECORD_FIELDS)
+        return numpy.concatenate(results)
+
+    #
+    # maintenance
+    #
+
+    def rollup(self, before: float, period: float = 3600) -> "TelemetryStore":
+        """Replace raw segments of days before a timestamp by means over periods (seconds)
+
+        Temperatures & humidity are averaged, power, mode & connection are the last
+        values of each period. Each day is rolled up with the store locked, so that
+        readings of that day flushed meanwhile aren't lost with its raw segment.
+        """
+        if period <= 0:
+            raise ValueError("period must be positive")
+        before_day = self._get_day(before)
+        for day in self._list_segments("raw"):
+            if day >= before_day:
+                continue
+            with self._lock:
+                self.flush()
+                self._rollup_day(day, period)
+        return self
+
+    def delete_before(self, before: float) -> "TelemetryStore":
+        """Delete segments (raw & rollup) of days before a timestamp"""
+        before_day = self._get_day(before)
+        with self._lock:
+            self.flush()
+            for kind in ("raw", "rollup"):
+                for day in self._list_segments(kind):
+                    if day < before_day:
+                        os.unlink(self._get_segment_path(kind, day))
+        return self
+
+    #
+    # private
+    #
+
+    def _add_device(self, device: Device) -> int:
+        """Register a new device (written on next flush), return its index (lock must be held)"""
+        index = len(self._devices)
+        self._devices.append(
+            {
+                "id": device.id,
+                "name": device.name,
+                "installation_id": device.group.installation.id,
+            }
+        )
+        self._devices_indexes[device.id] = index
+        self._devices_changed = True
+        return index
+
+    def _write_devices(self) -> None:
+        """Replace devices.json atomically (lock must be held)"""
+        path = os.path.join(self._directory, "devices.json")
+        tmp_path = "{}.tmp".format(path)
+        with open(tmp_path, "w") as file:
+            json.dump(self._devices, file)
+        os.replace(tmp_path, path)
+        self._devices_changed = False
+
+    def _read_devices(self) -> "list[dict]":
+        """Read devices registered by previous runs"""
+        try:
+            with open(os.path.join(self._directory, "devices.json"), "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []
+
+    def _rollup_day(self, day: str, period: float) -> None:
+        """Replace the raw segment of a day by means over periods (lock must be held)"""
+        records = self._map_segment("raw", day)
+        if records is None:
+            os.unlink(self._get_segment_path("raw", day))
+            return
+        rolled = self._downsample(numpy.array(records), period)
+        del records
+        previous = self._map_segment("rollup", day)
+        if previous is not None:
+            rolled = numpy.concatenate((numpy.array(previous), rolled))
+            del previous
+        self._write_segment("rollup", day, rolled)
+        os.unlink(self._get_segment_path("raw", day))
+        _LOGGER.info("Telemetry of %s rolled up by %ss", day, period)
+
+    def _set_day(self, timestamp: float) -> None:
+        """Set the day of the segment readings are appended to (lock must be held)"""
+        self._day = self._get_day(timestamp)
+        day_start = calendar.timegm(time.strptime(self._day, "%Y-%m-%d"))
+        self._day_bounds = (day_start, day_start + 86400)
+
+    @staticmethod
+    def _get_day(timestamp: float) -> str:
+        return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+    def _get_segment_path(self, kind: str, day: str) -> str:
+        return os.path.join(self._directory, kind, "{}.bin".format(day))
+
+    def _list_segments(self, kind: str) -> "list[str]":
+        """Return days of the segments of a kind (raw or rollup)"""
+        days = []
+        for filename in os.listdir(os.path.join(self._directory, kind)):
+            match = _SEGMENT_REGEX.match(filename)
+            if match:
+                days.append(match.group(1))
+        return sorted(days)
+
+    def _map_segment(self, kind: str, day: str) -> "numpy.ndarray":
+        """Return records of a segment mapped in memory (None if missing or empty)"""
+        path = self._get_segment_path(kind, day)
+        try:
+            count = os.path.getsize(path) // _RECORD_STRUCT.size
+        except FileNotFoundError:
+            return None
+        if count == 0:
+            return None
+        # a partially written last record is ignored
+        return numpy.memmap(path, _RECORD_FIELDS, mode="r", shape=(count,))
+
+    def _write_segment(self, kind: str, day: str, records: "numpy.ndarray") -> None:
+        """Replace a segment atomically"""
+        path = self._get_segment_path(kind, day)
+        tmp_path = "{}.tmp".format(path)
+        with open(tmp_path, "wb") as file:
+            file.write(records.tobytes())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _downsample(records: "numpy.ndarray", period: float) -> "numpy.ndarray":
+        """Return a record by device & period: means of measures, last flags & mode"""
+        buckets = (records["time"] // period).astype("int64")
+        keys = numpy.stack((records["device"].astype("int64"), buckets))
+        # reversed to get the index of the last record of each group
+        unique_keys, last_indexes, groups = numpy.unique(
+            keys[:, ::-1], axis=1, return_index=True, return_inverse=True
+        )
+        last_indexes = len(records) - 1 - last_indexes
+        groups = groups.ravel()[::-1]
+        counts = numpy.bincount(groups)
+
+        rolled = numpy.zeros(unique_keys.shape[1], _RECORD_FIELDS)
+        rolled["device"] = unique_keys[0]
+        rolled["time"] = unique_keys[1] * period
+        for field in ("current_temperature", "target_temperature", "current_humidity"):
+            rolled[field] = numpy.bincount(groups, records[field]) / counts
+        for field in ("is_on", "mode_id", "is_connected"):
+            rolled[field] = records[field][last_indexes]
+        return numpy.sort(rolled, order=("time", "device"))
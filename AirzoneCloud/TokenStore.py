@@ -0,0 +1,44 @@
+import base64
+import json
+import threading
+
+
+class TokenStore:
+    """Keep AirzoneCloud tokens between api instances (in memory)
+
+    Subclass it and override load(), save() & delete() to persist tokens
+    elsewhere (see FileTokenStore).
+    """
+
+    _tokens: "dict[str, dict]" = {}
+    _lock: threading.Lock = None
+
+    def __init__(self) -> None:
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def load(self, key: str) -> dict:
+        """Return stored {"token": ..., "expires_at": ...} for key (None if unknown)"""
+        with self._lock:
+            return self._tokens.get(key)
+
+    def save(self, key: str, token: str, expires_at: float = None) -> None:
+        """Store token of key with its expiry timestamp (None if unknown)"""
+        with self._lock:
+            self._tokens[key] = {"token": token, "expires_at": expires_at}
+
+    def delete(self, key: str) -> None:
+        """Forget token of key"""
+        with self._lock:
+            self._tokens.pop(key, None)
+
+    @staticmethod
+    def get_expiry(token: str) -> float:
+        """Return expiry timestamp read from a JWT token (None if it can't be decoded)"""
+        try:
+            payload = token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+            return float(exp) if exp is not None else None
+        except (AttributeError, IndexError, TypeError, ValueError):
+            return None
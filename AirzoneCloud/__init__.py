@@ -1,4 +1,57 @@
-from .AirzoneCloud import AirzoneCloud
-from .Installation import Installation
-from .Group import Group
-from .Device import Device
+import importlib
+import sys
+import types
+
+# public classes, each defined in the module of the same name: they are only
+# imported on first access, so that importing the package doesn't load every
+# module (the http stack itself is loaded when an api is created)
+__all__ = [
+    "AirzoneCloud",
+    "AirzoneCloudPool",
+    "PollScheduler",
+    "TelemetryRecorder",
+    "TelemetryStore",
+    "Installation",
+    "Group",
+    "Device",
+    "Change",
+    "RealtimeListener",
+    "RetryPolicy",
+    "RateLimiter",
+    "ConcurrencyLimiter",
+    "Metrics",
+    "TokenStore",
+    "FileTokenStore",
+    "AsyncAirzoneCloud",
+    "AsyncInstallation",
+    "AsyncGroup",
+    "AsyncDevice",
+]
+
+
+def __getattr__(name: str) -> type:
+    if name not in __all__:
+        raise AttributeError("module {} has no attribute {}".format(__name__, name))
+    return getattr(importlib.import_module("." + name, __name__), name)
+
+
+def __dir__() -> "list[str]":
+    return sorted(set(globals()) | set(__all__))
+
+
+class _Package(types.ModuleType):
+    """Package exposing its classes instead of the modules defining them"""
+
+    def __setattr__(self, name: str, value: object) -> None:
+        # each imported module is set on the package by the import system: set
+        # its class instead (like "from .Device import Device" did)
+        if (
+            name in __all__
+            and isinstance(value, types.ModuleType)
+            and value.__name__ == "{}.{}".format(__name__, name)
+        ):
+            value = getattr(value, name, value)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
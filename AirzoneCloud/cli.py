@@ -0,0 +1,302 @@
+#!/usr/bin/python3
+"""airzonecloud command line
+
+Credentials are read from --email & --password, or from AIRZONECLOUD_EMAIL &
+AIRZONECLOUD_PASSWORD environment variables. The token is kept between runs
+(see --token-file) so that each invocation doesn't login again.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+# only the standard library is imported here: the api (and requests) is loaded
+# once arguments are parsed, so that --help or usage errors stay instant
+
+
+def main(argv: "list[str]" = None) -> int:
+    """Run the command line, return the exit code"""
+    args = _get_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level, stream=sys.stderr)
+
+    email = args.email or os.environ.get("AIRZONECLOUD_EMAIL")
+    password = args.password or os.environ.get("AIRZONECLOUD_PASSWORD")
+    if not email or not password:
+        print(
+            "airzonecloud: email & password are required (--email & --password, or AIRZONECLOUD_EMAIL & AIRZONECLOUD_PASSWORD)",
+            file=sys.stderr,
+        )
+        return 2
+
+    from .AirzoneCloud import AirzoneCloud
+    from .FileTokenStore import FileTokenStore
+
+    try:
+        with AirzoneCloud(
+            email,
+            password,
+            lazy=True,
+            max_workers=args.concurrency,
+            token_store=(
+                FileTokenStore(args.token_file) if args.token_file != "" else None
+            ),
+            api_url=args.api_url,
+            metrics=False,
+        ) as api:
+            return args.command(api, args)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as err:
+        print("airzonecloud: {}".format(err), file=sys.stderr)
+        return 1
+
+
+#
+# commands
+#
+
+
+def _list(api: "AirzoneCloud", args: argparse.Namespace) -> int:
+    """List devices of all installations"""
+    devices = api.all_devices
+    api.refresh_devices(devices)
+    for device in devices:
+        if args.json:
+            _print_json(_get_device_dict(device))
+        else:
+            print(
+                "{}  {:<20}  {:<4}  {:<10}  {:>5.1f}°C -> {:>4.1f}°C  {}".format(
+                    device.id,
+                    device.name,
+                    "on" if device.is_on else "off",
+                    device.mode or "",
+                    device.current_temperature,
+                    device.target_temperature,
+                    "" if device.is_connected else "disconnected",
+                )
+            )
+    return 0
+
+
+def _get(api: "AirzoneCloud", args: argparse.Namespace) -> int:
+    """Print properties of a device"""
+    device = _find_device(api, args.device)
+    if args.json:
+        _print_json(_get_device_dict(device))
+    else:
+        for key, value in _get_device_dict(device).items():
+            print("{} = {}".format(key, value))
+    return 0
+
+
+def _set(api: "AirzoneCloud", args: argparse.Namespace) -> int:
+    """Send commands to a device, then print its properties"""
+    device = _find_device(api, args.device)
+    if args.power is None and args.temperature is None and args.mode is None:
+        raise Exception("nothing to set (use --on, --off, --temperature or --mode)")
+    options = {"auto_refresh": False}
+    with api.commands_batch():
+        if args.power is True:
+            device.turn_on(**options)
+        elif args.power is False:
+            device.turn_off(**options)
+        if args.mode is not None:
+            device.set_mode(args.mode, **options)
+        if args.temperature is not None:
+            device.set_temperature(args.temperature, **options)
+
+    confirmed = True
+    if args.confirm_timeout:
+        confirmed = api.wait_confirmed([device], args.confirm_timeout)
+    else:
+        device.refresh(force=True)
+    _print_json(_get_device_dict(device))
+    return 0 if confirmed else 3
+
+
+def _watch(api: "AirzoneCloud", args: argparse.Namespace) -> int:
+    """Print changes of devices states as json lines until interrupted (or --count polls)"""
+    if args.devices:
+        devices = [_find_device(api, key) for key in args.devices]
+    else:
+        devices = api.all_devices
+    devices_ids = set(device.id for device in devices)
+    output_lock = threading.Lock()
+
+    def on_changes(changes):
+        with output_lock:
+            for change in changes:
+                if change.device.id in devices_ids:
+                    _print_json(
+                        {
+                            "time": time.time(),
+                            "device_id": change.device.id,
+                            "name": change.device.name,
+                            "field": change.field,
+                            "old": change.old,
+                            "new": change.new,
+                        }
+                    )
+
+    # first states are loaded before listening: they are not changes
+    api.refresh_devices(devices, force=True)
+    if args.initial:
+        for device in devices:
+            _print_json(dict(_get_device_dict(device), time=time.time()))
+    unsubscribe = api.subscribe(on_changes)
+
+    try:
+        if args.adaptive:
+            from .PollScheduler import PollScheduler
+
+            with PollScheduler(
+                api,
+                requests_per_minute=args.requests_per_minute,
+                devices=devices,
+                base_interval=args.interval,
+                max_workers=args.concurrency,
+            ) as scheduler:
+                while args.count is None or scheduler.stats["polls"] < args.count:
+                    time.sleep(0.1)
+            return 0
+        polls = 0
+        while args.count is None or polls < args.count:
+            time.sleep(args.interval)
+            api.refresh_devices(devices, force=True)
+            polls += 1
+    finally:
+        unsubscribe()
+    return 0
+
+
+#
+# private
+#
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="airzonecloud", description="Control AirzoneCloud devices"
+    )
+    parser.add_argument("--email", help="account email (or AIRZONECLOUD_EMAIL)")
+    parser.add_argument(
+        "--password", help="account password (or AIRZONECLOUD_PASSWORD)"
+    )
+    parser.add_argument("--api-url", help="api base url (like a MockServer url)")
+    parser.add_argument(
+        "--token-file",
+        default=None,
+        help='file where the token is kept (default to ~/.cache/AirzoneCloud/tokens.json, "" to login on each run)',
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="maximum requests sent in parallel (default to 8)",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="logs written to stderr (default to WARNING)",
+    )
+    commands = parser.add_subparsers(dest="command_name", metavar="command")
+    commands.required = True
+
+    command = commands.add_parser("list", help="list devices with their state")
+    command.add_argument("--json", action="store_true", help="print json lines")
+    command.set_defaults(command=_list)
+
+    command = commands.add_parser("get", help="print properties of a device")
+    command.add_argument("device", help="device id or name")
+    command.add_argument("--json", action="store_true", help="print json")
+    command.set_defaults(command=_get)
+
+    command = commands.add_parser(
+        "set", help="send commands to a device then print its properties as json"
+    )
+    command.add_argument("device", help="device id or name")
+    power = command.add_mutually_exclusive_group()
+    power.add_argument("--on", dest="power", action="store_const", const=True)
+    power.add_argument("--off", dest="power", action="store_const", const=False)
+    command.add_argument("--temperature", type=float, help="target (°C)")
+    command.add_argument("--mode", help="mode name (heating, cooling, ...)")
+    command.add_argument(
+        "--confirm-timeout",
+        type=float,
+        default=0,
+        help="seconds to wait until the device state reflects commands (exit code 3 if not)",
+    )
+    command.set_defaults(command=_set)
+
+    command = commands.add_parser(
+        "watch", help="print devices changes as json lines until interrupted"
+    )
+    command.add_argument(
+        "devices", nargs="*", help="devices ids or names (default to all)"
+    )
+    command.add_argument(
+        "--interval",
+        type=float,
+        default=60,
+        help="seconds between polls (base interval with --adaptive, default to 60)",
+    )
+    command.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="poll each device at a rate depending on its activity (see PollScheduler)",
+    )
+    command.add_argument(
+        "--requests-per-minute",
+        type=float,
+        help="maximum polls per minute with --adaptive",
+    )
+    command.add_argument(
+        "--count",
+        type=int,
+        help="stop after this number of polls (of all devices, of one device with --adaptive)",
+    )
+    command.add_argument(
+        "--initial",
+        action="store_true",
+        help="print the state of each device first",
+    )
+    command.set_defaults(command=_watch)
+    return parser
+
+
+def _find_device(api: "AirzoneCloud", key: str) -> "Device":
+    """Return a device by id or name"""
+    device = api.get_device(key)
+    if device is not None:
+        return device
+    devices = api.find_devices(name=key)
+    if len(devices) > 1:
+        raise Exception(
+            'several devices named "{}", use an id : {}'.format(
+                key, ", ".join(device.id for device in devices)
+            )
+        )
+    if not devices:
+        raise Exception('device "{}" not found'.format(key))
+    return devices[0]
+
+
+def _get_device_dict(device: "Device") -> dict:
+    return dict(
+        device.all_properties,
+        group_id=device.group.id,
+        installation_id=device.group.installation.id,
+    )
+
+
+def _print_json(data: dict) -> None:
+    print(json.dumps(data, ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
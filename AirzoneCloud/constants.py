@@ -1,5 +1,79 @@
 API_URL = "https://m.airzonecloud.com/api/v1"
 
+# socket.io channel used by the web app to push updates
+WEBSOCKET_URL = "wss://m.airzonecloud.com/api/v1/websockets"
+WEBSOCKET_LISTEN_EVENT = "listen_installation"
+WEBSOCKET_UPDATE_EVENTS = ("DEVICES_UPDATES", "DEVICE_STATE")
+
+# delays (in seconds) between states polls when waiting a command confirmation
+CONFIRM_INITIAL_DELAY = 0.2
+CONFIRM_MAX_DELAY = 2
+
+# number of installations requested per page on /installations
+INSTALLATIONS_PAGE_SIZE = 10
+
+# default (connect, read) timeouts in seconds of http requests
+REQUEST_TIMEOUT = (5, 30)
+
+# seconds before its expiry from which a token is renewed
+TOKEN_EXPIRY_MARGIN = 60
+
+# default seconds during which a device config is served from cache (it rarely
+# changes), and config subset loaded by Device.config (user┃advanced┃all)
+CONFIG_TTL = 24 * 3600
+CONFIG_TYPE = "user"
+
+# format version of files written by AirzoneCloud.save_snapshot()
+SNAPSHOT_VERSION = 1
+
+# devices properties compared on refresh to notify changes to listeners
+DEVICE_STATE_FIELDS = (
+    "is_connected",
+    "is_on",
+    "mode_id",
+    "mode",
+    "modes_availables",
+    "current_humidity",
+    "current_temperature",
+    "target_temperature",
+    "min_temperature",
+    "max_temperature",
+    "step_temperature",
+)
+DEVICE_DATA_FIELDS = ("name", "ws_id", "system_number", "zone_number")
+
+# default seconds between devices polls of PollScheduler: fast after a command
+# or a change (during POLL_ACTIVE_PERIOD), then backing off from the base
+# interval up to a ceiling depending on the device state
+POLL_FAST_INTERVAL = 5
+POLL_ACTIVE_PERIOD = 60
+POLL_BASE_INTERVAL = 30
+POLL_IDLE_INTERVAL = 300
+POLL_OFF_INTERVAL = 600
+POLL_OFFLINE_INTERVAL = 900
+
+# devices state values recorded by TelemetryRecorder (one column each)
+TELEMETRY_METRICS = (
+    "current_temperature",
+    "current_humidity",
+    "target_temperature",
+    "is_on",
+    "mode_id",
+    "is_connected",
+)
+
+# default number of readings kept by device in TelemetryRecorder (a day at one
+# refresh per minute)
+TELEMETRY_CAPACITY = 1440
+
+# readings buffered by TelemetryStore before being written, and maximum
+# seconds they stay buffered
+TELEMETRY_FLUSH_RECORDS = 1024
+TELEMETRY_FLUSH_INTERVAL = 5
+
+# upper bounds (in seconds) of requests durations histogram buckets
+METRICS_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
 MODES_CONVERTER = {
     "0": {
         "name": "stop",
@@ -0,0 +1,165 @@
+#!/usr/bin/python3
+"""Memory and properties access cost of devices states
+
+Compare raw status dicts (as kept before DeviceState) with parsed DeviceState
+for N simulated devices (no request is sent).
+
+Usage: python3 benchmarks/bench_device_state.py [N]
+"""
+
+import copy
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from AirzoneCloud.Device import Device
+from AirzoneCloud.DeviceState import DeviceState
+from AirzoneCloud.constants import MODES_CONVERTER
+
+PROPERTIES = (
+    "is_on",
+    "mode",
+    "current_temperature",
+    "target_temperature",
+    "min_temperature",
+    "max_temperature",
+)
+
+
+def raw_status(index: int) -> dict:
+    """Return a raw status similar to the one sent by AirzoneCloud"""
+    status = {
+        "isConnected": True,
+        "power": index % 2 == 0,
+        "mode": 3,
+        "mode_available": [2, 3, 4, 5, 0] if index % 5 == 0 else [],
+        "local_temp": {"celsius": 20 + (index % 50) / 10, "fah": 68},
+        "humidity": 40 + index % 20,
+        "step": {"celsius": 0.5, "fah": 1},
+        "name": "Zone {}".format(index),
+        "eco_values": [0, 1, 2],
+        "eco_conf": "off",
+        "sleep_values": [0, 30, 60, 90],
+        "sleep": 0,
+        "speed_values": [0, 1, 2, 3],
+        "speed_conf": 0,
+        "units": 0,
+        "warnings": [],
+        "errors": [],
+    }
+    for mode in MODES_CONVERTER.values():
+        status[mode["setpoint_key"]] = {"celsius": 20 + index % 5, "fah": 68}
+        for suffix in ("min", "max"):
+            status[mode["range_key_prefix"] + suffix] = {"celsius": 15, "fah": 59}
+    return status
+
+
+class RawDevice:
+    """Properties computed from the raw status on each access (previous behavior)"""
+
+    def __init__(self, state: dict) -> None:
+        self._state = state
+
+    @property
+    def is_on(self) -> bool:
+        return self._state.get("power", False)
+
+    @property
+    def mode_id(self) -> int:
+        return self._state.get("mode", 0)
+
+    @property
+    def mode(self) -> str:
+        return MODES_CONVERTER.get(str(self.mode_id), {}).get("name")
+
+    @property
+    def current_temperature(self) -> float:
+        return float(self._state.get("local_temp", {}).get("celsius", 0))
+
+    @property
+    def target_temperature(self) -> float:
+        key = MODES_CONVERTER.get(str(self.mode_id), {}).get("setpoint_key")
+        return float(self._state.get(key, {}).get("celsius", 0))
+
+    @property
+    def min_temperature(self) -> float:
+        key = MODES_CONVERTER.get(str(self.mode_id), {}).get("range_key_prefix") + "min"
+        return float(self._state.get(key, {}).get("celsius", 0))
+
+    @property
+    def max_temperature(self) -> float:
+        key = MODES_CONVERTER.get(str(self.mode_id), {}).get("range_key_prefix") + "max"
+        return float(self._state.get(key, {}).get("celsius", 0))
+
+
+def new_device(state: DeviceState) -> Device:
+    """Instance a Device without api (state already loaded)"""
+    device = Device.__new__(Device)
+    device._state = state
+    return device
+
+
+def measure_memory(build) -> int:
+    """Return bytes allocated by build()"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def measure_access(devices: list) -> float:
+    """Return microseconds to read all PROPERTIES of a device"""
+
+    def read_all():
+        for device in devices:
+            for prop in PROPERTIES:
+                getattr(device, prop)
+
+    duration = min(timeit.repeat(read_all, number=1, repeat=5))
+    return duration / len(devices) * 1e6
+
+
+def main(count: int) -> None:
+    statuses = [raw_status(index) for index in range(count)]
+
+    raw_bytes = measure_memory(lambda: [copy.deepcopy(status) for status in statuses])
+    parsed_bytes = measure_memory(
+        lambda: [DeviceState.parse(status) for status in statuses]
+    )
+    parse_us = (
+        min(
+            timeit.repeat(
+                lambda: [DeviceState.parse(status) for status in statuses],
+                number=1,
+                repeat=3,
+            )
+        )
+        / count
+        * 1e6
+    )
+
+    raw_devices = [RawDevice(status) for status in statuses]
+    parsed_devices = [new_device(DeviceState.parse(status)) for status in statuses]
+
+    print("{} devices".format(count))
+    print(
+        "memory per device : raw status {:.0f} bytes, DeviceState {:.0f} bytes".format(
+            raw_bytes / count, parsed_bytes / count
+        )
+    )
+    print("parse per refresh : {:.2f} us".format(parse_us))
+    print(
+        "read {} properties : raw status {:.2f} us, DeviceState {:.2f} us".format(
+            len(PROPERTIES), measure_access(raw_devices), measure_access(parsed_devices)
+        )
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+"""End to end benchmark against the bundled MockServer
+
+For each fleet size, measure startup time, lazy startup time, refresh
+throughput, requests sent per operation and memory of the loaded account.
+The mock server runs in another process, so that it doesn't share the GIL
+with the measured client.
+
+Usage: python3 benchmarks/bench_fleet.py [--sizes 1,10,100,1000,10000] [--latency 0.005]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from AirzoneCloud import AirzoneCloud
+
+
+def layout(size: int) -> "tuple[int, int, int]":
+    """Return (installations, groups per installation, devices per group) for size devices"""
+    if size <= 25:
+        return 1, 1, size
+    if size <= 100:
+        return 1, max(1, size // 25), 25
+    return max(1, size // 100), 4, 25
+
+
+class MockProcess:
+    """MockServer running in a subprocess"""
+
+    def __init__(self, size: int, latency: float) -> None:
+        installations, groups, devices = layout(size)
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "AirzoneCloud.MockServer",
+                "--installations={}".format(installations),
+                "--groups-per-installation={}".format(groups),
+                "--devices-per-group={}".format(devices),
+                "--latency={}".format(latency),
+            ],
+            cwd=ROOT,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        self.url = self.process.stdout.readline().strip()
+        self.devices_count = installations * groups * devices
+
+    def requests_counts(self) -> "dict[str, int]":
+        """Return requests counts then reset them"""
+        stats_url = self.url.replace("/api/v1", "/_mock")
+        counts = requests.get(stats_url + "/stats").json()["requests"]
+        requests.post(stats_url + "/reset")
+        return counts
+
+    def stop(self) -> None:
+        self.process.terminate()
+        self.process.wait()
+
+
+def format_counts(counts: "dict[str, int]") -> str:
+    return "{} ({})".format(
+        sum(counts.values()),
+        ", ".join("{} {}".format(count, key) for key, count in sorted(counts.items())),
+    )
+
+
+def bench(size: int, latency: float, max_workers: int) -> None:
+    mock = MockProcess(size, latency)
+    try:
+        print("== {} devices (latency {}s)".format(mock.devices_count, latency))
+
+        start = time.perf_counter()
+        api = AirzoneCloud(
+            "bench@example.com", "password", api_url=mock.url, max_workers=max_workers
+        )
+        duration = time.perf_counter() - start
+        print(
+            "startup          : {:8.3f}s  requests {}".format(
+                duration, format_counts(mock.requests_counts())
+            )
+        )
+
+        start = time.perf_counter()
+        lazy_api = AirzoneCloud(
+            "bench@example.com", "password", api_url=mock.url, lazy=True
+        )
+        next(lazy_api.iter_devices()).is_on
+        duration = time.perf_counter() - start
+        print(
+            "lazy first device: {:8.3f}s  requests {}".format(
+                duration, format_counts(mock.requests_counts())
+            )
+        )
+
+        start = time.perf_counter()
+        api.refresh_all_devices()
+        duration = time.perf_counter() - start
+        print(
+            "refresh all      : {:8.3f}s  {:.0f} devices/s  requests {}".format(
+                duration,
+                mock.devices_count / duration,
+                format_counts(mock.requests_counts()),
+            )
+        )
+
+        start = time.perf_counter()
+        api.installations[0].groups[0].set_temperature(21, auto_refresh=False)
+        duration = time.perf_counter() - start
+        print(
+            "group command    : {:8.3f}s  requests {}".format(
+                duration, format_counts(mock.requests_counts())
+            )
+        )
+
+        # memory of the loaded account, rebuilt without any request
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "snapshot.json")
+            api.save_snapshot(path)
+            tracemalloc.start()
+            restored = AirzoneCloud.from_snapshot(
+                path,
+                "bench@example.com",
+                "password",
+                revalidate=False,
+                api_url=mock.url,
+            )
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del restored
+        print(
+            "memory           : {:8.1f} KB  {:.0f} bytes/device".format(
+                memory / 1024, memory / mock.devices_count
+            )
+        )
+        api.close()
+        lazy_api.close()
+    finally:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,100,1000,10000")
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--max-workers", type=int, default=8)
+    args = parser.parse_args()
+    for fleet_size in args.sizes.split(","):
+        bench(int(fleet_size), args.latency, args.max_workers)
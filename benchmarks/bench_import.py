@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""Import cost of the library
+
+Time in fresh interpreters (median of R runs, bytecode cache warmed first):
+- python startup alone
+- import AirzoneCloud
+- from AirzoneCloud import AirzoneCloud
+- creating a lazy api (which loads requests)
+
+Exit with code 1 if "from AirzoneCloud import AirzoneCloud" costs more than
+BUDGET ms over python startup, or loads requests.
+
+Usage: python3 benchmarks/bench_import.py [R] [BUDGET]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# each snippet prints its own cost (ms) then whether requests is loaded
+SNIPPETS = {
+    "python startup": "pass",
+    "import AirzoneCloud": "import AirzoneCloud",
+    "from AirzoneCloud import AirzoneCloud": "from AirzoneCloud import AirzoneCloud",
+    "lazy api creation": "from AirzoneCloud import AirzoneCloud\n"
+    "AirzoneCloud('user@example.com', 'password', lazy=True, token_store=None, metrics=False).close()",
+}
+
+TEMPLATE = """import time
+began = time.perf_counter()
+{}
+elapsed = time.perf_counter() - began
+import sys
+print(elapsed * 1e3, "requests" in sys.modules)
+"""
+
+
+def run(snippet: str) -> "tuple[float, float, bool]":
+    """Return wall time & in-process time (ms) of a fresh interpreter running snippet, and if requests was loaded"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    began = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", TEMPLATE.format(snippet)],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout.split()
+    wall = (time.perf_counter() - began) * 1e3
+    return wall, float(output[0]), output[1] == "True"
+
+
+def main(repeat: int, budget: float) -> int:
+    results = {}
+    for name, snippet in SNIPPETS.items():
+        run(snippet)  # warm bytecode cache
+        runs = [run(snippet) for _ in range(repeat)]
+        results[name] = (
+            statistics.median(wall for wall, _, _ in runs),
+            statistics.median(cost for _, cost, _ in runs),
+            runs[-1][2],
+        )
+        print(
+            "{:<40} {:7.1f} ms wall, {:6.1f} ms in import{}".format(
+                name,
+                results[name][0],
+                results[name][1],
+                ", requests loaded" if results[name][2] else "",
+            )
+        )
+
+    _, cost, requests_loaded = results["from AirzoneCloud import AirzoneCloud"]
+    if requests_loaded:
+        print("FAIL : requests is loaded before an api is created")
+        return 1
+    if cost > budget:
+        print("FAIL : import costs {:.1f} ms (budget {:.1f} ms)".format(cost, budget))
+        return 1
+    print("OK : import costs {:.1f} ms (budget {:.1f} ms)".format(cost, budget))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 9,
+            float(sys.argv[2]) if len(sys.argv) > 2 else 50,
+        )
+    )
@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+"""Logging overhead of devices refresh
+
+Refresh N simulated devices (no request is sent) with logs disabled (WARNING
+level), and compare deferred logs (%-style with level guards, current code)
+with logs formatted eagerly with str.format() (as done before). Durations
+with DEBUG logs enabled (to a null handler) are also shown.
+
+Usage: python3 benchmarks/bench_logging.py [N]
+"""
+
+import logging
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from AirzoneCloud.Device import Device
+from AirzoneCloud.DeviceState import DeviceState
+
+_LOGGER = logging.getLogger("AirzoneCloud.Device")
+
+RAW_STATES = (
+    {
+        "isConnected": True,
+        "power": True,
+        "mode": 3,
+        "mode_available": [2, 3, 4, 5, 0],
+        "local_temp": {"celsius": 20.5, "fah": 69},
+        "humidity": 40,
+        "step": {"celsius": 0.5, "fah": 1},
+        "setpoint_air_heat": {"celsius": 21, "fah": 70},
+        "range_sp_hot_air_min": {"celsius": 15, "fah": 59},
+        "range_sp_hot_air_max": {"celsius": 30, "fah": 86},
+    },
+    {
+        "isConnected": True,
+        "power": False,
+        "mode": 3,
+        "mode_available": [2, 3, 4, 5, 0],
+        "local_temp": {"celsius": 21.0, "fah": 70},
+        "humidity": 41,
+        "step": {"celsius": 0.5, "fah": 1},
+        "setpoint_air_heat": {"celsius": 21, "fah": 70},
+        "range_sp_hot_air_min": {"celsius": 15, "fah": 59},
+        "range_sp_hot_air_max": {"celsius": 30, "fah": 86},
+    },
+)
+
+
+class EagerDevice(Device):
+    """Device refresh with logs formatted even if disabled (previous behavior)"""
+
+    def refresh(self, force: bool = False) -> "Device":
+        _LOGGER.debug("call refresh() on {}".format(self._str_log))
+        raw_state = self._api._api_get_device_state(self.id, self.group.installation.id)
+        state = DeviceState.parse(raw_state)
+        if state != self._state:
+            _LOGGER.debug(str(state))
+        self._set_state(state)
+        return self
+
+
+def new_api() -> SimpleNamespace:
+    """Return a fake api alternating between RAW_STATES (state changes on each refresh)"""
+    api = SimpleNamespace(_state_ttl=None, _state_recorders=(), _calls=0)
+
+    def get_device_state(device_id: str, installation_id: str) -> dict:
+        api._calls += 1
+        return RAW_STATES[api._calls % 2]
+
+    api._api_get_device_state = get_device_state
+    return api
+
+
+def new_device(cls: type, api: SimpleNamespace, index: int) -> Device:
+    """Instance a Device without request (state already loaded)"""
+    installation = SimpleNamespace(id="installation")
+    device = cls.__new__(cls)
+    device._api = api
+    device._group = SimpleNamespace(
+        installation=installation, _listeners=(), _get_observable_parent=lambda: None
+    )
+    device._data = {
+        "device_id": "device{}".format(index),
+        "name": "Zone {}".format(index),
+        "ws_id": "AA:BB:CC:DD:EE:FF",
+        "meta": {"system_number": 1, "zone_number": index},
+    }
+    device._state = DeviceState.parse(RAW_STATES[0])
+    return device
+
+
+def measure_refresh(devices: list) -> float:
+    """Return microseconds to refresh a device"""
+
+    def refresh_all():
+        for device in devices:
+            device.refresh()
+
+    duration = min(timeit.repeat(refresh_all, number=1, repeat=5))
+    return duration / len(devices) * 1e6
+
+
+def main(count: int) -> None:
+    api = new_api()
+    deferred = [new_device(Device, api, index) for index in range(count)]
+    eager = [new_device(EagerDevice, api, index) for index in range(count)]
+
+    print("{} devices".format(count))
+    for level in (logging.WARNING, logging.DEBUG):
+        _LOGGER.setLevel(level)
+        _LOGGER.propagate = level != logging.DEBUG
+        if level == logging.DEBUG:
+            _LOGGER.addHandler(logging.NullHandler())
+        deferred_us = measure_refresh(deferred)
+        eager_us = measure_refresh(eager)
+        print(
+            "refresh with {} logs : eager {:.2f} us, deferred {:.2f} us ({:+.0f}%)".format(
+                logging.getLevelName(level),
+                eager_us,
+                deferred_us,
+                (deferred_us - eager_us) / eager_us * 100,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
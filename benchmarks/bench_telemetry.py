@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+"""Memory and aggregation cost of devices telemetry history
+
+Record R readings of N simulated devices (no request is sent), then compare
+an hourly mean of the last day computed from python dicts (as built by
+dashboards) with TelemetryRecorder.resample() and aggregate().
+
+Usage: python3 benchmarks/bench_telemetry.py [N] [R]
+"""
+
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from AirzoneCloud.DeviceState import DeviceState
+from AirzoneCloud.TelemetryRecorder import TelemetryRecorder
+from AirzoneCloud.constants import TELEMETRY_METRICS
+
+START = 1700000000.0
+
+
+def new_state(index: int, reading: int) -> DeviceState:
+    """Return a state with a varying temperature"""
+    state = DeviceState()
+    state.is_connected = True
+    state.is_on = reading % 7 != 0
+    state.mode_id = 3
+    state.current_temperature = 19 + random.random() * 4
+    state.current_humidity = 40 + index % 20
+    state.target_temperature = 21.0
+    return state
+
+
+def dicts_hourly_means(history: dict) -> dict:
+    """Hourly mean of current_temperature by device from lists of dicts"""
+    means = {}
+    for device_id, readings in history.items():
+        buckets = {}
+        for reading in readings:
+            bucket = int((reading["time"] - START) // 3600)
+            total, count = buckets.get(bucket, (0.0, 0))
+            buckets[bucket] = (total + reading["current_temperature"], count + 1)
+        means[device_id] = dict(
+            (bucket, total / count) for bucket, (total, count) in buckets.items()
+        )
+    return means
+
+
+def main(count: int, readings: int) -> None:
+    devices = [SimpleNamespace(id="device{}".format(index)) for index in range(count)]
+    period = 86400 / readings
+
+    history = {}
+    tracemalloc.start()
+    for device in devices:
+        readings_dicts = []
+        for reading in range(readings):
+            state = new_state(0, reading)
+            reading_dict = {"time": START + reading * period}
+            for metric in TELEMETRY_METRICS:
+                reading_dict[metric] = getattr(state, metric)
+            readings_dicts.append(reading_dict)
+        history[device.id] = readings_dicts
+    dicts_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    recorder = TelemetryRecorder(capacity=readings, devices=count)
+    for reading in range(readings):
+        for index, device in enumerate(devices):
+            recorder.record(
+                device, new_state(index, reading), timestamp=START + reading * period
+            )
+    record_us = (
+        min(
+            timeit.repeat(
+                lambda: recorder.record(
+                    devices[0], new_state(0, 0), timestamp=START + 86400
+                ),
+                number=1000,
+                repeat=3,
+            )
+        )
+        / 1000
+        * 1e6
+    )
+
+    dicts_s = min(
+        timeit.repeat(lambda: dicts_hourly_means(history), number=1, repeat=3)
+    )
+    resample_s = min(
+        timeit.repeat(
+            lambda: recorder.resample(
+                "current_temperature", 3600, START, START + 86400
+            ),
+            number=1,
+            repeat=3,
+        )
+    )
+    aggregate_s = min(
+        timeit.repeat(
+            lambda: recorder.aggregate("current_temperature"), number=1, repeat=3
+        )
+    )
+
+    print("{} devices x {} readings".format(count, readings))
+    print(
+        "memory : dicts {:.1f} MB, TelemetryRecorder {:.1f} MB".format(
+            dicts_bytes / 1e6, recorder.memory_bytes / 1e6
+        )
+    )
+    print("record per refresh : {:.2f} us".format(record_us))
+    print(
+        "hourly means : dicts {:.1f} ms, resample {:.1f} ms".format(
+            dicts_s * 1e3, resample_s * 1e3
+        )
+    )
+    print("min/max/mean of all devices : {:.1f} ms".format(aggregate_s * 1e3))
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1440,
+    )
@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+"""Write and scan cost of durable devices telemetry
+
+Write D days of readings of N simulated devices (one every 10 minutes, in 10
+installations) as JSON lines and in a TelemetryStore, then read all readings of
+one installation over the last 30 days from both.
+
+Usage: python3 benchmarks/bench_telemetry_store.py [N] [D]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from AirzoneCloud.DeviceState import DeviceState
+from AirzoneCloud.TelemetryStore import TelemetryStore
+
+PERIOD = 600
+
+
+def new_device(index: int) -> SimpleNamespace:
+    """Return a fake device of one of 10 installations"""
+    installation = SimpleNamespace(id="installation{}".format(index % 10))
+    return SimpleNamespace(
+        id="device{}".format(index),
+        name="Zone {}".format(index),
+        group=SimpleNamespace(installation=installation),
+    )
+
+
+def main(count: int, days: int) -> None:
+    devices = [new_device(index) for index in range(count)]
+    state = DeviceState()
+    state.is_connected = True
+    state.current_temperature = 20.5
+    state.target_temperature = 21.0
+    state.current_humidity = 45
+    end = time.time()
+    start = end - days * 86400
+    timestamps = [start + step * PERIOD for step in range(days * 86400 // PERIOD)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        jsonl_path = os.path.join(directory, "readings.jsonl")
+        began = time.perf_counter()
+        with open(jsonl_path, "w") as file:
+            for timestamp in timestamps:
+                for device in devices:
+                    file.write(
+                        json.dumps(
+                            {
+                                "time": timestamp,
+                                "device_id": device.id,
+                                "installation_id": device.group.installation.id,
+                                "current_temperature": state.current_temperature,
+                                "target_temperature": state.target_temperature,
+                                "current_humidity": state.current_humidity,
+                                "is_on": state.is_on,
+                                "mode_id": state.mode_id,
+                                "is_connected": state.is_connected,
+                            }
+                        )
+                        + "\n"
+                    )
+        jsonl_write = time.perf_counter() - began
+
+        store = TelemetryStore(os.path.join(directory, "store"))
+        began = time.perf_counter()
+        for timestamp in timestamps:
+            for device in devices:
+                store.record(device, state, timestamp)
+        store.flush()
+        store_write = time.perf_counter() - began
+        store_bytes = sum(
+            os.path.getsize(os.path.join(directory, "store", "raw", filename))
+            for filename in os.listdir(os.path.join(directory, "store", "raw"))
+        )
+
+        since = end - 30 * 86400
+        began = time.perf_counter()
+        readings = []
+        with open(jsonl_path, "r") as file:
+            for line in file:
+                reading = json.loads(line)
+                if (
+                    reading["installation_id"] == "installation0"
+                    and reading["time"] >= since
+                ):
+                    readings.append(reading)
+        jsonl_scan = time.perf_counter() - began
+
+        began = time.perf_counter()
+        records = store.query(start=since, installation_id="installation0")
+        store_scan = time.perf_counter() - began
+
+        print(
+            "{} devices x {} days : {} readings".format(
+                count, days, len(timestamps) * count
+            )
+        )
+        print(
+            "write : jsonl {:.2f} s ({:.1f} MB), TelemetryStore {:.2f} s ({:.1f} MB)".format(
+                jsonl_write,
+                os.path.getsize(jsonl_path) / 1e6,
+                store_write,
+                store_bytes / 1e6,
+            )
+        )
+        print(
+            "installation over 30 days ({} readings) : jsonl {:.2f} s, TelemetryStore {:.3f} s".format(
+                len(records), jsonl_scan, store_scan
+            )
+        )
+        assert len(readings) == len(records)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 60,
+    )
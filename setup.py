@@ -15,11 +15,17 @@ setuptools.setup(
     keywords=["airzone", "airzonecloud", "api"],
     packages=["AirzoneCloud"],
     install_requires=["requests"],
+    extras_require={
+        "async": ["aiohttp"],
+        "realtime": ["websocket-client"],
+        "telemetry": ["numpy"],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",  # Chose either "3 - Alpha", "4 - Beta" or "5 - Production/Stable" as the current state of your package
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires=">=3.5",
+    entry_points={"console_scripts": ["airzonecloud=AirzoneCloud.cli:main"]},
+    python_requires=">=3.7",
 )
@@ -0,0 +1,225 @@
+import os
+import tempfile
+import time
+import unittest
+
+from AirzoneCloud.AirzoneCloud import AirzoneCloud
+from AirzoneCloud.MockServer import MockServer
+from AirzoneCloud.RetryPolicy import RetryPolicy
+
+
+class LazyIterationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # 3 pages of installations
+        self.server = MockServer(installations=25, devices_per_group=2).start()
+        self.addCleanup(self.server.stop)
+        self.api = AirzoneCloud(
+            "user@example.com", "password", api_url=self.server.url, lazy=True
+        )
+        self.addCleanup(self.api.close)
+
+    def test_iteration_stopped_early_is_memoized(self) -> None:
+        for device in self.api.iter_devices():
+            break
+        self.assertEqual(self.server.requests_counts["GET /installations"], 1)
+
+        self.assertIs(self.api.get_device(device.id), device)
+        self.assertIs(self.api.installations[0].groups[0].devices[0], device)
+        self.assertEqual(len(self.api.installations), 25)
+        self.assertEqual(len(self.api.all_devices), 25 * 2)
+        self.assertEqual(self.server.requests_counts["GET /installations"], 3)
+        self.assertEqual(self.server.requests_counts["GET /installations/{id}"], 25)
+
+    def test_iterations_resume_received_pages(self) -> None:
+        first = next(self.api.iter_installations())
+        installations = list(self.api.iter_installations())
+
+        self.assertIs(installations[0], first)
+        self.assertEqual(len(installations), 25)
+        self.assertEqual(self.server.requests_counts["GET /installations"], 3)
+        self.assertIs(
+            self.api.get_installation(installations[-1].id), installations[-1]
+        )
+
+    def test_failed_page_is_requested_again(self) -> None:
+        first = next(self.api.iter_installations())
+        self.server.fail_next(404, "GET", "/installations")
+        with self.assertRaises(Exception):
+            list(self.api.iter_installations())
+
+        installations = self.api.installations
+        self.assertIs(installations[0], first)
+        self.assertEqual(
+            [installation.id for installation in installations],
+            [
+                installation.id
+                for installation in self.api.refresh_installations().installations
+            ],
+        )
+        self.assertEqual(len(installations), 25)
+
+
+class PaginationTest(unittest.TestCase):
+    def test_all_pages_are_loaded(self) -> None:
+        # 2 full pages and a partial one
+        server = MockServer(installations=25).start()
+        self.addCleanup(server.stop)
+        api = AirzoneCloud("user@example.com", "password", api_url=server.url)
+        self.addCleanup(api.close)
+
+        ids = [installation.id for installation in api.installations]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+        self.assertEqual(server.requests_counts["GET /installations"], 3)
+
+
+class RequestsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(devices_per_group=2).start()
+        self.addCleanup(self.server.stop)
+        self.api = AirzoneCloud(
+            "user@example.com",
+            "password",
+            api_url=self.server.url,
+            retry_policy=RetryPolicy(backoff_factor=0.01),
+        )
+        self.addCleanup(self.api.close)
+        self.device = self.api.all_devices[0]
+        self.server.reset_counts()
+
+    def test_failed_get_is_retried(self) -> None:
+        self.server.fail_next(503, "GET", "/devices/{id}/status", count=2)
+        self.device.refresh()
+        self.assertEqual(self.server.requests_counts["GET /devices/{id}/status"], 3)
+        endpoint = self.api.metrics.as_dict()["endpoints"]["GET /devices/{id}/status"]
+        self.assertEqual(endpoint["retries"], 2)
+        self.assertEqual(endpoint["statuses"]["503"], 2)
+
+    def test_retry_after_is_waited(self) -> None:
+        self.server.fail_next(429, "GET", "/devices/{id}/status", retry_after=0.5)
+        began = time.monotonic()
+        self.device.refresh()
+        self.assertGreaterEqual(time.monotonic() - began, 0.5)
+        self.assertEqual(self.server.requests_counts["GET /devices/{id}/status"], 2)
+
+    def test_retries_are_limited(self) -> None:
+        self.server.fail_next(503, "GET", "/devices/{id}/status", count=10)
+        with self.assertRaises(Exception):
+            self.device.refresh()
+        self.assertEqual(self.server.requests_counts["GET /devices/{id}/status"], 4)
+
+    def test_patch_is_not_retried_on_503(self) -> None:
+        self.server.fail_next(503, "PATCH")
+        with self.assertRaises(Exception):
+            self.device.turn_off(auto_refresh=False)
+        self.assertEqual(self.server.requests_counts["PATCH /devices/{id}"], 1)
+
+    def test_patch_is_retried_on_429(self) -> None:
+        self.server.fail_next(429, "PATCH", retry_after=0)
+        self.device.turn_off(auto_refresh=False)
+        self.assertEqual(self.server.requests_counts["PATCH /devices/{id}"], 2)
+
+    def test_relogin_after_token_expired(self) -> None:
+        self.server.expire_tokens()
+        self.device.refresh()
+        self.assertEqual(self.server.requests_counts["POST /auth/login"], 1)
+        # the unauthorized request is sent again with the new token
+        self.assertEqual(self.server.requests_counts["GET /devices/{id}/status"], 2)
+        self.assertEqual(self.api.metrics.as_dict()["relogins"], 1)
+
+
+class TokenExpiryTest(unittest.TestCase):
+    def test_token_about_to_expire_is_renewed_before_request(self) -> None:
+        # tokens are renewed 60s before their expiry: this one after 1s
+        server = MockServer(token_ttl=61).start()
+        self.addCleanup(server.stop)
+        api = AirzoneCloud("user@example.com", "password", api_url=server.url)
+        self.addCleanup(api.close)
+        device = api.all_devices[0]
+
+        time.sleep(1.1)
+        server.reset_counts()
+        device.refresh()
+        self.assertEqual(
+            server.requests_counts,
+            {"POST /auth/login": 1, "GET /devices/{id}/status": 1},
+        )
+        self.assertEqual(api.metrics.as_dict()["relogins"], 0)
+
+
+class StateCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(devices_per_group=2).start()
+        self.addCleanup(self.server.stop)
+        self.api = AirzoneCloud(
+            "user@example.com",
+            "password",
+            api_url=self.server.url,
+            lazy=True,
+            state_ttl=0.3,
+            state_stale_ttl=0.3,
+        )
+        self.addCleanup(self.api.close)
+        self.device = self.api.all_devices[0]
+
+    def status_requests(self) -> int:
+        return self.server.requests_counts.get("GET /devices/{id}/status", 0)
+
+    def test_states_are_cached_during_ttl(self) -> None:
+        self.device.refresh()
+        self.device.refresh()
+        self.assertEqual(self.status_requests(), 1)
+        self.assertEqual(
+            self.api.state_cache_stats, {"hits": 1, "stale_hits": 0, "misses": 1}
+        )
+
+        # expired since more than state_stale_ttl: refreshed at once
+        time.sleep(0.65)
+        self.device.refresh()
+        self.assertEqual(self.status_requests(), 2)
+        self.assertEqual(self.api.state_cache_stats["misses"], 2)
+
+    def test_stale_states_are_revalidated_in_background(self) -> None:
+        self.device.refresh()
+        time.sleep(0.35)
+        # the expired state is served, then refreshed in background
+        self.device.refresh()
+        self.assertEqual(self.api.state_cache_stats["stale_hits"], 1)
+
+        deadline = time.monotonic() + 5
+        while self.status_requests() < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.status_requests(), 2)
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_restore_sends_no_request(self) -> None:
+        server = MockServer(installations=2, devices_per_group=2).start()
+        self.addCleanup(server.stop)
+        api = AirzoneCloud("user@example.com", "password", api_url=server.url)
+        self.addCleanup(api.close)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "snapshot.json")
+        api.save_snapshot(path)
+        server.reset_counts()
+
+        restored = AirzoneCloud.from_snapshot(
+            path, "user@example.com", "password", revalidate=False, api_url=server.url
+        )
+        self.addCleanup(restored.close)
+        self.assertEqual(
+            [
+                (device.id, device.name, device.is_on, device.target_temperature)
+                for device in restored.all_devices
+            ],
+            [
+                (device.id, device.name, device.is_on, device.target_temperature)
+                for device in api.all_devices
+            ],
+        )
+        self.assertEqual(server.requests_counts, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
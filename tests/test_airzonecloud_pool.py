@@ -0,0 +1,50 @@
+import unittest
+
+from AirzoneCloud.AirzoneCloudPool import AirzoneCloudPool
+from AirzoneCloud.MockServer import MockServer
+
+
+class PoolRefreshTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.large_server = MockServer(devices_per_group=10).start()
+        self.addCleanup(self.large_server.stop)
+        self.small_server = MockServer(devices_per_group=2).start()
+        self.addCleanup(self.small_server.stop)
+        # a single thread refreshes devices one by one
+        self.pool = AirzoneCloudPool(max_workers=1, lazy=True)
+        self.addCleanup(self.pool.close)
+        self.large = self.pool.add_account(
+            "large@example.com", "password", api_url=self.large_server.url
+        )
+        self.small = self.pool.add_account(
+            "small@example.com", "password", api_url=self.small_server.url
+        )
+
+    def test_accounts_are_interleaved(self) -> None:
+        self.pool.refresh_all_devices()
+        self.assertEqual(self.pool.refresh_errors, {})
+
+        devices = sorted(
+            self.pool.all_devices, key=lambda device: device._state_refreshed_at
+        )
+        self.assertEqual(len(devices), 12)
+        self.assertEqual(
+            [device._api for device in devices[:4]],
+            [self.large, self.small, self.large, self.small],
+        )
+        self.assertEqual(
+            self.small_server.requests_counts["GET /devices/{id}/status"], 2
+        )
+        self.assertEqual(
+            self.large_server.requests_counts["GET /devices/{id}/status"], 10
+        )
+
+    def test_metrics_are_shared(self) -> None:
+        self.pool.refresh_all_devices()
+        endpoint = self.pool.metrics.as_dict()["endpoints"]["GET /devices/{id}/status"]
+        self.assertEqual(endpoint["count"], 12)
+        self.assertEqual(self.pool.metrics.as_dict()["logins"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import asyncio
+import time
+import unittest
+
+import aiohttp
+
+from AirzoneCloud.AirzoneCloud import AirzoneCloud
+from AirzoneCloud.AirzoneCloudBase import AirzoneCloudBase
+from AirzoneCloud.AsyncAirzoneCloud import AsyncAirzoneCloud
+from AirzoneCloud.Device import Device
+from AirzoneCloud.DeviceBase import DeviceBase
+from AirzoneCloud.MockServer import MockServer
+from AirzoneCloud.RetryPolicy import RetryPolicy
+
+
+class AsyncAirzoneCloudTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(
+            installations=1, groups_per_installation=4, devices_per_group=5
+        ).start()
+        self.addCleanup(self.server.stop)
+
+    def run_with_api(self, coroutine_function, **kwargs) -> None:
+        async def run():
+            async with AsyncAirzoneCloud(
+                "user@example.com", "password", api_url=self.server.url, **kwargs
+            ) as api:
+                await coroutine_function(api)
+
+        asyncio.run(run())
+
+    def test_expired_token_is_renewed_once_by_concurrent_requests(self) -> None:
+        async def check(api):
+            self.server.expire_tokens().reset_counts()
+            await api.refresh_all_devices()
+            self.assertEqual(api.refresh_errors, {})
+            self.assertEqual(self.server.requests_counts["POST /auth/login"], 1)
+            self.assertEqual(api.metrics.as_dict()["relogins"], 1)
+
+        self.run_with_api(check)
+
+    def test_failed_requests_are_retried(self) -> None:
+        async def check(api):
+            device = api.all_devices[0]
+            self.server.reset_counts()
+            self.server.fail_next(503, "GET", "/devices/{id}/status", count=2)
+            self.server.fail_next(429, "PATCH", retry_after=0.2)
+            await device.refresh()
+            began = time.monotonic()
+            await device.turn_off(auto_refresh=False)
+            self.assertGreaterEqual(time.monotonic() - began, 0.2)
+
+            self.assertEqual(self.server.requests_counts["GET /devices/{id}/status"], 3)
+            self.assertEqual(self.server.requests_counts["PATCH /devices/{id}"], 2)
+            endpoints = api.metrics.as_dict()["endpoints"]
+            self.assertEqual(endpoints["GET /devices/{id}/status"]["retries"], 2)
+
+        self.run_with_api(check, retry_policy=RetryPolicy(backoff_factor=0.01))
+
+    def test_patch_is_not_retried_on_503(self) -> None:
+        async def check(api):
+            self.server.reset_counts()
+            self.server.fail_next(503, "PATCH")
+            with self.assertRaises(aiohttp.ClientResponseError):
+                await api.all_devices[0].turn_off(auto_refresh=False)
+            self.assertEqual(self.server.requests_counts["PATCH /devices/{id}"], 1)
+
+        self.run_with_api(check, retry_policy=RetryPolicy(backoff_factor=0.01))
+
+    def test_token_about_to_expire_is_renewed_before_request(self) -> None:
+        server = MockServer(token_ttl=61).start()
+        self.addCleanup(server.stop)
+        self.server = server
+
+        async def check(api):
+            # tokens are renewed 60s before their expiry: this one after 1s
+            await asyncio.sleep(1.1)
+            server.reset_counts()
+            await api.all_devices[0].refresh()
+            self.assertEqual(
+                server.requests_counts,
+                {"POST /auth/login": 1, "GET /devices/{id}/status": 1},
+            )
+            self.assertEqual(api.metrics.as_dict()["relogins"], 0)
+
+        self.run_with_api(check)
+
+    def test_requests_are_rate_limited(self) -> None:
+        async def check(api):
+            began = time.monotonic()
+            await api.refresh_all_devices()
+            # 20 devices at 50 requests per second, after a burst of 5
+            self.assertGreaterEqual(time.monotonic() - began, 0.25)
+
+        self.run_with_api(check, rate_limit=50, rate_burst=5)
+
+    def test_tree_is_shared_with_sync_api(self) -> None:
+        async def check(api):
+            self.assertNotIsInstance(api, AirzoneCloud)
+            self.assertIsInstance(api, AirzoneCloudBase)
+            self.assertIsInstance(api.all_devices[0], DeviceBase)
+            self.assertNotIsInstance(api.all_devices[0], Device)
+            # sync lookups work on the loaded tree
+            device = api.all_devices[0]
+            self.assertIs(api.get_device(device.id), device)
+            self.assertEqual(api.find_devices(name=device.name), [device])
+
+        self.run_with_api(check)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import contextlib
+import io
+import json
+import unittest
+
+from AirzoneCloud.MockServer import MockServer
+from AirzoneCloud.cli import main
+
+
+class CliTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(devices_per_group=3).start()
+        self.addCleanup(self.server.stop)
+
+    def run_cli(self, *args: str) -> "tuple[int, list[dict]]":
+        """Run the command line, return exit code & printed json lines"""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            code = main(
+                [
+                    "--email",
+                    "user@example.com",
+                    "--password",
+                    "password",
+                    "--api-url",
+                    self.server.url,
+                    "--token-file",
+                    "",
+                ]
+                + list(args)
+            )
+        return code, [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_set_sends_commands_together_and_confirms(self) -> None:
+        code, lines = self.run_cli(
+            "set", "Zone 1.2", "--on", "--temperature", "23", "--confirm-timeout", "5"
+        )
+
+        self.assertEqual(code, 0)
+        self.assertEqual(
+            (lines[0]["is_on"], lines[0]["target_temperature"]), (True, 23)
+        )
+        self.assertEqual(self.server.requests_counts["PATCH /devices/{id}"], 2)
+
+    def test_watch_adaptive_stops_after_count_polls(self) -> None:
+        code, lines = self.run_cli(
+            "watch",
+            "Zone 1.1",
+            "Zone 1.3",
+            "--adaptive",
+            "--interval",
+            "1",
+            "--count",
+            "2",
+        )
+
+        self.assertEqual(code, 0)
+        # initial states + 2 polls of the 2 selected devices only
+        self.assertGreaterEqual(
+            self.server.requests_counts["GET /devices/{id}/status"], 4
+        )
+        self.assertLessEqual(self.server.requests_counts["GET /devices/{id}/status"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import threading
+import time
+import unittest
+
+from AirzoneCloud.AirzoneCloud import AirzoneCloud
+from AirzoneCloud.MockServer import MockServer
+
+
+class CommandQueueTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(devices_per_group=2).start()
+        self.addCleanup(self.server.stop)
+        self.api = AirzoneCloud(
+            "user@example.com",
+            "password",
+            api_url=self.server.url,
+            commands_window=0.3,
+        )
+        self.addCleanup(self.api.close)
+        self.device = self.api.all_devices[0]
+
+    def wait_for(self, condition, timeout: float = 5) -> None:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("condition not met after {}s".format(timeout))
+            time.sleep(0.05)
+
+    def test_setters_with_auto_refresh_are_coalesced(self) -> None:
+        self.server.reset_counts()
+        began = time.monotonic()
+        for temperature in (20, 20.5, 21, 21.5):
+            self.device.set_temperature(temperature)
+        self.assertLess(time.monotonic() - began, 0.3)
+
+        # only the last value is sent, then the device is refreshed
+        self.wait_for(lambda: self.device.target_temperature == 21.5)
+        self.assertEqual(self.server.requests_counts["PATCH /devices/{id}"], 1)
+        self.assertEqual(self.server.requests_counts["GET /devices/{id}/status"], 1)
+
+    def test_timer_flush_errors_are_exposed(self) -> None:
+        self.server.fail_next(500, "PATCH")
+        self.device.turn_on(auto_refresh=False)
+        self.wait_for(lambda: self.api.commands_errors)
+        self.assertEqual(list(self.api.commands_errors), [self.device.id])
+
+        self.device.turn_on(auto_refresh=False)
+        self.wait_for(lambda: self.api._command_queue.pending_count == 0)
+        self.wait_for(lambda: not self.api.commands_errors)
+
+    def test_batch_sends_pending_commands_of_its_devices(self) -> None:
+        other = self.api.all_devices[1]
+        self.device.set_temperature(20, auto_refresh=False)
+        other.set_temperature(20, auto_refresh=False)
+        self.server.reset_counts()
+
+        with self.api._command_queue.batch():
+            self.device.turn_on(auto_refresh=False)
+
+        self.assertEqual(self.server.requests_counts["PATCH /devices/{id}"], 2)
+        self.assertEqual(self.api._command_queue.pending_count, 1)
+
+
+class CommandQueueBatchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(devices_per_group=2).start()
+        self.addCleanup(self.server.stop)
+        self.api = AirzoneCloud("user@example.com", "password", api_url=self.server.url)
+        self.addCleanup(self.api.close)
+
+    def test_command_without_window_doesnt_send_batch_of_other_thread(self) -> None:
+        first, second = self.api.all_devices
+        queue = self.api._command_queue
+        in_batch = threading.Event()
+        end_batch = threading.Event()
+
+        def run_batch():
+            with queue.batch():
+                first.turn_on(auto_refresh=False)
+                first.set_temperature(22, auto_refresh=False)
+                in_batch.set()
+                end_batch.wait(5)
+
+        batch_thread = threading.Thread(target=run_batch)
+        batch_thread.start()
+        self.assertTrue(in_batch.wait(5))
+        self.server.reset_counts()
+
+        second.turn_off(auto_refresh=False)
+        self.assertEqual(self.server.requests_counts["PATCH /devices/{id}"], 1)
+
+        end_batch.set()
+        batch_thread.join(5)
+        self.assertEqual(self.server.requests_counts["PATCH /devices/{id}"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import logging
+import unittest
+
+from AirzoneCloud.AirzoneCloud import AirzoneCloud
+from AirzoneCloud.MockServer import MockServer
+
+
+class DeviceConfirmTest(unittest.TestCase):
+    def new_api(self, apply_delay: float) -> AirzoneCloud:
+        server = MockServer(devices_per_group=1, apply_delay=apply_delay).start()
+        self.addCleanup(server.stop)
+        api = AirzoneCloud("user@example.com", "password", api_url=server.url)
+        self.addCleanup(api.close)
+        return api
+
+    def test_setpoint_one_step_away_is_not_confirmed_before_applied(self) -> None:
+        device = self.new_api(apply_delay=5).all_devices[0]
+        previous = device.target_temperature
+        target = previous + device.step_temperature
+
+        device.set_temperature(target, confirm_timeout=1)
+
+        self.assertFalse(device.last_confirmed)
+        self.assertEqual(device.target_temperature, previous)
+
+    def test_setpoint_applied_late_is_confirmed(self) -> None:
+        device = self.new_api(apply_delay=0.5).all_devices[0]
+        target = device.target_temperature + device.step_temperature
+
+        device.set_temperature(target, confirm_timeout=5)
+
+        self.assertTrue(device.last_confirmed)
+        self.assertEqual(device.target_temperature, target)
+
+
+class DeviceChangesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(devices_per_group=2).start()
+        self.addCleanup(self.server.stop)
+        self.api = AirzoneCloud("user@example.com", "password", api_url=self.server.url)
+        self.addCleanup(self.api.close)
+
+    def test_rename_on_groups_refresh_is_notified(self) -> None:
+        device = self.api.all_devices[0]
+        old_name = device.name
+        changes = []
+        self.api.subscribe(changes.extend)
+
+        self.server.rename_device(device.id, "Renamed")
+        self.api.installations[0].refresh_groups()
+
+        self.assertEqual(
+            [
+                (change.device, change.field, change.old, change.new)
+                for change in changes
+            ],
+            [(device, "name", old_name, "Renamed")],
+        )
+
+
+class DeviceLoggingTest(unittest.TestCase):
+    def test_commands_logs_dont_load_lazy_state(self) -> None:
+        server = MockServer(devices_per_group=1).start()
+        self.addCleanup(server.stop)
+        api = AirzoneCloud(
+            "user@example.com", "password", api_url=server.url, lazy=True
+        )
+        self.addCleanup(api.close)
+        device = api.all_devices[0]
+        server.reset_counts()
+
+        with self.assertLogs("AirzoneCloud", logging.DEBUG) as logs:
+            device.turn_on(auto_refresh=False)
+            device.turn_off(auto_refresh=False)
+
+        self.assertIn("turn_on", logs.output[0])
+        self.assertNotIn("GET /devices/{id}/status", server.requests_counts)
+
+
+if __name__ == "__main__":
+    unittest.main()
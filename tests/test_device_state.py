@@ -0,0 +1,63 @@
+import unittest
+
+from AirzoneCloud.DeviceState import DeviceState
+
+
+def celsius(value: float) -> dict:
+    return {"celsius": value, "fah": round(value * 9 / 5 + 32)}
+
+
+RAW_STATUS = {
+    "isConnected": True,
+    "power": True,
+    "mode": 3,
+    "mode_available": [2, 3],
+    "local_temp": celsius(22),
+    "humidity": 40,
+    "step": celsius(0.5),
+    "setpoint_air_heat": celsius(21),
+    "range_sp_hot_air_min": celsius(15),
+    "range_sp_hot_air_max": celsius(30),
+    "setpoint_air_cool": celsius(25),
+    "range_sp_cool_air_min": celsius(18),
+    "range_sp_cool_air_max": celsius(32),
+}
+
+
+class DeviceStateTest(unittest.TestCase):
+    def test_mode_only_patch_uses_new_mode_setpoint_and_range(self) -> None:
+        base = DeviceState.parse(RAW_STATUS)
+        self.assertEqual(
+            (base.target_temperature, base.min_temperature, base.max_temperature),
+            (21.0, 15.0, 30.0),
+        )
+
+        state = DeviceState.parse({"mode": 2}, base)
+
+        self.assertEqual(
+            (state.target_temperature, state.min_temperature, state.max_temperature),
+            (25.0, 18.0, 32.0),
+        )
+        self.assertEqual(state.current_temperature, 22.0)
+
+    def test_setpoint_patch_is_kept_on_mode_change(self) -> None:
+        base = DeviceState.parse(RAW_STATUS)
+
+        state = DeviceState.parse({"setpoint_air_cool": celsius(24)}, base)
+        self.assertEqual(state.target_temperature, 21.0)
+        state = DeviceState.parse({"mode": 2}, state)
+        self.assertEqual(state.target_temperature, 24.0)
+        state = DeviceState.parse({"mode": 3}, state)
+        self.assertEqual(state.target_temperature, 21.0)
+
+    def test_to_raw_round_trip_keeps_all_modes(self) -> None:
+        base = DeviceState.parse(RAW_STATUS)
+
+        state = DeviceState.parse(base.to_raw())
+
+        self.assertEqual(state, base)
+        self.assertEqual(DeviceState.parse({"mode": 2}, state).target_temperature, 25.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
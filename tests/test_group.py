@@ -0,0 +1,71 @@
+import unittest
+
+from AirzoneCloud.AirzoneCloud import AirzoneCloud
+from AirzoneCloud.MockServer import MockServer
+
+
+class GroupRefreshTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(devices_per_group=2).start()
+        self.addCleanup(self.server.stop)
+        self.api = AirzoneCloud("user@example.com", "password", api_url=self.server.url)
+        self.addCleanup(self.api.close)
+        self.installation = self.api.installations[0]
+        self.group = self.installation.groups[0]
+
+    def check_refreshed(self, refresh) -> None:
+        device = self.group.devices[0]
+        old_name = device.name
+        self.server.rename_device(device.id, "Renamed")
+        added_id = self.server.add_device(self.group.id, name="Added")
+
+        refresh()
+
+        self.assertEqual(device.name, "Renamed")
+        self.assertEqual(self.api.find_devices(name="Renamed"), [device])
+        self.assertEqual(self.api.find_devices(name=old_name), [])
+        # existing devices are kept, new ones are indexed
+        self.assertIs(self.group.devices[0], device)
+        added = self.api.get_device(added_id)
+        self.assertIsNotNone(added)
+        self.assertIn(added, self.group.devices)
+        self.assertEqual(self.api.find_devices(name="Added"), [added])
+
+    def test_refresh_groups_reloads_devices(self) -> None:
+        self.check_refreshed(self.installation.refresh_groups)
+
+    def test_refresh_installations_reloads_devices(self) -> None:
+        self.check_refreshed(self.api.refresh_installations)
+
+
+class GroupCommandsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(devices_per_group=2).start()
+        self.addCleanup(self.server.stop)
+        # commands would wait 5s in the queue if groups didn't send them
+        self.api = AirzoneCloud(
+            "user@example.com",
+            "password",
+            api_url=self.server.url,
+            commands_window=5,
+        )
+        self.addCleanup(self.api.close)
+        self.group = self.api.installations[0].groups[0]
+
+    def test_set_mode_is_sent_before_refresh(self) -> None:
+        self.group.set_mode("cooling", delay_refresh=0)
+
+        self.assertEqual(self.server.requests_counts["PATCH /devices/{id}"], 1)
+        self.assertEqual(
+            [device.mode for device in self.group.devices], ["cooling", "cooling"]
+        )
+
+    def test_set_mode_is_confirmed(self) -> None:
+        self.group.set_mode("cooling", confirm_timeout=2)
+
+        self.assertTrue(self.group.last_confirmed)
+        self.assertEqual(self.group.mode, "cooling")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from AirzoneCloud.AirzoneCloud import AirzoneCloud
+from AirzoneCloud.MockServer import MockServer
+from AirzoneCloud.RetryPolicy import RetryPolicy
+
+
+class PrometheusExportTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(devices_per_group=2).start()
+        self.addCleanup(self.server.stop)
+        self.api = AirzoneCloud(
+            "user@example.com",
+            "password",
+            api_url=self.server.url,
+            retry_policy=RetryPolicy(backoff_factor=0.01),
+        )
+        self.addCleanup(self.api.close)
+
+    def test_requests_are_exported(self) -> None:
+        self.api.metrics.reset()
+        self.server.fail_next(503, "GET", "/devices/{id}/status")
+        self.api.all_devices[0].refresh()
+        lines = self.api.metrics.to_prometheus(labels={"account": "a"}).splitlines()
+
+        labels = 'account="a",method="GET",endpoint="/devices/{id}/status"'
+        for line in (
+            "# TYPE airzonecloud_requests_total counter",
+            'airzonecloud_requests_total{%s,status="200"} 1' % labels,
+            'airzonecloud_requests_total{%s,status="503"} 1' % labels,
+            "# TYPE airzonecloud_request_duration_seconds histogram",
+            'airzonecloud_request_duration_seconds_bucket{%s,le="+Inf"} 2' % labels,
+            "airzonecloud_request_duration_seconds_count{%s} 2" % labels,
+            "airzonecloud_retries_total{%s} 1" % labels,
+            'airzonecloud_logins_total{account="a"} 0',
+        ):
+            self.assertIn(line, lines)
+
+    def test_bucket_counts_are_cumulative(self) -> None:
+        for device in self.api.all_devices:
+            device.refresh()
+        counts = [
+            float(line.rsplit(" ", 1)[1])
+            for line in self.api.metrics.to_prometheus().splitlines()
+            if line.startswith("airzonecloud_request_duration_seconds_bucket{")
+            and "/devices/{id}/status" in line
+        ]
+        self.assertEqual(counts, sorted(counts))
+        self.assertEqual(counts[-1], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+from AirzoneCloud.AirzoneCloud import AirzoneCloud
+from AirzoneCloud.MockServer import MockServer
+from AirzoneCloud.PollScheduler import PollScheduler
+
+
+class PollSchedulerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(devices_per_group=3).start()
+        self.addCleanup(self.server.stop)
+        self.api = AirzoneCloud("user@example.com", "password", api_url=self.server.url)
+        self.addCleanup(self.api.close)
+
+    def test_only_selected_devices_are_polled(self) -> None:
+        devices = self.api.all_devices
+        selected = [devices[0], devices[2].id]
+
+        with PollScheduler(self.api, devices=selected) as scheduler:
+            self.assertEqual(
+                [device for device in devices if scheduler.get_interval(device)],
+                [devices[0], devices[2]],
+            )
+            self.assertEqual(
+                scheduler.sync_devices()._entries.keys(),
+                {
+                    devices[0].id,
+                    devices[2].id,
+                },
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import logging
+import time
+import unittest
+
+from AirzoneCloud.AirzoneCloud import AirzoneCloud
+from AirzoneCloud.MockServer import MockServer
+
+
+class RealtimeListenerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockServer(
+            devices_per_group=2, ping_interval=0.3, ping_timeout=0.3
+        ).start()
+        self.addCleanup(self.server.stop)
+        self.api = AirzoneCloud("user@example.com", "password", api_url=self.server.url)
+        self.addCleanup(self.api.close)
+        self.device = self.api.all_devices[0]
+        self.listener = self.api.listen_realtime(
+            poll_interval=5, url=self.server.websocket_url, reconnect_delay=0.1
+        )
+        self.addCleanup(self.listener.stop)
+        self.wait_for(lambda: self.listener.is_connected)
+        self.server.reset_counts()
+
+    def wait_for(self, condition, timeout: float = 5) -> None:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("condition not met after {}s".format(timeout))
+            time.sleep(0.05)
+
+    def test_pushed_updates_patch_states(self) -> None:
+        # changed by another client
+        other = AirzoneCloud("user@example.com", "password", api_url=self.server.url)
+        self.addCleanup(other.close)
+        other.get_device(self.device.id).set_temperature(22, auto_refresh=False)
+        self.server.reset_counts()
+        self.wait_for(lambda: self.device.target_temperature == 22)
+
+        is_on = not self.device.is_on
+        self.server.push_update(self.device.id, {"power": is_on})
+        self.wait_for(lambda: self.device.is_on == is_on)
+        self.assertNotIn("GET /devices/{id}/status", self.server.requests_counts)
+
+    def test_pings_while_updates_keep_coming(self) -> None:
+        # updates every 0.05s never let recv() time out
+        deadline = time.monotonic() + 1.5
+        temperature = 20
+        while time.monotonic() < deadline:
+            temperature = 21 if temperature == 20 else 20
+            self.server.push_update(
+                self.device.id, {"setpoint_air_heat": {"celsius": temperature}}
+            )
+            time.sleep(0.05)
+
+        self.assertGreaterEqual(self.server.requests_counts.get("WS ping", 0), 3)
+        self.assertNotIn("GET /websockets", self.server.requests_counts)
+        self.assertTrue(self.listener.is_connected)
+
+    def test_reconnects_after_disconnection(self) -> None:
+        self.server.disconnect_websockets()
+        self.wait_for(lambda: self.server.requests_counts.get("GET /websockets"))
+        self.wait_for(lambda: self.listener.is_connected)
+
+        is_on = not self.device.is_on
+        self.server.push_update(self.device.id, {"power": is_on})
+        self.wait_for(lambda: self.device.is_on == is_on)
+
+    def test_stop_is_not_a_disconnection(self) -> None:
+        with self.assertNoLogs("AirzoneCloud.RealtimeListener", logging.WARNING):
+            self.listener.stop()
+        self.assertFalse(self.listener.is_connected)
+
+
+if __name__ == "__main__":
+    unittest.main()
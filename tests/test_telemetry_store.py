@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from AirzoneCloud.AirzoneCloud import AirzoneCloud
+from AirzoneCloud.MockServer import MockServer
+from AirzoneCloud.TelemetryStore import TelemetryStore
+
+
+class TelemetryStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        server = MockServer(devices_per_group=5).start()
+        self.addCleanup(server.stop)
+        self.api = AirzoneCloud("user@example.com", "password", api_url=server.url)
+        self.addCleanup(self.api.close)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def open_store(self) -> TelemetryStore:
+        store = TelemetryStore(self.directory.name, flush_records=1000)
+        self.addCleanup(store.close)
+        return store
+
+    def test_new_devices_are_written_once_on_flush(self) -> None:
+        store = self.open_store()
+        devices = self.api.all_devices
+        path = os.path.join(self.directory.name, "devices.json")
+
+        with mock.patch.object(
+            store, "_write_devices", wraps=store._write_devices
+        ) as write_devices:
+            for device in devices:
+                store.record(device)
+            self.assertFalse(os.path.exists(path))
+            store.flush()
+            store.flush()
+        self.assertEqual(write_devices.call_count, 1)
+
+        with open(path) as file:
+            self.assertEqual(
+                [device["id"] for device in json.load(file)],
+                [device.id for device in devices],
+            )
+        store.close()
+        self.assertEqual(self.open_store().devices, store.devices)
+
+    def test_readings_flushed_during_rollup_are_kept(self) -> None:
+        store = self.open_store()
+        device = self.api.all_devices[0]
+        day_ago = time.time() - 86400
+        for offset in range(10):
+            store.record(device, timestamp=day_ago + offset)
+        store.flush()
+        downsample = store._downsample
+        writers = []
+
+        def record_and_flush():
+            store.record(device, timestamp=day_ago + 20)
+            store.flush()
+
+        def downsample_while_recording(records, period):
+            # another thread flushes a reading of the day being rolled up
+            writer = threading.Thread(target=record_and_flush)
+            writer.start()
+            writer.join(0.5)
+            writers.append(writer)
+            return downsample(records, period)
+
+        with mock.patch.object(store, "_downsample", downsample_while_recording):
+            store.rollup(time.time())
+        writers[0].join(5)
+
+        # 1 rolled up record & the raw one written after the rollup
+        self.assertEqual(len(store.query()), 2)
+        self.assertEqual(store._list_segments("rollup"), [store._get_day(day_ago)])
+
+
+if __name__ == "__main__":
+    unittest.main()